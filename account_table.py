@@ -0,0 +1,72 @@
+"""
+📋 Trading Analyzer Pro - Account Table
+Resultados por cuenta como tabla ordenable y paginada (solo se envía al navegador la página visible)
+"""
+
+import math
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+DEFAULT_PAGE_SIZE = 25
+PAGE_SIZES = (10, 25, 50, 100)
+CARDS_MAX_ACCOUNTS = 12  # 🃏 Hasta aquí se pintan tarjetas por cuenta; por encima, la tabla paginada
+
+# 🏷️ Columnas de la tabla (clave del resultado -> título)
+ACCOUNT_COLUMNS = {
+    'account': "🏦 Cuenta",
+    'total_pnl': "💰 PnL",
+    'win_rate': "🎯 Win rate %",
+    'total_trades': "🔢 Trades",
+    'total_profit': "💚 Ganancias",
+    'total_loss': "💔 Pérdidas",
+    'excluded_operations': "🚫 Excluidas",
+    'total_rows': "📏 Filas",
+    'pnl_column': "📊 Columna PnL"
+}
+SORTABLE_COLUMNS = ('total_pnl', 'win_rate', 'total_trades', 'total_profit', 'total_loss', 'account')
+
+
+class AccountTable:
+    """📋 Una fila por cuenta/hoja, construida una vez por conjunto de resultados
+
+    Ordenar y paginar trabajan sobre este DataFrame pequeño (sin tocar las
+    series de PnL) y las órdenes ya calculadas se memorizan, así cambiar de
+    página en cada rerun solo corta filas.
+    """
+
+    def __init__(self, results: Dict):
+        self.frame = pd.DataFrame([
+            {'account': account, **{key: data.get(key) for key in ACCOUNT_COLUMNS if key != 'account'}}
+            for account, data in results.items()
+        ], columns=list(ACCOUNT_COLUMNS))
+        self._orders = {}
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def sorted(self, by: str = 'total_pnl', ascending: bool = False) -> pd.DataFrame:
+        """↕️ Filas ordenadas por `by` (estable: los empates conservan el orden de las hojas)"""
+        if by not in SORTABLE_COLUMNS:
+            raise ValueError(f"Columna no ordenable: {by!r} (usa {', '.join(SORTABLE_COLUMNS)})")
+        key = (by, ascending)
+        if key not in self._orders:
+            self._orders[key] = self.frame.sort_values(by, ascending=ascending, kind='stable', ignore_index=True)
+        return self._orders[key]
+
+    def page_count(self, page_size: int = DEFAULT_PAGE_SIZE) -> int:
+        return max(1, math.ceil(len(self.frame) / page_size))
+
+    def page(self, page: int = 1, page_size: int = DEFAULT_PAGE_SIZE, by: str = 'total_pnl',
+             ascending: bool = False) -> Tuple[pd.DataFrame, int, int]:
+        """📄 (filas de la página `page` (desde 1), primera posición, última posición) en el orden pedido"""
+        page = min(max(1, page), self.page_count(page_size))
+        start = (page - 1) * page_size
+        rows = self.sorted(by, ascending).iloc[start:start + page_size]
+        return rows, start + 1, start + len(rows)
+
+    @staticmethod
+    def display(rows: pd.DataFrame, columns: Optional[Dict] = None) -> pd.DataFrame:
+        """🏷️ Filas con los títulos de columna de la UI"""
+        columns = columns or ACCOUNT_COLUMNS
+        return rows[list(columns)].rename(columns=columns)
@@ -0,0 +1,216 @@
+"""
+🧮 Trading Analyzer Pro - Mergeable Aggregates
+Agregados de PnL combinables para analizar CSV por bloques (streaming)
+"""
+
+import os
+import tempfile
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from sheet_result import SheetResult
+
+# 📦 Tamaño de bloque por defecto y umbral para activar el streaming de CSV
+DEFAULT_CSV_CHUNKSIZE = 250_000
+CSV_STREAM_THRESHOLD_BYTES = 100 * 1024 * 1024
+
+# 🕒 Clave de orden de una fecha: NaT va al final, como en `np.argsort`
+_NAT_SORT_KEY = np.iinfo(np.int64).max
+
+
+@dataclass
+class PnLAggregate:
+    """🧮 Estado acumulado de PnL de una hoja, combinable bloque a bloque"""
+
+    total_rows: int = 0       # 📏 Filas leídas (antes de filtrar)
+    filtered_rows: int = 0    # 📏 Filas tras excluir operaciones no-trading
+    count: int = 0            # 🔢 Valores de PnL válidos (trades)
+    pnl_sum: float = 0.0
+    profit_sum: float = 0.0
+    loss_sum: float = 0.0     # ➖ Suma de valores negativos (queda negativa)
+    wins: int = 0
+    losses: int = 0
+    pnl_column: Optional[str] = None
+    category_counts: Dict[str, int] = field(default_factory=dict)     # 🏷️ Filas por categoría
+    category_amounts: Dict[str, float] = field(default_factory=dict)  # 💸 Importe por categoría
+
+    def update(self, pnl_values: pd.Series, total_rows: int, filtered_rows: int):
+        """➕ Incorporar un bloque de valores de PnL (ya sin NaN)"""
+        profits = pnl_values[pnl_values > 0]
+        losses = pnl_values[pnl_values < 0]
+
+        self.total_rows += total_rows
+        self.filtered_rows += filtered_rows
+        self.count += len(pnl_values)
+        self.pnl_sum += float(pnl_values.sum())
+        self.profit_sum += float(profits.sum())
+        self.loss_sum += float(losses.sum())
+        self.wins += len(profits)
+        self.losses += len(losses)
+        return self
+
+    def add_breakdown(self, category_counts: Dict[str, int], category_amounts: Dict[str, float]):
+        """🏷️ Acumular filas e importes por categoría de operación"""
+        for category, rows in category_counts.items():
+            self.category_counts[category] = self.category_counts.get(category, 0) + rows
+        for category, amount in category_amounts.items():
+            self.category_amounts[category] = self.category_amounts.get(category, 0.0) + amount
+        return self
+
+    def merge(self, other: 'PnLAggregate'):
+        """🔗 Combinar con otro agregado (asociativo: el orden de bloques no importa)"""
+        self.total_rows += other.total_rows
+        self.filtered_rows += other.filtered_rows
+        self.count += other.count
+        self.pnl_sum += other.pnl_sum
+        self.profit_sum += other.profit_sum
+        self.loss_sum += other.loss_sum
+        self.wins += other.wins
+        self.losses += other.losses
+        self.pnl_column = self.pnl_column or other.pnl_column
+        self.add_breakdown(other.category_counts, other.category_amounts)
+        return self
+
+    def to_dict(self) -> Dict:
+        """💾 Estado serializable (JSON) para persistirlo entre sesiones"""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'PnLAggregate':
+        """📥 Reconstruir un agregado guardado con `to_dict`"""
+        return cls(**state)
+
+    def to_result(self, pnl_values: Optional[np.ndarray] = None,
+                  pnl_times: Optional[np.ndarray] = None, trade_cube=None) -> SheetResult:
+        """📊 Resultado con las mismas claves que `analyze_data` (medias derivadas al final)"""
+        return SheetResult(
+            total_pnl=self.pnl_sum,
+            total_profit=self.profit_sum if self.wins > 0 else 0,
+            total_loss=abs(self.loss_sum) if self.losses > 0 else 0,
+            win_rate=(self.wins / self.count * 100) if self.count > 0 else 0,
+            total_trades=self.count,
+            avg_profit=(self.profit_sum / self.wins) if self.wins > 0 else 0,
+            avg_loss=(self.loss_sum / self.losses) if self.losses > 0 else 0,
+            pnl_values=pnl_values if pnl_values is not None else np.empty(0, dtype=np.float64),
+            pnl_times=pnl_times if pnl_times is not None else np.empty(0, dtype='datetime64[ns]'),
+            trade_cube=trade_cube,
+            pnl_column=self.pnl_column,
+            total_rows=self.total_rows,
+            filtered_rows=self.filtered_rows,
+            excluded_operations=self.total_rows - self.filtered_rows,
+            operation_breakdown={
+                category: {'rows': rows, 'amount': self.category_amounts.get(category, 0.0)}
+                for category, rows in self.category_counts.items()
+            }
+        )
+
+
+class CsvChunkSource:
+    """📦 CSV pendiente de leer por bloques: nunca se materializa completo"""
+
+    def __init__(self, source, chunksize: int = DEFAULT_CSV_CHUNKSIZE, read_options: Optional[Dict] = None,
+                 row_filter=None, dtype_plan=None):
+        self.source = source
+        self.chunksize = chunksize
+        self.read_options = read_options or {}
+        self.row_filter = row_filter  # 🔎 RowFilter aplicado a cada bloque (opcional)
+        self.dtype_plan = dtype_plan  # 🧱 DtypePlan aplicado a cada bloque al leerlo (opcional)
+
+    def with_row_filter(self, row_filter) -> 'CsvChunkSource':
+        """🔎 La misma fuente filtrando filas (y columnas) al leer cada bloque"""
+        read_options = dict(self.read_options)
+        if row_filter.usecols is not None and 'usecols' not in read_options:
+            read_options['usecols'] = row_filter.usecols
+        return CsvChunkSource(self.source, chunksize=self.chunksize, read_options=read_options, row_filter=row_filter,
+                              dtype_plan=self.dtype_plan)
+
+    def iter_chunks(self) -> Iterator[pd.DataFrame]:
+        """🔁 Recorrer el CSV en bloques de `chunksize` filas"""
+        if hasattr(self.source, 'seek'):
+            self.source.seek(0)
+
+        with pd.read_csv(self.source, chunksize=self.chunksize, **self.read_options) as reader:
+            chunks = (self.dtype_plan.apply(chunk) for chunk in reader) if self.dtype_plan is not None else reader
+            chunks = self.row_filter.filter_chunks(chunks) if self.row_filter is not None else chunks
+            for chunk in chunks:
+                yield chunk
+
+
+class SeriesSpill:
+    """💽 Series de PnL y fecha de un CSV por bloques, volcadas a disco a medida que llegan
+
+    Cada bloque llega ya ordenado por fecha y se añade a archivos temporales
+    anónimos (en `TMPDIR`), así la memoria del análisis queda acotada por el
+    tamaño de bloque. Al terminar, las series se devuelven como `np.memmap` de
+    solo lectura (igual que el histórico incremental) en orden cronológico:
+    exportaciones en orden ascendente se mapean tal cual y las descendentes se
+    reescriben bloque a bloque en orden inverso. Solo bloques con fechas
+    solapadas entre sí obligan a cargar las series para ordenarlas.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self.count = 0
+        self._runs = []  # 📋 (posición, filas, primera fecha, última fecha) de cada bloque
+        self._has_times = True
+        self._pnl_file = tempfile.TemporaryFile(prefix='trading_analyzer_pnl_', dir=directory)
+        self._time_file = tempfile.TemporaryFile(prefix='trading_analyzer_time_', dir=directory)
+
+    def append(self, pnl_values: np.ndarray, pnl_times: np.ndarray) -> 'SeriesSpill':
+        """➕ Añadir la serie (ordenada por fecha) de un bloque"""
+        if len(pnl_values) == 0:
+            return self
+        np.ascontiguousarray(pnl_values, dtype=np.float64).tofile(self._pnl_file)
+        if self._has_times and len(pnl_times) == len(pnl_values):
+            times = np.ascontiguousarray(pnl_times, dtype='datetime64[ns]')
+            self._runs.append((self.count, len(times), self._sort_key(times[0]), self._sort_key(times[-1])))
+            times.view(np.int64).tofile(self._time_file)
+        else:
+            # Un bloque sin fechas: la serie entera queda sin fechas (como al analizar la hoja completa)
+            self._has_times = False
+        self.count += len(pnl_values)
+        return self
+
+    def finish(self) -> Tuple[np.ndarray, np.ndarray]:
+        """📈 (PnL, fechas) en orden cronológico; fechas vacías si algún bloque no las tenía"""
+        pnl_values = self._map(self._pnl_file, np.float64)
+        if not self._has_times or self.count == 0:
+            return pnl_values, np.empty(0, dtype='datetime64[ns]')
+        pnl_times = self._map(self._time_file, np.int64).view('datetime64[ns]')
+
+        pairs = list(zip(self._runs, self._runs[1:]))
+        if all(run[2] >= previous[3] for previous, run in pairs):
+            return pnl_values, pnl_times
+        if all(run[3] < previous[2] for previous, run in pairs):
+            # Más recientes primero: invertir el orden de los bloques da el mismo orden estable
+            return (self._reverse_runs(pnl_values, np.float64),
+                    self._reverse_runs(pnl_times.view(np.int64), np.int64).view('datetime64[ns]'))
+        order = np.argsort(pnl_times, kind='stable')
+        return pnl_values[order], pnl_times[order]
+
+    def _reverse_runs(self, values: np.ndarray, dtype) -> np.ndarray:
+        handle = tempfile.TemporaryFile(prefix='trading_analyzer_series_', dir=self.directory)
+        for start, rows, _, _ in reversed(self._runs):
+            values[start:start + rows].tofile(handle)
+        return self._map(handle, dtype)
+
+    def _map(self, handle, dtype) -> np.ndarray:
+        if self.count == 0:
+            return np.empty(0, dtype=dtype)
+        handle.flush()
+        return np.memmap(handle, dtype=dtype, mode='r', shape=(self.count,))
+
+    @staticmethod
+    def _sort_key(timestamp: np.datetime64) -> int:
+        return _NAT_SORT_KEY if np.isnat(timestamp) else int(timestamp.view(np.int64))
+
+
+def should_stream_csv(uploaded_file) -> bool:
+    """🤔 Decidir si un CSV es lo bastante grande como para analizarlo por bloques"""
+    size = getattr(uploaded_file, 'size', None)
+    if size is None and isinstance(uploaded_file, (str, os.PathLike)):
+        size = os.path.getsize(uploaded_file)
+    return size is not None and size >= CSV_STREAM_THRESHOLD_BYTES
@@ -0,0 +1,188 @@
+"""
+🧵 Trading Analyzer Pro - Background Analysis Jobs
+Análisis en segundo plano con progreso por hoja y cancelación (la sesión de Streamlit no se bloquea)
+"""
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from analyzer_engine import AnalysisCancelled
+
+JOB_WORKERS_ENV = 'TRADING_ANALYZER_JOB_WORKERS'
+DEFAULT_JOB_WORKERS = 2
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+CANCELLED = 'cancelled'
+FAILED = 'failed'
+FINISHED_STATES = (DONE, CANCELLED, FAILED)
+
+_PROGRESS_HOOK = '_report_progress'
+
+
+class AnalysisJob:
+    """🧵 Un análisis en curso: estado, progreso por hoja, resultado y avisos del motor
+
+    Mientras corre, los avisos `_report_*` del analizador no tocan la UI (se
+    ejecutan en otro hilo): se guardan en `notices` y la UI los reproduce con
+    `replay_notices` al recoger el resultado en el siguiente rerun.
+    """
+
+    def __init__(self, key=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key                      # 🔑 Qué se está analizando (p. ej. archivos + histórico)
+        self.status = PENDING
+        self.stage = None                   # 📶 'load' (lectura + filtros) o 'analyze'
+        self.sheet = None
+        self.done = 0
+        self.total = 0
+        self.result = None
+        self.error = None
+        self.analyzer = None
+        self.notices = []
+        self.perf_records = []
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self) -> 'AnalysisJob':
+        """⏹️ Pedir la cancelación (el motor se detiene antes de la siguiente hoja o bloque)"""
+        self._cancel.set()
+        if self.future is not None and self.future.cancel():
+            self._finish(CANCELLED)
+        return self
+
+    def update_progress(self, stage: str, sheet_name: str, done: int, total: int):
+        with self._lock:
+            self.stage, self.sheet, self.done, self.total = stage, sheet_name, done, total
+
+    def get_progress(self) -> Dict:
+        """📶 Copia consistente del estado para pintarla en la UI"""
+        with self._lock:
+            fraction = (self.done / self.total) if self.total else 0.0
+            if self.stage == 'load':
+                fraction *= 0.5  # 📁 Leer hojas = primera mitad; analizarlas = segunda
+            elif self.stage == 'analyze':
+                fraction = 0.5 + fraction * 0.5
+            return {
+                'id': self.id,
+                'status': self.status,
+                'stage': self.stage,
+                'sheet': self.sheet,
+                'done': self.done,
+                'total': self.total,
+                'fraction': 1.0 if self.status == DONE else fraction,
+                'seconds': (self.finished_at or time.time()) - (self.started_at or self.created_at),
+                'error': str(self.error) if self.error is not None else None
+            }
+
+    def replay_notices(self, analyzer) -> 'AnalysisJob':
+        """📢 Emitir en `analyzer` (normalmente el de la UI) los avisos guardados durante el análisis"""
+        for hook, args, kwargs in self.notices:
+            getattr(analyzer, hook)(*args, **kwargs)
+        return self
+
+    def run(self, analyzer, task: Callable):
+        """▶️ Ejecutar `task(analyzer)` en el hilo actual con progreso, cancelación y avisos capturados"""
+        if self._cancel.is_set():
+            self._finish(CANCELLED)
+            return None
+
+        self.analyzer = analyzer
+        analyzer.cancel_event = self._cancel
+        for hook in [name for name in dir(type(analyzer)) if name.startswith('_report_')]:
+            if hook == _PROGRESS_HOOK:
+                setattr(analyzer, hook, self.update_progress)
+            else:
+                setattr(analyzer, hook, self._recorder(hook))
+
+        with self._lock:
+            self.status = RUNNING
+            self.started_at = time.time()
+        try:
+            self.result = task(analyzer)
+            self._finish(DONE)
+        except AnalysisCancelled:
+            self._finish(CANCELLED)
+        except Exception as e:
+            self.error = e
+            self._finish(FAILED)
+        finally:
+            self.perf_records = list(analyzer.perf.records)
+        return self.result
+
+    def _recorder(self, hook: str):
+        def record(*args, **kwargs):
+            self.notices.append((hook, args, kwargs))
+        return record
+
+    def _finish(self, status: str):
+        with self._lock:
+            self.status = status
+            self.finished_at = time.time()
+
+
+class JobRunner:
+    """🏭 Pool de hilos del proceso para los análisis en segundo plano
+
+    Se comparte entre todas las sesiones del servidor; cada sesión guarda solo
+    su `AnalysisJob` (en `st.session_state`), así el resultado sobrevive a los
+    reruns y se puede seguir tocando la UI mientras el análisis avanza.
+    """
+
+    def __init__(self, workers: int = DEFAULT_JOB_WORKERS):
+        self.workers = max(1, workers)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='analysis-job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, analyzer, task: Callable, key=None) -> AnalysisJob:
+        """➕ Encolar `task(analyzer)` y devolver su handle"""
+        job = AnalysisJob(key=key)
+        with self._lock:
+            # 🧹 Solo se recuerdan los trabajos que no han terminado
+            self._jobs = {job_id: other for job_id, other in self._jobs.items() if not other.finished}
+            self._jobs[job.id] = job
+        job.future = self._pool.submit(job.run, analyzer, task)
+        return job
+
+    def active_jobs(self) -> List[AnalysisJob]:
+        with self._lock:
+            return [job for job in self._jobs.values() if not job.finished]
+
+    def shutdown(self, cancel: bool = True):
+        """🔒 Cancelar lo pendiente y cerrar el pool"""
+        if cancel:
+            for job in self.active_jobs():
+                job.cancel()
+        self._pool.shutdown(wait=True, cancel_futures=cancel)
+
+
+_default_runner = None
+_default_runner_lock = threading.Lock()
+
+
+def get_job_runner() -> JobRunner:
+    """🌐 Pool de trabajos compartido por todas las sesiones del proceso"""
+    global _default_runner
+
+    with _default_runner_lock:
+        if _default_runner is None:
+            _default_runner = JobRunner(workers=int(os.environ.get(JOB_WORKERS_ENV, DEFAULT_JOB_WORKERS)))
+        return _default_runner
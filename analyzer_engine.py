@@ -0,0 +1,678 @@
+"""
+🧠 Trading Analyzer Pro - Analysis Engine
+Carga, filtrado y análisis de exportaciones sin Streamlit ni Plotly (usable desde workers y scripts)
+"""
+
+import hashlib
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Importar nuestro sistema de filtros
+try:
+    from sheet_filter import SheetFilter, CommonFilters
+except ImportError:
+    # Fallback si no se puede importar
+    class SheetFilter:
+        def selected_sheet_names(self, sheets): return list(sheets.keys())
+        def filter_sheets(self, sheets, on_sheet=None, sheet_names=None): return sheets
+    class CommonFilters:
+        @staticmethod
+        def by_sheet_numbers(nums): return SheetFilter()
+        @staticmethod
+        def only_futures(): return SheetFilter()
+
+from ingest_cache import IngestionCache, get_default_cache, hash_file_content, make_cache_key
+from lazy_workbook import LazyWorkbook
+from columnar_cache import ColumnarSidecarStore, read_excel_with_sidecar
+from aggregates import PnLAggregate, CsvChunkSource, SeriesSpill
+from transaction_classifier import TransactionClassifier, DEFAULT_CLASSIFIER
+from sheet_result import SheetResult
+from trade_cube import TradeCube
+from column_detection import (
+    detect_columns, detect_pnl_column, detect_time_column, detect_symbol_column, detect_side_column, timestamps_to_numpy
+)
+from incremental import IncrementalStateStore, NewRowSelector, UnparseableTimestamps
+from trade_merge import MergedWorkbook
+from trade_store import TradeStore
+from dtype_planner import SAMPLE_ROWS, DtypePlan, memory_report, plan_and_apply, plan_dtypes
+from result_cache import ResultCache, make_result_key
+from perf_instrumentation import PerfRecorder, NULL_RECORDER
+
+# ⚙️ Análisis concurrente de hojas (configurable por entorno)
+ANALYSIS_WORKERS_ENV = 'TRADING_ANALYZER_WORKERS'
+ANALYSIS_EXECUTOR_ENV = 'TRADING_ANALYZER_EXECUTOR'
+
+
+class AnalysisCancelled(Exception):
+    """⏹️ Se pidió cancelar el análisis (ver `TradingAnalyzer.cancel_event`)"""
+
+
+class TradingAnalyzer:
+    """📊 Motor de análisis: sin UI; los avisos pasan por métodos `_report_*` que la UI sobrescribe"""
+    
+    def __init__(self, cache: Optional[IngestionCache] = None, lazy_sheets: bool = False,
+                 csv_chunksize: Optional[int] = None, classifier: Optional[TransactionClassifier] = None,
+                 sidecar: Optional[ColumnarSidecarStore] = None, workers: int = 1,
+                 executor: str = 'thread', perf: Optional[PerfRecorder] = None,
+                 trade_store: Optional[TradeStore] = None, plan_dtypes: bool = True,
+                 excel_engine: Optional[str] = None, result_cache: Optional[ResultCache] = None):
+        self.data = None
+        self.analysis = {}
+        self.sheet_filter = SheetFilter()  # 🗂️ Sistema de filtros
+        self.cache = cache if cache is not None else get_default_cache()  # 💾 Caché de ingesta
+        self.lazy_sheets = lazy_sheets  # 📚 Parsear hojas de Excel solo cuando el filtro las elige
+        self.csv_chunksize = csv_chunksize  # 📦 Analizar CSV por bloques (None = carga completa)
+        self.classifier = classifier or DEFAULT_CLASSIFIER  # 🏷️ Clasificador de operaciones
+        self.sidecar = sidecar  # 🗄️ Copias columnares de las hojas en disco (opcional)
+        self.workers = max(1, workers)  # ⚙️ Hojas analizadas en paralelo
+        self.executor = executor  # 'thread' o 'process'
+        self.last_new_rows = {}  # 🔁 Filas nuevas por hoja en el último análisis incremental
+        self.last_error = None  # ❌ Última excepción de carga (para usos sin UI)
+        self.last_merge_report = None  # 🧬 Duplicados eliminados al unir varias exportaciones
+        self.perf = perf or NULL_RECORDER  # ⏱️ Instrumentación por etapa (desactivada por defecto)
+        self.trade_store = trade_store  # 🗃️ Histórico local de trades (opcional)
+        self.plan_dtypes = plan_dtypes  # 🧱 Cargar solo columnas del análisis, categóricas y fechas ya parseadas
+        self.excel_engine = excel_engine  # 📗 None = automático (ver excel_readers.select_excel_engines)
+        self.cancel_event = None  # ⏹️ threading.Event: si se activa, el análisis se detiene entre hojas/bloques
+        self.last_excel_engine = None  # 🏷️ Motor con el que se leyó el último Excel ('cache' / 'sidecar' sin parsear)
+        self.last_stored_trades = 0  # 🗃️ Trades nuevos guardados en el último análisis
+        self.result_cache = result_cache  # ♻️ Resultados por hoja memorizados (None = recalcular siempre)
+        self.last_cached_sheets = []  # ♻️ Hojas del último análisis servidas desde `result_cache`
+        self._sources = []  # 📁 Archivos cargados (su hash forma parte de la clave de resultados)
+        self._file_hashes = {}
+    
+    def set_sheet_filter(self, filter_obj: SheetFilter):
+        """🔧 Configurar filtro de hojas"""
+        self.sheet_filter = filter_obj
+        return self
+    
+    def _filter_non_trading_operations(self, df, report: bool = True):
+        """🚫 Filtrar operaciones que no son de trading real"""
+        df_filtered, _ = self._classify_operations(df, report=report)
+        return df_filtered
+    
+    def _classify_operations(self, df, amount_col: Optional[str] = None, report: bool = True):
+        """🏷️ Clasificar operaciones en una pasada y quedarse solo con las de trading
+        
+        Devuelve (DataFrame filtrado, ClassificationResult o None si no hay columna de tipo).
+        """
+        if len(df) == 0:
+            return df, None
+        
+        # Buscar columna de tipo de operación
+        type_col = self.classifier.detect_type_column(df)
+        
+        if type_col is None:
+            # Si no hay columna de tipo, devolver DataFrame original
+            return df, None
+        
+        classification = self.classifier.classify(df, type_col, amount_col=amount_col)
+        
+        # Filtrar DataFrame
+        df_filtered = df[classification.trading_mask].copy()
+        
+        # 📊 Avisar de las operaciones excluidas
+        if report and classification.excluded_count > 0:
+            self._report_excluded_operations(classification.excluded_count)
+        
+        return df_filtered, classification
+    
+    def load_file(self, uploaded_file):
+        """📁 Cargar archivo (reutiliza hojas ya parseadas si el contenido no cambió)"""
+        with self.perf.stage('load_file') as record:
+            loaded = self._load_file(uploaded_file)
+            if self.perf.enabled and isinstance(self.data, dict):
+                frames = [df for df in self.data.values() if isinstance(df, pd.DataFrame)]
+                record.rows = sum(len(df) for df in frames)
+                record.output_bytes = int(sum(df.memory_usage(deep=False).sum() for df in frames))
+            record.extra['file'] = getattr(uploaded_file, 'name', None)
+            if self.last_excel_engine is not None:
+                record.extra['excel_engine'] = self.last_excel_engine
+        return loaded
+    
+    def _load_file(self, uploaded_file):
+        self._sources = [uploaded_file]
+        try:
+            data = self._read_source(uploaded_file)
+        except Exception as e:
+            self.last_error = e
+            self._report_load_error(e)
+            return False
+        if data is None:
+            return None
+        self.data = data
+        return True
+    
+    def _read_source(self, uploaded_file):
+        """📄 Datos de un archivo (dict o libro perezoso de hojas); None si la extensión no se soporta"""
+        # 📋 Proyección de columnas del filtro de filas (si ya está configurado al cargar)
+        row_filter = getattr(self.sheet_filter, 'row_filter', None)
+        usecols = row_filter.usecols if row_filter is not None else None
+        read_options = {'usecols': usecols} if usecols is not None else {}
+        # Los sidecars guardan hojas completas: con sidecar se proyecta al leerlos
+        excel_options = read_options if self.sidecar is None else {}
+        self.last_excel_engine = None
+        # 🔠 Extensión sin distinguir mayúsculas (REPORT.XLSX), igual que el descubrimiento de batch_cli
+        file_name = uploaded_file.name.lower()
+        
+        if file_name.endswith(('.xlsx', '.xls')) and self.lazy_sheets:
+            workbook = LazyWorkbook(
+                uploaded_file, file_hash=self._file_hash(uploaded_file),
+                cache=self.cache, sidecar=self.sidecar, read_options=excel_options, plan_dtypes=self.plan_dtypes,
+                engine=self.excel_engine
+            )
+            self.last_excel_engine = workbook.engine
+            return workbook
+        elif file_name.endswith(('.xlsx', '.xls')):
+            def read_workbook(file_hash):
+                sheets, self.last_excel_engine = read_excel_with_sidecar(
+                    uploaded_file, file_hash, self.sidecar, engine=self.excel_engine, **excel_options
+                )
+                # Los lectores de Excel materializan todas las celdas igualmente: el plan se aplica tras parsear
+                return self._plan_sheets(sheets)
+            
+            # Todos los motores dan las mismas hojas: el motor no forma parte de la clave de caché
+            self.last_excel_engine = 'cache'
+            return self._load_cached(
+                uploaded_file, {'reader': 'excel', 'sheet_name': None, 'plan_dtypes': self.plan_dtypes, **excel_options},
+                read_workbook
+            )
+        elif file_name.endswith('.csv'):
+            plan = plan_dtypes(_read_csv_sample(uploaded_file, SAMPLE_ROWS)) if self.plan_dtypes else None
+            if plan is not None:
+                read_options = plan.read_options()
+            else:
+                read_options = self._profile_read_options(uploaded_file, read_options)
+            
+            if self.csv_chunksize:
+                return {'main': CsvChunkSource(uploaded_file, chunksize=self.csv_chunksize,
+                                               read_options=read_options, dtype_plan=plan)}
+            return self._load_cached(
+                uploaded_file, {'reader': 'csv', **read_options, 'dtype_plan': plan.to_dict() if plan else None},
+                lambda file_hash: {'main': self._apply_plan(plan, pd.read_csv(uploaded_file, **read_options))}
+            )
+        return None
+    
+    def _profile_read_options(self, uploaded_file, read_options: Dict) -> Dict:
+        """🏦 Al proyectar columnas de un CSV con perfil de exchange conocido: solo sus columnas y dtypes"""
+        if 'usecols' not in read_options:
+            return read_options
+        profile_options = detect_columns(_read_csv_sample(uploaded_file, 0)).read_options()
+        return profile_options or read_options
+    
+    def _plan_sheets(self, sheets: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        """🧱 Aplicar el plan de dtypes de cada hoja (si está activado)"""
+        if not self.plan_dtypes:
+            return sheets
+        return {name: plan_and_apply(df) for name, df in sheets.items()}
+    
+    @staticmethod
+    def _apply_plan(plan: Optional[DtypePlan], df: pd.DataFrame) -> pd.DataFrame:
+        return plan.apply(df) if plan is not None else df
+    
+    def memory_report(self) -> Dict[str, Dict]:
+        """🧱 Memoria real (deep) por hoja de las hojas ya cargadas en memoria"""
+        if not self.data:
+            return {}
+        if hasattr(self.data, 'loaded_sheets'):
+            return memory_report({name: self.data[name] for name in self.data.loaded_sheets})
+        return memory_report(self.data)
+    
+    def load_files(self, uploaded_files: List) -> bool:
+        """📁 Cargar varias exportaciones a la vez y unir las hojas con el mismo nombre
+        
+        Los archivos se leen en paralelo (hilos, o procesos con `executor='process'`)
+        y las hojas de la misma cuenta se deduplican por identidad de trade al
+        acceder a ellas (ver `MergedWorkbook`).
+        """
+        if len(uploaded_files) == 1:
+            return self.load_file(uploaded_files[0])
+        
+        with self.perf.stage('load_files') as record:
+            record.extra['files'] = len(uploaded_files)
+            try:
+                sources = self._read_sources(uploaded_files)
+            except Exception as e:
+                self.last_error = e
+                self._report_load_error(e)
+                return False
+            if any(source is None for source in sources):
+                return None
+            self._sources = list(uploaded_files)
+            self.data = MergedWorkbook(
+                sources, source_names=[getattr(f, 'name', str(f)) for f in uploaded_files],
+                workers=max(self.workers, len(uploaded_files))
+            )
+            self.last_merge_report = None
+        return True
+    
+    def _read_sources(self, uploaded_files: List) -> List:
+        """⚙️ `_read_source` de cada archivo en un pool, conservando el orden"""
+        workers = min(max(self.workers, 2), len(uploaded_files))
+        if self.executor == 'process':
+            # Cada proceso recibe los bytes del archivo y devuelve sus hojas ya parseadas
+            row_filter = getattr(self.sheet_filter, 'row_filter', None)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(_read_source_worker, getattr(f, 'name', str(f)), _file_bytes(f), row_filter,
+                                self.plan_dtypes, self.excel_engine)
+                    for f in uploaded_files
+                ]
+                return [future.result() for future in futures]
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(self._read_source, uploaded_files))
+    
+    def _load_cached(self, uploaded_file, options: Dict, loader):
+        """💾 Parsear con `loader(file_hash)` solo si (hash del contenido, opciones) no está en caché"""
+        file_hash = self._file_hash(uploaded_file)
+        key = make_cache_key(file_hash, options)
+        return self.cache.get_or_load(key, lambda: loader(file_hash))
+    
+    def _file_hash(self, uploaded_file) -> str:
+        """🔑 Hash del contenido, calculado una sola vez por archivo cargado"""
+        file_hash = self._file_hashes.get(id(uploaded_file))
+        if file_hash is None:
+            file_hash = self._file_hashes[id(uploaded_file)] = hash_file_content(uploaded_file)
+        return file_hash
+    
+    def _source_hash(self) -> str:
+        """🔑 Hash de lo cargado: el del archivo o el de todas las exportaciones unidas (en orden)"""
+        hashes = [self._file_hash(uploaded_file) for uploaded_file in self._sources]
+        if len(hashes) == 1:
+            return hashes[0]
+        return hashlib.sha256('+'.join(hashes).encode('utf-8')).hexdigest()
+    
+    def _result_key(self, sheet_name: str) -> str:
+        row_filter = getattr(self.sheet_filter, 'row_filter', None)
+        return make_result_key(
+            self._source_hash(), sheet_name,
+            row_filter.fingerprint() if row_filter is not None else '',
+            self.classifier.fingerprint()
+        )
+    
+    def analysis_key(self) -> Tuple:
+        """🔑 Identidad del análisis que haría ahora `analyze_data`: contenido, hojas, filtro de filas y palabras clave"""
+        if not self.data or not self._sources:
+            return ()
+        row_filter = getattr(self.sheet_filter, 'row_filter', None)
+        return (
+            self._source_hash(),
+            tuple(self.sheet_filter.selected_sheet_names(self.data)),
+            row_filter.fingerprint() if row_filter is not None else '',
+            self.classifier.fingerprint()
+        )
+    
+    def analyze_data(self):
+        """🧠 Análisis de datos con filtros de hojas"""
+        if not self.data:
+            return {}
+        
+        # ♻️ Hojas ya analizadas con el mismo archivo, filtro de filas y palabras clave: ni se cargan
+        selected = self.sheet_filter.selected_sheet_names(self.data)
+        cached = self._cached_results(selected)
+        self.last_cached_sheets = list(cached)
+        
+        # 🗂️ Aplicar filtros de hojas
+        with self.perf.stage('filter_sheets') as record:
+            filtered_data = self.sheet_filter.filter_sheets(
+                self.data, on_sheet=self._progress_callback('load'),
+                sheet_names=[sheet_name for sheet_name in selected if sheet_name not in cached]
+            )
+            record.extra['sheets_selected'] = len(selected)
+            record.extra['sheets_cached'] = len(cached)
+            if self.perf.enabled:
+                frames = [df for df in filtered_data.values() if isinstance(df, pd.DataFrame)]
+                record.rows = sum(len(df) for df in frames)
+                record.output_bytes = int(sum(df.memory_usage(deep=False).sum() for df in frames))
+        
+        # 📊 Estado del filtro (qué hojas se analizan y cuáles quedan fuera)
+        self._report_filter_status(
+            total_sheets=len(self.data),
+            analyzed_sheets=selected,
+            excluded_sheets=[name for name in self.data.keys() if name not in selected]
+        )
+        
+        if cached:
+            self._report_cached_results(list(cached))
+        
+        if self.trade_store is not None:
+            self._persist_trades(filtered_data)
+        
+        outputs = self._run_sheet_analyses(filtered_data)
+        if self.result_cache is not None:
+            merge_reports = self.data.get_merge_report()['sheets'] if isinstance(self.data, MergedWorkbook) else {}
+            for sheet_name, output in outputs.items():
+                self.result_cache.put(self._result_key(sheet_name), output + (merge_reports.get(sheet_name),))
+        outputs.update(cached)
+        
+        results = {}
+        
+        for sheet_name in selected:
+            result, excluded_count = outputs[sheet_name]
+            # 📊 Estadísticas de filtrado (los avisos se emiten desde el hilo principal)
+            if excluded_count > 0:
+                self._report_excluded_operations(excluded_count)
+            
+            if result is not None:
+                results[sheet_name] = result
+        
+        self._collect_merge_report()
+        return results
+    
+    def analyze_incremental(self, store: IncrementalStateStore, dataset: str) -> Dict[str, SheetResult]:
+        """🔁 Procesar solo las filas posteriores a la marca de agua guardada de cada hoja
+        
+        El agregado persistido se combina con el de las filas nuevas, de modo que las
+        métricas coinciden con un recálculo completo del histórico.
+        """
+        if not self.data:
+            return {}
+        
+        filtered_data = self.sheet_filter.filter_sheets(self.data, on_sheet=self._progress_callback('load'))
+        results = {}
+        self.last_new_rows = {}
+        
+        for index, (sheet_name, df) in enumerate(filtered_data.items(), 1):
+            self._check_cancelled()
+            state = store.load(dataset, sheet_name)
+            selector = NewRowSelector(state)
+            
+            if isinstance(df, CsvChunkSource):
+                # Solo las filas nuevas de cada bloque llegan a memoria
+                try:
+                    new_rows = self._select_new_chunks(selector, df)
+                except UnparseableTimestamps:
+                    # 🕒 NaT en un bloque posterior: toda la hoja por posición, como si se leyera entera
+                    new_rows = self._select_new_chunks(NewRowSelector(state, use_time=False), df)
+            else:
+                new_rows = selector(df)
+            
+            aggregate, pnl_values, pnl_times, _ = self._aggregate_sheet(new_rows, build_cube=False)
+            state.advance(new_rows, aggregate)
+            store.save(dataset, sheet_name, state, pnl_values, new_pnl_times=pnl_times)
+            self.last_new_rows[sheet_name] = len(new_rows)
+            self._report_progress('analyze', sheet_name, index, len(filtered_data))
+            
+            if state.aggregate.count > 0:
+                results[sheet_name] = state.aggregate.to_result(
+                    pnl_values=store.load_pnl_values(dataset, sheet_name),
+                    pnl_times=store.load_pnl_times(dataset, sheet_name)
+                )
+        
+        self._collect_merge_report()
+        return results
+    
+    def _select_new_chunks(self, selector: NewRowSelector, source: CsvChunkSource) -> pd.DataFrame:
+        new_chunks = [selector(chunk) for chunk in self._iter_chunks(source)]
+        return pd.concat(new_chunks) if new_chunks else pd.DataFrame()
+    
+    def _cached_results(self, sheet_names: List[str]) -> Dict[str, Tuple[Optional[SheetResult], int]]:
+        """♻️ Resultados ya memorizados de las hojas pedidas (vacío sin `result_cache`)"""
+        if self.result_cache is None or not self._sources:
+            return {}
+        cached = {}
+        for sheet_name in sheet_names:
+            entry = self.result_cache.get(self._result_key(sheet_name))
+            if entry is None:
+                continue
+            result, excluded_count, merge_report = entry
+            cached[sheet_name] = (result, excluded_count)
+            if merge_report is not None and isinstance(self.data, MergedWorkbook):
+                self.data.restore_report(sheet_name, merge_report)  # 🧬 El aviso de duplicados no se pierde
+        return cached
+    
+    def _persist_trades(self, filtered_data):
+        """🗃️ Guardar los trades normalizados de cada hoja en el histórico local (cuenta = hoja)
+        
+        Con filtro de filas se guarda la hoja sin filtrar: el nº de ocurrencia que
+        forma la clave de cada trade no puede depender del filtro, o reimportar
+        sin él volvería a guardar los mismos trades.
+        """
+        row_filter = getattr(self.sheet_filter, 'row_filter', None)
+        unfiltered = row_filter is not None and row_filter.has_predicates
+        with self.perf.stage('persist_trades') as record:
+            self.last_stored_trades = sum(
+                self.trade_store.insert_sheet(sheet_name, self.data[sheet_name] if unfiltered else df,
+                                              classifier=self.classifier)
+                for sheet_name, df in filtered_data.items()
+            )
+            record.rows = self.last_stored_trades
+    
+    def analyze_history(self, accounts: Optional[List[str]] = None, start=None, end=None,
+                        symbols: Optional[List[str]] = None) -> Dict[str, SheetResult]:
+        """🗃️ Análisis por rango de fechas / cuentas sobre el histórico local, sin volver a parsear"""
+        if self.trade_store is None:
+            return {}
+        with self.perf.stage('analyze_history') as record:
+            results = self.trade_store.summarize(accounts=accounts, start=start, end=end, symbols=symbols)
+            record.rows = sum(result.total_trades for result in results.values())
+        return results
+    
+    def _collect_merge_report(self):
+        """🧬 Guardar y avisar de los duplicados eliminados (solo con varias exportaciones)"""
+        if isinstance(self.data, MergedWorkbook):
+            self.last_merge_report = self.data.get_merge_report()
+            self._report_duplicates(self.last_merge_report)
+    
+    def _run_sheet_analyses(self, filtered_data) -> Dict[str, Tuple[Optional[SheetResult], int]]:
+        """⚙️ Analizar las hojas en serie o en un pool de hilos/procesos, conservando el orden"""
+        total = len(filtered_data)
+        if self.workers <= 1 or total <= 1:
+            outputs = {}
+            for sheet_name, df in filtered_data.items():
+                outputs[sheet_name] = self._analyze_sheet(df, sheet_name)
+                self._report_progress('analyze', sheet_name, len(outputs), total)
+            return outputs
+        
+        use_processes = self.executor == 'process'
+        pool_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        
+        with pool_class(max_workers=min(self.workers, len(filtered_data))) as pool:
+            futures = {}
+            for sheet_name, df in filtered_data.items():
+                if use_processes and not isinstance(df, CsvChunkSource):
+                    futures[sheet_name] = pool.submit(
+                        _analyze_sheet_worker, df, self.classifier, sheet_name, self.perf.enabled,
+                        self.perf.track_memory
+                    )
+                elif use_processes:
+                    # Los CSV en streaming leen del archivo subido: se quedan en este proceso
+                    futures[sheet_name] = None
+                else:
+                    futures[sheet_name] = pool.submit(self._analyze_sheet, df, sheet_name)
+            
+            outputs = {}
+            for sheet_name, future in futures.items():
+                if future is None:
+                    outputs[sheet_name] = self._analyze_sheet(filtered_data[sheet_name], sheet_name)
+                elif use_processes:
+                    # Las mediciones del proceso hijo vuelven junto al resultado
+                    outputs[sheet_name], worker_records = future.result()
+                    self.perf.extend(worker_records)
+                else:
+                    outputs[sheet_name] = future.result()
+                self._report_progress('analyze', sheet_name, len(outputs), total)
+                self._check_cancelled()
+            return outputs
+    
+    def _analyze_sheet(self, df, sheet_name: Optional[str] = None) -> Tuple[Optional[SheetResult], int]:
+        """📄 Analizar una hoja sin efectos en la UI: (resultado o None, operaciones excluidas)"""
+        self._check_cancelled()
+        with self.perf.stage('analyze_sheet', sheet=sheet_name) as record:
+            # 📦 CSV grandes: agregados combinables bloque a bloque
+            if isinstance(df, CsvChunkSource):
+                aggregate, pnl_values, pnl_times, cube = self._analyze_chunks(df, sheet_name)
+            else:
+                aggregate, pnl_values, pnl_times, cube = self._aggregate_sheet(df, sheet_name)
+            record.rows = aggregate.total_rows
+            
+            result = None
+            if aggregate.count > 0:
+                result = aggregate.to_result(pnl_values=pnl_values, pnl_times=pnl_times, trade_cube=cube)
+                if self.perf.enabled:
+                    record.output_bytes = result.nbytes  # 📏 Series por trade + cubo que se quedan en memoria
+        return result, aggregate.total_rows - aggregate.filtered_rows
+    
+    def _aggregate_sheet(self, df, sheet_name: Optional[str] = None,
+                         build_cube: bool = True) -> Tuple[PnLAggregate, np.ndarray, np.ndarray, Optional[TradeCube]]:
+        """🧮 Filtrar una hoja (o bloque) y reducirla a un agregado combinable + serie de PnL + cubo
+        
+        La serie se devuelve en orden cronológico junto a sus fechas (array vacío
+        si la hoja no tiene columna de fecha). El `TradeCube` por (hora, símbolo,
+        lado) sale de las mismas filas filtradas (None con `build_cube=False`).
+        """
+        # Buscar columnas PnL
+        pnl_col = self._detect_pnl_column(df)
+        
+        # 🚫 Filtrar transferencias y operaciones no-trading (con desglose por categoría)
+        with self.perf.stage('classify_operations', sheet=sheet_name, rows=len(df)):
+            df_filtered, classification = self._classify_operations(df, amount_col=pnl_col, report=False)
+        
+        aggregate = PnLAggregate(pnl_column=pnl_col)  # 📊 Guardar nombre de columna detectada
+        if classification is not None:
+            aggregate.add_breakdown(classification.category_counts, classification.category_amounts)
+        
+        if pnl_col and len(df_filtered) > 0:
+            pnl_values = df_filtered[pnl_col].dropna()
+        else:
+            pnl_values = pd.Series(dtype=np.float64)
+        
+        aggregate.update(pnl_values, total_rows=len(df), filtered_rows=len(df_filtered))
+        
+        # 🕒 Ordenar la serie por fecha (estable: los empates conservan el orden del archivo)
+        time_col = detect_time_column(df_filtered)
+        pnl_array = pnl_values.to_numpy(dtype=np.float64)
+        pnl_times = None
+        if time_col is not None and len(pnl_values) > 0:
+            pnl_times = timestamps_to_numpy(df_filtered.loc[pnl_values.index, time_col])
+        
+        cube = None
+        if build_cube:
+            with self.perf.stage('build_cube', sheet=sheet_name, rows=len(pnl_values)):
+                cube = TradeCube.from_trades(
+                    pnl_array, pnl_times,
+                    symbols=self._column_values(df_filtered, pnl_values.index, detect_symbol_column(df_filtered)),
+                    sides=self._column_values(df_filtered, pnl_values.index, detect_side_column(df_filtered))
+                )
+        
+        if pnl_times is None:
+            return aggregate, pnl_array, np.empty(0, dtype='datetime64[ns]'), cube
+        order = np.argsort(pnl_times, kind='stable')
+        return aggregate, pnl_array[order], pnl_times[order], cube
+    
+    @staticmethod
+    def _column_values(df, rows, column: Optional[str]) -> Optional[pd.Series]:
+        return df.loc[rows, column] if column is not None else None
+    
+    def _detect_pnl_column(self, df) -> Optional[str]:
+        """🔎 Buscar la columna de PnL por nombre"""
+        return detect_pnl_column(df)
+    
+    def _analyze_chunks(self, source: CsvChunkSource,
+                        sheet_name: Optional[str] = None) -> Tuple[PnLAggregate, np.ndarray, np.ndarray, TradeCube]:
+        """📦 Filtrar, detectar columna PnL y acumular cada bloque sin retener el CSV completo
+        
+        Las series de PnL y fecha de cada bloque se vuelcan a disco (`SeriesSpill`)
+        y vuelven como memmaps: la memoria sigue acotada por el tamaño de bloque.
+        """
+        aggregate = PnLAggregate()
+        spill = SeriesSpill()
+        cubes = []
+        
+        for chunk in self._iter_chunks(source):
+            chunk_aggregate, chunk_pnl, chunk_times, chunk_cube = self._aggregate_sheet(chunk, sheet_name)
+            aggregate.merge(chunk_aggregate)
+            spill.append(chunk_pnl, chunk_times)
+            cubes.append(chunk_cube)
+        
+        pnl_values, pnl_times = spill.finish()
+        return aggregate, pnl_values, pnl_times, TradeCube.combine(cubes)
+    
+    def _iter_chunks(self, source: CsvChunkSource):
+        """📦 Bloques de un CSV comprobando la cancelación antes de leer cada uno"""
+        for chunk in source.iter_chunks():
+            self._check_cancelled()
+            yield chunk
+    
+    def _check_cancelled(self):
+        """⏹️ Lanzar `AnalysisCancelled` si se activó `cancel_event`"""
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise AnalysisCancelled()
+    
+    def _progress_callback(self, stage: str):
+        """📶 Callback por hoja para `SheetFilter.filter_sheets` (progreso + cancelación)"""
+        def on_sheet(sheet_name: str, done: int, total: int):
+            self._report_progress(stage, sheet_name, done, total)
+            self._check_cancelled()
+        return on_sheet
+    
+    # 📢 Avisos: sin efecto en el motor, la UI los muestra
+    def _report_filter_status(self, total_sheets: int, analyzed_sheets: List[str], excluded_sheets: List[str]):
+        """📊 Hojas totales, analizadas y excluidas por el filtro"""
+    
+    def _report_excluded_operations(self, excluded_count: int):
+        """🚫 Operaciones no-trading excluidas de una hoja"""
+    
+    def _report_load_error(self, error: Exception):
+        """❌ Error al cargar el archivo (queda también en `last_error`)"""
+    
+    def _report_duplicates(self, merge_report: Dict):
+        """🧬 Filas duplicadas eliminadas al unir exportaciones (queda también en `last_merge_report`)"""
+    
+    def _report_progress(self, stage: str, sheet_name: str, done: int, total: int):
+        """📶 Hoja terminada: `stage` es 'load' (lectura + filtros) o 'analyze'"""
+    
+    def _report_cached_results(self, sheet_names: List[str]):
+        """♻️ Hojas servidas desde la caché de resultados (quedan también en `last_cached_sheets`)"""
+
+
+def _read_csv_sample(uploaded_file, nrows: int) -> pd.DataFrame:
+    """📋 Cabecera y primeras `nrows` filas de un CSV (el archivo vuelve al inicio)"""
+    if hasattr(uploaded_file, 'seek'):
+        uploaded_file.seek(0)
+    sample = pd.read_csv(uploaded_file, nrows=nrows)
+    if hasattr(uploaded_file, 'seek'):
+        uploaded_file.seek(0)
+    return sample
+
+
+def _file_bytes(uploaded_file) -> bytes:
+    """📦 Contenido de un archivo subido (o ruta local) para enviarlo a otro proceso"""
+    if isinstance(uploaded_file, (str, os.PathLike)):
+        with open(uploaded_file, 'rb') as handle:
+            return handle.read()
+    uploaded_file.seek(0)
+    content = uploaded_file.read()
+    uploaded_file.seek(0)
+    return content
+
+
+def _read_source_worker(name: str, content: bytes, row_filter=None, plan_dtypes: bool = True,
+                        excel_engine: Optional[str] = None):
+    """⚙️ Tarea para ProcessPoolExecutor: parsear un archivo completo en otro proceso"""
+    source = io.BytesIO(content)
+    source.name = name
+    analyzer = TradingAnalyzer(cache=IngestionCache(max_bytes=0), plan_dtypes=plan_dtypes, excel_engine=excel_engine)
+    if row_filter is not None:
+        analyzer.sheet_filter.row_filter = row_filter
+    return analyzer._read_source(source)
+
+
+def _analyze_sheet_worker(df, classifier: TransactionClassifier, sheet_name: str, perf_enabled: bool,
+                          track_memory: bool = False):
+    """⚙️ Tarea para ProcessPoolExecutor: analizar una hoja en otro proceso"""
+    # 🧠 tracemalloc es por proceso: cada worker lo activa durante su hoja
+    perf = PerfRecorder(enabled=perf_enabled, track_memory=track_memory).start_memory_tracking()
+    analyzer = TradingAnalyzer(cache=IngestionCache(max_bytes=0), classifier=classifier, perf=perf)
+    try:
+        return analyzer._analyze_sheet(df, sheet_name), perf.records
+    finally:
+        if track_memory:
+            perf.stop_memory_tracking()
+
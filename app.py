@@ -3,27 +3,30 @@
 Version that works guaranteed in Streamlit Cloud
 """
 
+import os
+from typing import Dict, List, Optional
+
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
 import numpy as np
-from datetime import datetime
-from typing import Dict, Optional
-import io
-import os
 
-# Importar nuestro sistema de filtros y SEO
-try:
-    from sheet_filter import SheetFilter, CommonFilters
-except ImportError:
-    # Fallback si no se puede importar
-    class SheetFilter:
-        def filter_sheets(self, sheets): return sheets
-    class CommonFilters:
-        @staticmethod
-        def by_sheet_numbers(nums): return SheetFilter()
-        @staticmethod
-        def only_futures(): return SheetFilter()
+# 🧠 Motor de análisis (sin Streamlit): también usable desde workers y scripts
+from analyzer_engine import (
+    TradingAnalyzer, SheetFilter, CommonFilters, ANALYSIS_WORKERS_ENV, ANALYSIS_EXECUTOR_ENV
+)
+from columnar_cache import get_default_sidecar
+from aggregates import DEFAULT_CSV_CHUNKSIZE, should_stream_csv
+from incremental import get_default_state_store
+from trade_store import TradeStore, get_default_trade_store
+from result_cache import get_default_result_cache
+from perf_instrumentation import PerfRecorder, perf_enabled_from_env, perf_memory_from_env
+from analysis_jobs import get_job_runner, CANCELLED, FAILED
+from chart_data import scatter_trace, top_n_with_others
+from account_table import (
+    AccountTable, ACCOUNT_COLUMNS, CARDS_MAX_ACCOUNTS, DEFAULT_PAGE_SIZE, PAGE_SIZES, SORTABLE_COLUMNS
+)
+from trade_cube import TradeCube, WEEKDAY_NAMES
+from risk_engine import RISK_METRICS, run_bootstrap
 
 # 🔄 Sistema keep-alive (solo en producción)
 def init_keep_alive():
@@ -40,8 +43,8 @@ def init_keep_alive():
     except:
         return False
 
-# 🎨 Configuración de la página con SEO optimizado
-st.set_page_config(
+# 🎨 Configuración de la página con SEO optimizado (se aplica en `configure_page`)
+PAGE_CONFIG = dict(
     page_title="Trading Analyzer Pro | Analiza Ganancias y PnL GRATIS | 2024",
     page_icon="💰",
     layout="wide",
@@ -69,7 +72,7 @@ st.set_page_config(
 )
 
 # 🎨 CSS Styles
-st.markdown("""
+CUSTOM_CSS = """
 <style>
     .main-header {
         background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
@@ -114,20 +117,19 @@ st.markdown("""
         box-shadow: 0 2px 10px rgba(55, 66, 250, 0.2);
     }
 </style>
-""", unsafe_allow_html=True)
+"""
 
-class TradingAnalyzerStandalone:
-    """📊 Analizador de Trading Standalone - Versión Emergencia con Filtros"""
-    
-    def __init__(self):
-        self.data = None
-        self.analysis = {}
-        self.sheet_filter = SheetFilter()  # 🗂️ Sistema de filtros
+def configure_page():
+    """🎨 Configurar la página e inyectar el CSS (primera llamada a Streamlit de cada ejecución)"""
+    st.set_page_config(**PAGE_CONFIG)
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+
+class TradingAnalyzerStandalone(TradingAnalyzer):
+    """📊 Analizador de Trading Standalone - Versión Emergencia con Filtros
     
-    def set_sheet_filter(self, filter_obj: SheetFilter):
-        """🔧 Configurar filtro de hojas"""
-        self.sheet_filter = filter_obj
-        return self
+    El análisis vive en `analyzer_engine.TradingAnalyzer`; aquí solo se añade la UI
+    de filtros y se muestran en la barra lateral los avisos del motor.
+    """
     
     def create_sheet_selector_ui(self):
         """🎮 UI para seleccionar hojas a analizar"""
@@ -183,123 +185,401 @@ class TradingAnalyzerStandalone:
             for sheet in excluded:
                 self.sheet_filter.exclude_sheet(sheet)
         
+        self.create_row_filter_ui()
         return self.sheet_filter
     
-    def _filter_non_trading_operations(self, df):
-        """🚫 Filtrar operaciones que no son de trading real"""
-        if len(df) == 0:
-            return df
-        
-        # Buscar columna de tipo de operación
-        type_col = None
-        possible_type_columns = ['type', 'operation', 'action', 'kind', 'category']
-        
-        for col in df.columns:
-            col_lower = col.lower()
-            if any(type_word in col_lower for type_word in possible_type_columns):
-                type_col = col
-                break
-        
-        if type_col is None:
-            # Si no hay columna de tipo, devolver DataFrame original
-            return df
-        
-        # Valores a excluir (operaciones no-trading)
-        non_trading_operations = [
-            'transfer', 'transferencia', 'deposit', 'deposito', 'withdrawal', 'retiro',
-            'funding', 'commission', 'comision', 'fee', 'bonus', 'rebate', 'cashback',
-            'interest', 'interes', 'staking', 'reward', 'recompensa', 'airdrop'
-        ]
-        
-        # Crear máscara para filtrar
-        mask = True
-        for operation in non_trading_operations:
-            mask = mask & (~df[type_col].str.lower().str.contains(operation, na=False))
-        
-        # Filtrar DataFrame
-        df_filtered = df[mask].copy()
-        
-        # 📊 Mostrar estadísticas de filtrado si hay sidebar
-        if hasattr(st, 'sidebar') and len(df) != len(df_filtered):
-            excluded_count = len(df) - len(df_filtered)
-            st.sidebar.info(f"🚫 **Operaciones no-trading excluidas:** {excluded_count:,}")
-        
-        return df_filtered
-    
-    def load_file(self, uploaded_file):
-        """📁 Cargar archivo"""
-        try:
-            if uploaded_file.name.endswith('.xlsx') or uploaded_file.name.endswith('.xls'):
-                self.data = pd.read_excel(uploaded_file, sheet_name=None)
-                return True
-            elif uploaded_file.name.endswith('.csv'):
-                self.data = {'main': pd.read_csv(uploaded_file)}
-                return True
-        except Exception as e:
-            st.error(f"Error cargando archivo: {e}")
-            return False
+    def create_row_filter_ui(self):
+        """🔎 UI de filtros por fila (fechas, símbolos, lado, |PnL| mínimo)"""
+        with st.sidebar.expander("🔎 Filtros de Filas"):
+            date_range = st.date_input("📅 Rango de fechas:", value=(), key="row_filter_dates")
+            symbols = st.text_input("🪙 Símbolos (separados por coma):", key="row_filter_symbols")
+            side = st.selectbox("↕️ Lado:", ["Ambos", "long", "short"], key="row_filter_side")
+            min_abs_pnl = st.number_input("💰 |PnL| mínimo:", min_value=0.0, value=0.0, key="row_filter_min_pnl")
+        
+        if len(date_range) == 2:
+            self.sheet_filter.add_time_window(date_range[0], date_range[1])
+        elif len(date_range) == 1:
+            self.sheet_filter.add_time_window(date_range[0], None)
+        if symbols.strip():
+            self.sheet_filter.add_symbols(symbol.strip() for symbol in symbols.split(','))
+        if side != "Ambos":
+            self.sheet_filter.add_side(side)
+        if min_abs_pnl > 0:
+            self.sheet_filter.add_min_abs_pnl(min_abs_pnl)
+        return self.sheet_filter
     
-    def analyze_data(self):
-        """🧠 Análisis de datos con filtros de hojas"""
-        if not self.data:
-            return {}
-        
-        # 🗂️ Aplicar filtros de hojas
-        filtered_data = self.sheet_filter.filter_sheets(self.data)
+    def _report_filter_status(self, total_sheets: int, analyzed_sheets: List[str], excluded_sheets: List[str]):
+        """📊 Mostrar información de filtros en sidebar"""
+        st.sidebar.markdown("### 📊 Estado del Filtro")
+        st.sidebar.info(f"📋 **Total hojas:** {total_sheets}\n📍 **Analizando:** {len(analyzed_sheets)}")
         
-        # 📊 Mostrar información de filtros en sidebar
-        if hasattr(st, 'sidebar'):
-            filter_summary = self.sheet_filter.get_filter_summary()
-            total_sheets = len(self.data)
-            filtered_sheets = len(filtered_data)
-            
-            st.sidebar.markdown("### 📊 Estado del Filtro")
-            st.sidebar.info(f"📋 **Total hojas:** {total_sheets}\n📍 **Analizando:** {filtered_sheets}")
-            
-            if filtered_sheets < total_sheets:
-                excluded_sheets = set(self.data.keys()) - set(filtered_data.keys())
-                st.sidebar.warning(f"❌ **Excluidas:** {', '.join(list(excluded_sheets)[:3])}{'...' if len(excluded_sheets) > 3 else ''}")
-        
-        results = {}
-        
-        for sheet_name, df in filtered_data.items():
-            # 🚫 Filtrar transferencias y operaciones no-trading
-            df_filtered = self._filter_non_trading_operations(df)
-            
-            # Buscar columnas PnL
-            pnl_col = None
-            for col in df_filtered.columns:
-                if any(word in col.lower() for word in ['pnl', 'profit', 'amount', 'realized']):
-                    pnl_col = col
-                    break   
-            
-            if pnl_col and len(df_filtered) > 0:
-                pnl_values = df_filtered[pnl_col].dropna()
-                
-                if len(pnl_values) > 0:
-                    profits = pnl_values[pnl_values > 0]
-                    losses = pnl_values[pnl_values < 0]
-                    
-                    results[sheet_name] = {
-                        'total_pnl': float(pnl_values.sum()),
-                        'total_profit': float(profits.sum()) if len(profits) > 0 else 0,
-                        'total_loss': float(abs(losses.sum())) if len(losses) > 0 else 0,
-                        'win_rate': (len(profits) / len(pnl_values) * 100) if len(pnl_values) > 0 else 0,
-                        'total_trades': len(pnl_values),
-                        'avg_profit': float(profits.mean()) if len(profits) > 0 else 0,
-                        'avg_loss': float(losses.mean()) if len(losses) > 0 else 0,
-                        'pnl_values': pnl_values.tolist(),
-                        'pnl_column': pnl_col,  # 📊 Guardar nombre de columna detectada
-                        'total_rows': len(df),   # 📏 Total de filas en la hoja original
-                        'filtered_rows': len(df_filtered),  # 📏 Filas después de filtrar
-                        'excluded_operations': len(df) - len(df_filtered)  # 🚫 Operaciones excluidas
-                    }
-        
-        return results
+        if excluded_sheets:
+            st.sidebar.warning(f"❌ **Excluidas:** {', '.join(excluded_sheets[:3])}{'...' if len(excluded_sheets) > 3 else ''}")
+    
+    def _report_cached_results(self, sheet_names: List[str]):
+        st.sidebar.info(f"♻️ **Resultados reutilizados:** {len(sheet_names)} hoja(s) sin recalcular")
+    
+    def _report_excluded_operations(self, excluded_count: int):
+        st.sidebar.info(f"🚫 **Operaciones no-trading excluidas:** {excluded_count:,}")
+    
+    def _report_load_error(self, error: Exception):
+        st.error(f"Error cargando archivo: {error}")
+    
+    def _report_duplicates(self, merge_report: Dict):
+        st.sidebar.info(f"🧬 **Trades duplicados eliminados:** {merge_report['dropped_rows']:,}")
+        for sheet_name, report in merge_report['sheets'].items():
+            if report['dropped_rows'] > 0:
+                st.sidebar.caption(
+                    f"• {sheet_name}: {report['dropped_rows']:,} de {report['rows_in']:,} filas ({report['identity']})"
+                )
+
+JOB_POLL_SECONDS = 0.5  # 🔄 Cada cuánto se refresca el progreso del análisis en segundo plano
+JOB_STAGE_LABELS = {'load': "📁 Leyendo hojas", 'analyze': "🧠 Analizando"}
+
+def _render_job_status():
+    """📶 Progreso del análisis en segundo plano con botón de cancelar (se vuelve a pintar solo)"""
+    job = st.session_state.get('analysis_job')
+    if job is None:
+        return
+    if job.finished:
+        st.rerun()  # Recoger el resultado en una ejecución completa de la app
+    
+    progress = job.get_progress()
+    label = JOB_STAGE_LABELS.get(progress['stage'], "⏳ En cola")
+    detail = f" · {progress['sheet']} ({progress['done']}/{progress['total']})" if progress['sheet'] else ""
+    st.progress(progress['fraction'], text=f"{label}{detail} · {progress['seconds']:.0f}s")
+    if job.cancel_requested:
+        st.caption("⏹️ Cancelando...")
+    elif st.button("⏹️ Cancelar análisis", key="cancel_analysis_button"):
+        job.cancel()
+
+# Con `st.fragment` solo se repinta el progreso; sin él (Streamlit < 1.37) se relanza la app entera
+if hasattr(st, 'fragment'):
+    render_job_status = st.fragment(run_every=JOB_POLL_SECONDS)(_render_job_status)
+else:
+    def render_job_status():
+        import time
+        _render_job_status()
+        job = st.session_state.get('analysis_job')
+        if job is not None and not job.finished:
+            time.sleep(JOB_POLL_SECONDS)
+            st.rerun()
+
+def collect_finished_job(analyzer: TradingAnalyzerStandalone, trade_store, incremental_dataset):
+    """📥 Guardar el resultado de un análisis en segundo plano terminado y mostrar sus avisos (una vez)"""
+    job = st.session_state.get('analysis_job')
+    if job is None or not job.finished:
+        return
+    del st.session_state['analysis_job']
+    
+    if job.status == CANCELLED:
+        st.sidebar.warning("⏹️ Análisis cancelado")
+        return
+    if job.status == FAILED:
+        st.error(f"❌ Error en el análisis: {job.error}")
+        return
+    
+    job.replay_notices(analyzer)
+    if incremental_dataset:
+        new_rows = sum(job.analyzer.last_new_rows.values())
+        st.sidebar.info(f"🔁 **Filas nuevas procesadas:** {new_rows:,}")
+    elif trade_store is not None:
+        st.sidebar.info(f"🗃️ **Trades nuevos en el histórico:** {job.analyzer.last_stored_trades:,}")
+    
+    # 💾 Los resultados sobreviven a los reruns (p. ej. al mover la ventana móvil)
+    st.session_state['analysis_results'] = {
+        'key': job.key, 'results': job.result, 'perf_records': job.perf_records,
+        'memory': job.analyzer.memory_report()
+    }
+
+def render_perf_panel(perf: PerfRecorder, memory: Optional[Dict] = None, analysis_records: Optional[List[Dict]] = None):
+    """⏱️ Panel lateral con las mediciones por etapa, memoria por hoja y descarga en JSON / líneas de log
+    
+    `analysis_records` son las mediciones del análisis en segundo plano (ya registradas en el log por su hilo).
+    """
+    if not perf.enabled:
+        return
+    if analysis_records:
+        perf = PerfRecorder(enabled=True).extend(list(perf.records) + list(analysis_records))
+    if not perf.records:
+        return
+    
+    with st.sidebar.expander("⏱️ Rendimiento", expanded=True):
+        st.dataframe(pd.DataFrame(perf.get_summary()), hide_index=True)
+        st.dataframe(pd.DataFrame(perf.records), hide_index=True)
+        if memory:
+            # 🧱 Memoria real de cada hoja cargada (tras el plan de dtypes)
+            st.dataframe(pd.DataFrame([
+                {'hoja': sheet, 'filas': usage['rows'], 'MB': usage['bytes'] / 1024 / 1024,
+                 'bytes/fila': usage['bytes_per_row'],
+                 'dtypes': ', '.join(f"{column}: {dtype}" for column, dtype in usage['dtypes'].items())}
+                for sheet, usage in memory.items()
+            ]), hide_index=True)
+        st.download_button(
+            "📥 Descargar JSON", perf.to_json(), file_name="trading_analyzer_perf.json",
+            mime="application/json", key="perf_download_json"
+        )
+        st.download_button(
+            "📥 Descargar líneas de log", perf.to_log_lines(), file_name="trading_analyzer_perf.jsonl",
+            mime="application/x-ndjson", key="perf_download_jsonl"
+        )
+
+def render_series_metrics(results: Dict, perf: PerfRecorder):
+    """📉 Equity, drawdown, rachas, ratios y win rate móvil de la cuenta elegida"""
+    accounts = [account for account, data in results.items() if len(data.pnl_values) > 1]
+    if not accounts:
+        return
+    
+    st.subheader("📉 Métricas de Serie Temporal")
+    col_account, col_window = st.columns([2, 1])
+    with col_account:
+        account = st.selectbox("🏦 Cuenta:", accounts, key="series_metrics_account")
+    metrics = results[account].metrics
+    with col_window:
+        window = st.slider("🎯 Ventana win rate móvil (trades):", min_value=5,
+                           max_value=max(5, min(500, len(metrics))), value=min(50, max(5, len(metrics) // 4)),
+                           key="series_metrics_window")
+    
+    with perf.stage('series_metrics', sheet=account, rows=len(metrics)):
+        summary = metrics.summary
+        rolling_win_rate = metrics.rolling_win_rate(window)
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("📉 Max Drawdown", f"${summary['max_drawdown']:,.2f}",
+                f"{summary['max_drawdown_trades']:,} trades" if summary['max_drawdown'] > 0 else None,
+                delta_color="off")
+    duration = summary.get('max_drawdown_duration_days')
+    col2.metric("⏳ Duración del Drawdown", f"{duration:,.1f} días" if duration is not None else "N/A",
+                "✅ Recuperado" if summary['max_drawdown_recovered'] else "⚠️ Sin recuperar", delta_color="off")
+    col3.metric("🔥 Racha Ganadora / Perdedora",
+                f"{summary['longest_win_streak']} / {summary['longest_loss_streak']}")
+    annualized = summary.get('sharpe_annualized') is not None and summary.get('sortino_annualized') is not None
+    sharpe = summary['sharpe_annualized'] if annualized else summary['sharpe_per_trade']
+    sortino = summary['sortino_annualized'] if annualized else summary['sortino_per_trade']
+    col4.metric("⚖️ Sharpe / Sortino",
+                f"{sharpe:.2f} / {sortino:.2f}" if sharpe is not None and sortino is not None else "N/A",
+                "anualizado (diario)" if annualized else "por trade", delta_color="off")
+    
+    with perf.stage('render_series_chart', sheet=account, rows=len(metrics)):
+        from plotly.subplots import make_subplots
+        
+        # 📊 Series reducidas a un presupuesto fijo de puntos (el drawdown conserva sus valles)
+        x = metrics.times if metrics.times is not None else np.arange(1, len(metrics) + 1)
+        fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.7, 0.3], vertical_spacing=0.05)
+        fig.add_trace(scatter_trace(x, metrics.equity, name="Equity", line=dict(color='#00d2d3')), row=1, col=1)
+        fig.add_trace(scatter_trace(x, metrics.drawdown, method='minmax', name="Drawdown", fill='tozeroy',
+                                    line=dict(color='#ff6b6b')), row=1, col=1)
+        fig.add_trace(scatter_trace(x, rolling_win_rate, name=f"Win rate ({window})",
+                                    line=dict(color='#667eea')), row=2, col=1)
+        fig.update_layout(height=500, plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+                          legend=dict(orientation='h'))
+        fig.update_yaxes(title_text="PnL (USDT)", row=1, col=1)
+        fig.update_yaxes(title_text="Win rate %", range=[0, 100], row=2, col=1)
+        st.plotly_chart(fig, use_container_width=True, key="series_metrics_chart")
+
+BREAKDOWN_DIMENSIONS = {
+    'symbol': "🪙 Símbolo", 'weekday': "📅 Día de la semana", 'hour': "🕐 Hora del día",
+    'month': "🗓️ Mes", 'day': "📆 Día", 'side': "↕️ Lado"
+}
+
+def render_breakdowns(results: Dict, perf: PerfRecorder):
+    """🧊 PnL y win rate por símbolo / día de la semana / hora / mes desde los cubos (sin tocar los trades)"""
+    accounts = [account for account, data in results.items()
+                if data.trade_cube is not None and len(data.trade_cube) > 0]
+    if not accounts:
+        return
+    
+    st.subheader("🧊 Desglose de Resultados")
+    col_accounts, col_dimension, col_symbols = st.columns([2, 1, 2])
+    with col_accounts:
+        selected = st.multiselect("🏦 Cuentas:", accounts, default=accounts, key="breakdown_accounts")
+    with col_dimension:
+        dimension = st.selectbox("📊 Agrupar por:", list(BREAKDOWN_DIMENSIONS),
+                                 format_func=BREAKDOWN_DIMENSIONS.get, key="breakdown_dimension")
+    if not selected:
+        return
+    
+    cube = TradeCube.combine(results[account].trade_cube for account in selected)
+    with col_symbols:
+        symbols = st.multiselect("🔍 Solo símbolos:", cube.symbols, key="breakdown_symbols")
+    with perf.stage('rollup_cube', rows=len(cube)):
+        table = cube.slice(symbols=symbols or None).rollup(dimension)
+    
+    if table.empty:
+        st.info("📊 Sin fechas en los trades elegidos para este desglose")
+        return
+    
+    labels = table.index
+    if dimension == 'weekday':
+        labels = [WEEKDAY_NAMES[day] for day in labels]
+    elif dimension == 'hour':
+        labels = [f"{hour:02d}:00" for hour in labels]
+    elif dimension == 'day':
+        labels = labels.strftime('%Y-%m-%d')
+    labels = [str(label) for label in labels]
+    
+    with perf.stage('render_breakdown_chart', rows=len(table)):
+        import plotly.graph_objects as go
+        
+        fig = go.Figure(go.Bar(
+            x=labels, y=table['pnl'],
+            marker_color=['#00d2d3' if pnl > 0 else '#ff6b6b' for pnl in table['pnl']],
+            customdata=np.column_stack([table['win_rate'], table['trades']]),
+            hovertemplate='<b>%{x}</b><br>PnL: $%{y:,.2f}<br>Win rate: %{customdata[0]:.1f}%'
+                          '<br>Trades: %{customdata[1]:,}<extra></extra>'
+        ))
+        fig.update_layout(title=f"💰 PnL — {BREAKDOWN_DIMENSIONS[dimension]}", yaxis_title="PnL (USDT)",
+                          plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', height=350)
+        fig.add_hline(y=0, line_dash="dash", line_color="gray", opacity=0.5)
+        st.plotly_chart(fig, use_container_width=True, key="breakdown_chart")
+    
+    st.dataframe(pd.DataFrame({
+        BREAKDOWN_DIMENSIONS[dimension]: labels,
+        'PnL': table['pnl'].round(2).to_numpy(),
+        'Trades': table['trades'].to_numpy(),
+        'Win rate %': table['win_rate'].round(1).to_numpy(),
+        'Ganancias': table['profit'].round(2).to_numpy(),
+        'Pérdidas': table['loss'].abs().round(2).to_numpy()
+    }), hide_index=True, use_container_width=True)
+
+RISK_RESAMPLE_OPTIONS = [1_000, 5_000, 10_000, 50_000]
+RISK_METRIC_LABELS = {'total_pnl': "💰 PnL total", 'win_rate': "🎯 Win rate %", 'max_drawdown': "📉 Drawdown máximo"}
+
+def render_risk_analysis(results: Dict, perf: PerfRecorder, results_key):
+    """🎲 Bootstrap de la cuenta elegida: intervalos de PnL / win rate y distribución del drawdown"""
+    accounts = [account for account, data in results.items() if len(data.pnl_values) > 1]
+    if not accounts:
+        return
+    
+    st.subheader("🎲 Análisis de Riesgo (Bootstrap)")
+    col_account, col_resamples, col_seed = st.columns([2, 1, 1])
+    with col_account:
+        account = st.selectbox("🏦 Cuenta:", accounts, key="risk_account")
+    with col_resamples:
+        resamples = st.select_slider("🔁 Remuestreos:", RISK_RESAMPLE_OPTIONS, value=10_000, key="risk_resamples")
+    with col_seed:
+        seed = int(st.number_input("🌱 Semilla:", min_value=0, value=42, step=1, key="risk_seed"))
+    
+    # 💾 Una simulación por (resultados, cuenta, remuestreos, semilla): los reruns no la repiten
+    reports = st.session_state.setdefault('risk_reports', {})
+    report_key = (results_key, account, resamples, seed)
+    if st.button("🎲 Simular", key="risk_run_button"):
+        pnl_values = results[account].pnl_values
+        with st.spinner(f"🎲 Remuestreando {len(pnl_values):,} trades {resamples:,} veces..."):
+            with perf.stage('risk_bootstrap', sheet=account, rows=len(pnl_values) * resamples):
+                reports.clear()
+                reports[report_key] = run_bootstrap(pnl_values, resamples=resamples, seed=seed)
+    
+    report = reports.get(report_key)
+    if report is None:
+        st.caption("¿Cuánto del resultado puede ser suerte? Remuestrea los trades con reemplazo y mide la dispersión.")
+        return
+    
+    confidence = f"IC {report.confidence:.0%}"
+    pnl_low, pnl_high = report.interval('total_pnl')
+    rate_low, rate_high = report.interval('win_rate')
+    drawdown = report.percentiles('max_drawdown')
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("💰 PnL total", f"${report.observed['total_pnl']:,.2f}",
+                f"{confidence}: ${pnl_low:,.0f} … ${pnl_high:,.0f}", delta_color="off")
+    col2.metric("🎯 Win rate", f"{report.observed['win_rate']:.1f}%",
+                f"{confidence}: {rate_low:.1f}% … {rate_high:.1f}%", delta_color="off")
+    col3.metric("📉 Drawdown máx. (p50 / p95)", f"${drawdown[50]:,.0f} / ${drawdown[95]:,.0f}",
+                f"real: ${report.observed['max_drawdown']:,.0f}", delta_color="off")
+    col4.metric("🎲 Prob. de PnL <= 0", f"{report.prob_loss:.1%}",
+                f"{report.resamples:,} remuestreos en {report.seconds:.1f}s", delta_color="off")
+    
+    with perf.stage('render_risk_chart', sheet=account):
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+        
+        fig = make_subplots(rows=1, cols=3, subplot_titles=[RISK_METRIC_LABELS[metric] for metric in RISK_METRICS])
+        for column, metric in enumerate(RISK_METRICS, 1):
+            counts, edges = report.histogram(metric)
+            fig.add_trace(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, marker_color='#667eea',
+                                 hovertemplate='%{x:,.2f}: %{y:,}<extra></extra>'), row=1, col=column)
+            fig.add_vline(x=report.observed[metric], line_dash="dash", line_color="#ff6b6b", row=1, col=column)
+        fig.update_layout(height=300, showlegend=False, bargap=0,
+                          plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+        st.plotly_chart(fig, use_container_width=True, key="risk_histograms")
+    
+    st.dataframe(pd.DataFrame([
+        {'Métrica': RISK_METRIC_LABELS[metric], 'Real': report.observed[metric],
+         **{f"p{percentile}": value for percentile, value in report.percentiles(metric).items()}}
+        for metric in RISK_METRICS
+    ]).round(2), hide_index=True, use_container_width=True)
+
+ACCOUNT_VIEWS = ["🃏 Tarjetas", "📋 Tabla paginada"]
+
+def render_account_table(results: Dict, perf: PerfRecorder):
+    """📋 Cuentas ordenables por columna; solo la página visible llega al navegador"""
+    # 💾 La tabla (y sus órdenes) se construye una vez por conjunto de resultados
+    cached = st.session_state.get('account_table')
+    if cached is None or cached[0] is not results:
+        cached = (results, AccountTable(results))
+        st.session_state['account_table'] = cached
+    table = cached[1]
+    
+    col_sort, col_order, col_size, col_page = st.columns([2, 1, 1, 1])
+    with col_sort:
+        sort_by = st.selectbox("↕️ Ordenar por:", SORTABLE_COLUMNS, format_func=ACCOUNT_COLUMNS.get,
+                               key="account_table_sort")
+    with col_order:
+        ascending = st.toggle("⬆️ Ascendente", value=False, key="account_table_ascending")
+    with col_size:
+        page_size = st.selectbox("📄 Por página:", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE),
+                                 key="account_table_page_size")
+    with col_page:
+        # La página vive solo en Session State (sin `value=`): al cambiar el tamaño de página se recorta al rango
+        page_count = table.page_count(page_size)
+        st.session_state['account_table_page'] = min(st.session_state.get('account_table_page', 1), page_count)
+        page = st.number_input("Página:", min_value=1, max_value=page_count, step=1, key="account_table_page")
+    
+    with perf.stage('render_account_table', rows=page_size):
+        rows, first, last = table.page(int(page), page_size, by=sort_by, ascending=ascending)
+        st.dataframe(AccountTable.display(rows).round(2), hide_index=True, use_container_width=True)
+    st.caption(f"Cuentas {first:,}–{last:,} de {len(table):,} · página {int(page)} de {page_count}")
+
+def render_trade_history(trade_store: TradeStore):
+    """🗃️ Consultas por fechas / cuentas sobre el histórico local (consultas indexadas, sin re-parsear)"""
+    accounts = trade_store.accounts()
+    if not accounts:
+        return
+    
+    with st.sidebar.expander("🗃️ Histórico Local"):
+        st.caption(f"{trade_store.count():,} trades guardados")
+        selected = st.multiselect("👤 Cuentas:", accounts, default=accounts, key="history_accounts")
+        date_range = st.date_input("📅 Rango de fechas:", value=(), key="history_dates")
+        run_query = st.button("🔍 Consultar histórico", key="history_query_button")
+    
+    if not run_query or not selected:
+        return
+    
+    start = date_range[0] if len(date_range) >= 1 else None
+    end = date_range[1] if len(date_range) == 2 else None
+    history = trade_store.summarize(accounts=selected, start=start, end=end, include_series=False)
+    
+    st.subheader("🗃️ Histórico Local")
+    if not history:
+        st.warning("📊 No hay trades guardados en ese rango")
+        return
+    st.dataframe(pd.DataFrame([
+        {
+            'Cuenta': account,
+            'PnL Total': result.total_pnl,
+            'Trades': result.total_trades,
+            'Win Rate (%)': result.win_rate,
+            'Ganancia Media': result.avg_profit,
+            'Pérdida Media': result.avg_loss
+        }
+        for account, result in history.items()
+    ]), use_container_width=True, hide_index=True)
 
 def main():
     """🚀 Función principal - Versión Emergencia"""
     
+    configure_page()
+    
     # 🔄 Inicializar keep-alive y mostrar estado
     init_keep_alive()
     
@@ -314,96 +594,168 @@ def main():
     </div>
     ''', unsafe_allow_html=True)
     
-    # File uploader con clave única
-    uploaded_file = st.sidebar.file_uploader(
+    # File uploader con clave única (varias exportaciones de la misma cuenta se unen)
+    uploaded_files = st.sidebar.file_uploader(
         "📁 Sube tu archivo Excel o CSV",
         type=['xlsx', 'xls', 'csv'],
-        help="Soporta archivos de BingX, Binance, y otros exchanges",
+        help="Soporta archivos de BingX, Binance, y otros exchanges. Puedes subir varias exportaciones solapadas: los trades repetidos se cuentan una sola vez",
+        accept_multiple_files=True,
         key="unique_file_uploader_2024"
     )
     
+    # 🗃️ Histórico local (solo si `TRADING_ANALYZER_TRADE_STORE` está definido)
+    trade_store = get_default_trade_store()
+    
     # Análisis
-    if uploaded_file:
-        st.sidebar.success(f"📄 **{uploaded_file.name}**")
+    if uploaded_files:
+        for uploaded_file in uploaded_files:
+            st.sidebar.success(f"📄 **{uploaded_file.name}**")
+        
+        # ⏱️ Instrumentación opcional (panel lateral y/o líneas de log por entorno)
+        show_perf_panel = st.sidebar.checkbox("⏱️ Panel de rendimiento", key="perf_panel_checkbox")
+        track_memory = perf_memory_from_env() or (show_perf_panel and st.sidebar.checkbox(
+            "🧠 Medir memoria por etapa", key="perf_memory_checkbox",
+            help="Activa tracemalloc: mide los bytes asignados por etapa y hoja, pero ralentiza el análisis"
+        ))
+        perf = PerfRecorder(
+            enabled=show_perf_panel or perf_enabled_from_env(),
+            track_memory=track_memory,
+            log=perf_enabled_from_env()
+        )
+        if perf.enabled and track_memory:
+            perf.start_memory_tracking()
+            st.session_state['perf_memory_tracing'] = True
+        elif st.session_state.pop('perf_memory_tracing', False):
+            # 🧠 tracemalloc ralentiza todo el proceso: se apaga al desmarcar la casilla
+            perf.stop_memory_tracking()
         
         # Crear analizador
-        analyzer = TradingAnalyzerStandalone()
+        analyzer = TradingAnalyzerStandalone(
+            perf=perf,
+            lazy_sheets=True,
+            sidecar=get_default_sidecar(),
+            workers=int(os.environ.get(ANALYSIS_WORKERS_ENV, 1)),
+            executor=os.environ.get(ANALYSIS_EXECUTOR_ENV, 'thread'),
+            csv_chunksize=DEFAULT_CSV_CHUNKSIZE if any(should_stream_csv(f) for f in uploaded_files) else None,
+            trade_store=trade_store,
+            result_cache=get_default_result_cache()
+        )
         
         # Cargar archivo para mostrar opciones de filtros
         with st.spinner("📁 Cargando archivo..."):
-            file_loaded = analyzer.load_file(uploaded_file)
+            file_loaded = analyzer.load_files(uploaded_files)
         
         if file_loaded:
             # 🗂️ UI de filtros de hojas
             analyzer.create_sheet_selector_ui()
             
+            # 🔁 Histórico incremental (solo si hay directorio de estados configurado)
+            state_store = get_default_state_store()
+            incremental_dataset = None
+            if state_store is not None:
+                incremental_dataset = st.sidebar.text_input(
+                    "🔁 Histórico incremental (nombre de cuenta):",
+                    help="Acumula exportaciones sucesivas procesando solo las filas nuevas",
+                    key="incremental_dataset_input"
+                ).strip() or None
+            
+            # 🔑 Contenido de los archivos + hojas + filtros: otro archivo con el mismo nombre y tamaño no reutiliza resultados
+            results_key = (analyzer.analysis_key(), incremental_dataset)
+            
             if st.sidebar.button("🚀 Analizar Archivo", type="primary", key="unique_analyze_button_2024"):
-                with st.spinner("🧠 Analizando con IA..."):
-                    results = analyzer.analyze_data()
+                # 🧵 El análisis corre en segundo plano: la sesión sigue respondiendo y los filtros se pueden tocar
+                previous_job = st.session_state.get('analysis_job')
+                if previous_job is not None and not previous_job.finished:
+                    previous_job.cancel()
+                if incremental_dataset:
+                    task = lambda job_analyzer: job_analyzer.analyze_incremental(state_store, incremental_dataset)
+                else:
+                    task = lambda job_analyzer: job_analyzer.analyze_data()
+                st.session_state['analysis_job'] = get_job_runner().submit(analyzer, task, key=results_key)
+            
+            collect_finished_job(analyzer, trade_store, incremental_dataset)
+            render_job_status()
+            
+            stored = st.session_state.get('analysis_results')
+            results = stored['results'] if stored else None
+            
+            if results is not None:
+                if stored['key'] != results_key:
+                    # 🕰️ Archivos, hojas o filtros cambiaron desde el último análisis: se avisa en vez de darlos por actuales
+                    st.warning("🕰️ Mostrando **resultados de un análisis anterior**: los archivos, las hojas o los "
+                               "filtros han cambiado. Pulsa 🚀 Analizar Archivo para actualizarlos.")
+                elif results:
+                    st.success("✅ ¡Análisis completado!")
+                
+                if results:
+                    # Mostrar información de qué se analizó
+                    analyzed_sheets = list(results.keys())
+                    st.info(f"📊 **Hojas analizadas:** {', '.join(analyzed_sheets)}")
                     
-                    if results:
-                        st.success("✅ ¡Análisis completado!")
-                        
-                        # Mostrar información de qué se analizó
-                        analyzed_sheets = list(results.keys())
-                        st.info(f"📊 **Hojas analizadas:** {', '.join(analyzed_sheets)}")
-                        
-                        # Mostrar resultados
-                        st.subheader("💰 Resultados del Análisis")
-                        
-                        # Calcular totales
-                        total_pnl = sum(account['total_pnl'] for account in results.values())
-                        total_profit = sum(account['total_profit'] for account in results.values())
-                        total_loss = sum(account['total_loss'] for account in results.values())
-                        total_trades = sum(account['total_trades'] for account in results.values())
-                        
-                        # Métricas principales
-                        col1, col2, col3, col4 = st.columns(4)
-                        
-                        with col1:
-                            pnl_class = "performance-excellent" if total_pnl >= 0 else "inactivity-alert"
-                            st.markdown(f'''
-                            <div class="{pnl_class}">
-                                <h3>💰 PnL Total</h3>
-                                <h1>${total_pnl:,.2f}</h1>
-                                <p>{'🟢 GANANCIA' if total_pnl >= 0 else '🔴 PÉRDIDA'}</p>
-                            </div>
-                            ''', unsafe_allow_html=True)
-                        
-                        with col2:
-                            st.markdown(f'''
-                            <div class="performance-excellent">
-                                <h3>💚 Total Ganancias</h3>
-                                <h1>${total_profit:,.2f}</h1>
-                                <p>Dinero ganado</p>
-                            </div>
-                            ''', unsafe_allow_html=True)
-                        
-                        with col3:
-                            st.markdown(f'''
-                            <div class="inactivity-alert">
-                                <h3>💔 Total Pérdidas</h3>
-                                <h1>${total_loss:,.2f}</h1>
-                                <p>Dinero perdido</p>
-                            </div>
-                            ''', unsafe_allow_html=True)
-                        
-                        with col4:
-                            total_volume = total_profit + total_loss
-                            profit_ratio = (total_profit / total_loss) if total_loss > 0 else float('inf')
-                            ratio_class = "performance-excellent" if profit_ratio > 1 else "inactivity-alert"
-                            
-                            st.markdown(f'''
-                            <div class="{ratio_class}">
-                                <h3>📊 Ratio P/L</h3>
-                                <h1>{profit_ratio:.2f}</h1>
-                                <p>{'✅ Positivo' if profit_ratio > 1 else '⚠️ Negativo'}</p>
-                            </div>
-                            ''', unsafe_allow_html=True)
-                        
-                        # Detalles por cuenta/hoja
-                        st.subheader("🏦 Análisis por Cuenta/Hoja")
+                    # Mostrar resultados
+                    st.subheader("💰 Resultados del Análisis")
+                    
+                    # Calcular totales
+                    total_pnl = sum(account['total_pnl'] for account in results.values())
+                    total_profit = sum(account['total_profit'] for account in results.values())
+                    total_loss = sum(account['total_loss'] for account in results.values())
+                    total_trades = sum(account['total_trades'] for account in results.values())
+                    
+                    # Métricas principales
+                    col1, col2, col3, col4 = st.columns(4)
+                    
+                    with col1:
+                        pnl_class = "performance-excellent" if total_pnl >= 0 else "inactivity-alert"
+                        st.markdown(f'''
+                        <div class="{pnl_class}">
+                            <h3>💰 PnL Total</h3>
+                            <h1>${total_pnl:,.2f}</h1>
+                            <p>{'🟢 GANANCIA' if total_pnl >= 0 else '🔴 PÉRDIDA'}</p>
+                        </div>
+                        ''', unsafe_allow_html=True)
+                    
+                    with col2:
+                        st.markdown(f'''
+                        <div class="performance-excellent">
+                            <h3>💚 Total Ganancias</h3>
+                            <h1>${total_profit:,.2f}</h1>
+                            <p>Dinero ganado</p>
+                        </div>
+                        ''', unsafe_allow_html=True)
+                    
+                    with col3:
+                        st.markdown(f'''
+                        <div class="inactivity-alert">
+                            <h3>💔 Total Pérdidas</h3>
+                            <h1>${total_loss:,.2f}</h1>
+                            <p>Dinero perdido</p>
+                        </div>
+                        ''', unsafe_allow_html=True)
+                    
+                    with col4:
+                        total_volume = total_profit + total_loss
+                        profit_ratio = (total_profit / total_loss) if total_loss > 0 else float('inf')
+                        ratio_class = "performance-excellent" if profit_ratio > 1 else "inactivity-alert"
                         
+                        st.markdown(f'''
+                        <div class="{ratio_class}">
+                            <h3>📊 Ratio P/L</h3>
+                            <h1>{profit_ratio:.2f}</h1>
+                            <p>{'✅ Positivo' if profit_ratio > 1 else '⚠️ Negativo'}</p>
+                        </div>
+                        ''', unsafe_allow_html=True)
+                    
+                    # Detalles por cuenta/hoja
+                    st.subheader("🏦 Análisis por Cuenta/Hoja")
+                    
+                    # 📋 Con muchas hojas, tabla ordenable y paginada en lugar de una tarjeta HTML por cuenta
+                    account_view = st.radio(
+                        "Vista:", ACCOUNT_VIEWS, horizontal=True, key="account_view",
+                        index=0 if len(results) <= CARDS_MAX_ACCOUNTS else 1
+                    )
+                    if account_view == ACCOUNT_VIEWS[1]:
+                        render_account_table(results, perf)
+                    else:
                         for account, data in results.items():
                             pnl = data['total_pnl']
                             win_rate = data['win_rate']
@@ -413,6 +765,14 @@ def main():
                             status_icon = "🟢" if pnl > 0 else "🔴"
                             
                             excluded_ops = data.get('excluded_operations', 0)
+                            breakdown = {
+                                category: stats for category, stats in data.get('operation_breakdown', {}).items()
+                                if category != 'trade'
+                            }
+                            breakdown_text = ' | '.join(
+                                f"<strong>{category}:</strong> {stats['rows']:,} (${stats['amount']:,.2f})"
+                                for category, stats in breakdown.items()
+                            )
                             
                             st.markdown(f'''
                             <div class="{account_class}">
@@ -421,18 +781,24 @@ def main():
                                 <p><strong>Ganancias:</strong> ${data['total_profit']:,.2f} | <strong>Pérdidas:</strong> ${data['total_loss']:,.2f}</p>
                                 <p><small>📊 <strong>Columna PnL:</strong> {data.get('pnl_column', 'N/A')} | <strong>Filas totales:</strong> {data.get('total_rows', 'N/A'):,}</small></p>
                                 {f'<p><small>🚫 <strong>Transferencias excluidas:</strong> {excluded_ops:,}</small></p>' if excluded_ops > 0 else ''}
+                                {f'<p><small>🏷️ {breakdown_text}</small></p>' if breakdown_text else ''}
                             </div>
                             ''', unsafe_allow_html=True)
-                        
-                        # Gráfico de PnL
-                        st.subheader("📊 Distribución de PnL por Cuenta")
-                        
-                        accounts = list(results.keys())
-                        pnl_values = [results[acc]['total_pnl'] for acc in accounts]
+                    
+                    # Gráfico de PnL
+                    st.subheader("📊 Distribución de PnL por Cuenta")
+                    
+                    # 🏆 Como mucho DEFAULT_TOP_BARS barras con nombre + "Otras" con la suma del resto
+                    accounts, pnl_values, grouped_accounts = top_n_with_others(
+                        list(results.keys()), [data['total_pnl'] for data in results.values()]
+                    )
+                    
+                    with perf.stage('render_chart', rows=len(accounts)):
+                        import plotly.graph_objects as go  # 📊 Plotly solo cuando hay gráfico
                         
                         fig = go.Figure()
                         colors = ['#00d2d3' if pnl > 0 else '#ff6b6b' for pnl in pnl_values]
-                        
+                    
                         fig.add_trace(go.Bar(
                             x=accounts,
                             y=pnl_values,
@@ -441,9 +807,9 @@ def main():
                             textposition='auto',
                             hovertemplate='<b>%{x}</b><br>PnL: $%{y:,.2f}<extra></extra>'
                         ))
-                        
+                    
                         fig.update_layout(
-                            title="💰 PnL por Cuenta",
+                            title="💰 PnL por Cuenta" + (f" (top {len(accounts) - 1} por |PnL|)" if grouped_accounts else ""),
                             xaxis_title="Cuenta",
                             yaxis_title="PnL (USDT)",
                             plot_bgcolor='rgba(0,0,0,0)',
@@ -451,38 +817,51 @@ def main():
                             showlegend=False,
                             height=400
                         )
-                        
+                    
                         fig.add_hline(y=0, line_dash="dash", line_color="gray", opacity=0.5)
-                        
+                    
                         st.plotly_chart(fig, use_container_width=True, key="unique_pnl_chart_2024")
-                        
-                        # Insights
-                        st.subheader("🔮 Insights de Rendimiento")
-                        
-                        if total_pnl > 1000:
-                            st.markdown('''
-                            <div class="performance-excellent">
-                                <h4>🎉 ¡RENDIMIENTO EXCEPCIONAL!</h4>
-                                <p>Tu cartera está generando ganancias significativas. ¡Excelente trabajo!</p>
-                            </div>
-                            ''', unsafe_allow_html=True)
-                        elif total_pnl > 0:
-                            st.markdown('''
-                            <div class="trading-insight">
-                                <h4>📈 Rendimiento Positivo</h4>
-                                <p>Tu cartera está en verde. Mantén la estrategia actual.</p>
-                            </div>
-                            ''', unsafe_allow_html=True)
-                        else:
-                            st.markdown('''
-                            <div class="inactivity-alert">
-                                <h4>⚠️ Rendimiento Negativo</h4>
-                                <p>Considera revisar tu estrategia de trading. Hay oportunidades de mejora.</p>
-                            </div>
-                            ''', unsafe_allow_html=True)
                     
+                    # 📉 Métricas de serie temporal por cuenta
+                    render_series_metrics(results, perf)
+                    
+                    # 🧊 Desgloses por símbolo / día / hora / mes desde los cubos de cada hoja
+                    render_breakdowns(results, perf)
+                    
+                    # 🎲 Bootstrap de la serie de PnL (bajo demanda)
+                    render_risk_analysis(results, perf, stored['key'])
+                    
+                    # Insights
+                    st.subheader("🔮 Insights de Rendimiento")
+                    
+                    if total_pnl > 1000:
+                        st.markdown('''
+                        <div class="performance-excellent">
+                            <h4>🎉 ¡RENDIMIENTO EXCEPCIONAL!</h4>
+                            <p>Tu cartera está generando ganancias significativas. ¡Excelente trabajo!</p>
+                        </div>
+                        ''', unsafe_allow_html=True)
+                    elif total_pnl > 0:
+                        st.markdown('''
+                        <div class="trading-insight">
+                            <h4>📈 Rendimiento Positivo</h4>
+                            <p>Tu cartera está en verde. Mantén la estrategia actual.</p>
+                        </div>
+                        ''', unsafe_allow_html=True)
                     else:
-                        st.warning("📊 No se encontraron datos de PnL válidos en el archivo")
+                        st.markdown('''
+                        <div class="inactivity-alert">
+                            <h4>⚠️ Rendimiento Negativo</h4>
+                            <p>Considera revisar tu estrategia de trading. Hay oportunidades de mejora.</p>
+                        </div>
+                        ''', unsafe_allow_html=True)
+                
+                else:
+                    st.warning("📊 No se encontraron datos de PnL válidos en el archivo")
+            
+            if show_perf_panel:
+                shown = stored if results is not None else {}
+                render_perf_panel(perf, memory=shown.get('memory'), analysis_records=shown.get('perf_records'))
         else:
             st.error("❌ Error cargando el archivo")
     
@@ -561,6 +940,9 @@ def main():
         </div>
         """, unsafe_allow_html=True)
     
+    if trade_store is not None:
+        render_trade_history(trade_store)
+    
     # Footer
     st.sidebar.markdown("---")
     st.sidebar.markdown("💰 **Trading Analyzer Pro** - Análisis Profesional GRATIS")
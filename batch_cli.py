@@ -0,0 +1,339 @@
+"""
+🗃️ Trading Analyzer Pro - Headless Batch CLI
+Analiza un directorio (o glob) de exportaciones en paralelo sin navegador
+
+Uso:
+    python batch_cli.py exports/ --output results.jsonl --workers 16
+    python batch_cli.py "exports/**/*.xlsx" --preset futures --format parquet --output results_parquet/
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Set
+
+from sheet_filter import SheetFilter, CommonFilters
+
+SUPPORTED_EXTENSIONS = ('.xlsx', '.xls', '.csv')
+SERIES_KEYS = ('pnl_values', 'pnl_times')  # 📈 Series por trade: no van a la salida
+
+# 🗂️ Presets de filtro de hojas reutilizando CommonFilters
+FILTER_PRESETS = {
+    'auto': SheetFilter,
+    'futures': CommonFilters.only_futures,
+    'spot': CommonFilters.only_spot,
+    'main': CommonFilters.main_accounts_only,
+    'recent': CommonFilters.recent_data_only
+}
+
+
+def discover_exports(inputs: Iterable[str]) -> List[str]:
+    """🔍 Expandir directorios y globs a la lista ordenada de exportaciones soportadas"""
+    paths = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                for file_name in files:
+                    if file_name.lower().endswith(SUPPORTED_EXTENSIONS):
+                        paths.add(os.path.abspath(os.path.join(root, file_name)))
+        else:
+            for match in glob.glob(item, recursive=True):
+                if os.path.isfile(match) and match.lower().endswith(SUPPORTED_EXTENSIONS):
+                    paths.add(os.path.abspath(match))
+    return sorted(paths)
+
+
+def build_sheet_filter(preset: str, sheet_numbers: Optional[List[int]] = None,
+                       row_filters: Optional[Dict] = None) -> SheetFilter:
+    """🗂️ Filtro de hojas a partir de un preset o de números de hoja, más filtros de filas"""
+    if sheet_numbers:
+        sheet_filter = CommonFilters.by_sheet_numbers(sheet_numbers)
+    else:
+        sheet_filter = FILTER_PRESETS[preset]()
+
+    row_filters = row_filters or {}
+    if row_filters.get('start') or row_filters.get('end'):
+        sheet_filter.add_time_window(row_filters.get('start'), row_filters.get('end'))
+    if row_filters.get('symbols'):
+        sheet_filter.add_symbols(row_filters['symbols'])
+    if row_filters.get('side'):
+        sheet_filter.add_side(row_filters['side'])
+    if row_filters.get('min_abs_pnl') is not None:
+        sheet_filter.add_min_abs_pnl(row_filters['min_abs_pnl'])
+    if row_filters.get('analysis_columns_only'):
+        sheet_filter.analysis_columns_only()
+    return sheet_filter
+
+
+def progress_key(path: str) -> str:
+    """🔑 Identidad de un archivo para reanudar: ruta + tamaño + fecha de modificación"""
+    stat = os.stat(path)
+    return f"{path}|{stat.st_size}|{int(stat.st_mtime)}"
+
+
+def load_progress(progress_path: str) -> Set[str]:
+    """📥 Archivos ya completados en ejecuciones anteriores"""
+    if not os.path.exists(progress_path):
+        return set()
+    with open(progress_path, 'r', encoding='utf-8') as handle:
+        return {line.strip() for line in handle if line.strip()}
+
+
+def _init_worker():
+    """⚙️ Inicializador de cada proceso del pool: importar el motor una sola vez"""
+    import analyzer_engine  # noqa: F401
+
+
+def analyze_export(path: str, preset: str = 'auto', sheet_numbers: Optional[List[int]] = None,
+                   csv_chunksize: Optional[int] = None, row_filters: Optional[Dict] = None,
+                   trade_store_path: Optional[str] = None, excel_engine: Optional[str] = None) -> Dict:
+    """📄 Analizar un archivo en el proceso actual y devolver un registro serializable"""
+    from analyzer_engine import TradingAnalyzer
+    from aggregates import DEFAULT_CSV_CHUNKSIZE, should_stream_csv
+    from ingest_cache import IngestionCache
+    from trade_store import TradeStore
+
+    started = time.perf_counter()
+    record = {'file': path, 'status': 'ok', 'error': None, 'rows': 0, 'sheets': []}
+
+    # Sin caché en memoria y con hojas perezosas / CSV por bloques: memoria acotada por worker
+    if csv_chunksize is None and should_stream_csv(path):
+        csv_chunksize = DEFAULT_CSV_CHUNKSIZE
+    analyzer = TradingAnalyzer(
+        cache=IngestionCache(max_bytes=0), lazy_sheets=True, csv_chunksize=csv_chunksize,
+        trade_store=TradeStore(trade_store_path) if trade_store_path else None, excel_engine=excel_engine
+    )
+    analyzer.set_sheet_filter(build_sheet_filter(preset, sheet_numbers, row_filters))
+
+    try:
+        with open(path, 'rb') as handle:
+            if not analyzer.load_file(handle):
+                record['status'] = 'error'
+                record['error'] = str(analyzer.last_error or 'Formato no soportado')
+            else:
+                for sheet_name, result in analyzer.analyze_data().items():
+                    sheet_record = {key: value for key, value in result.items() if key not in SERIES_KEYS}
+                    sheet_record['metrics'] = result.metrics.summary
+                    record['sheets'].append({'sheet': sheet_name, **sheet_record})
+                    record['rows'] += result['total_rows']
+                memory = analyzer.memory_report()
+                for sheet in record['sheets']:
+                    # 🧱 None en los CSV por bloques (nunca están enteros en memoria)
+                    sheet['memory_bytes'] = memory.get(sheet['sheet'], {}).get('bytes')
+                if trade_store_path:
+                    record['stored_trades'] = analyzer.last_stored_trades
+                if analyzer.last_excel_engine is not None:
+                    record['excel_engine'] = analyzer.last_excel_engine
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = f"{type(e).__name__}: {e}"
+
+    record['seconds'] = time.perf_counter() - started
+    return record
+
+
+class ResultWriter:
+    """📤 Escribe resultados a medida que terminan: JSONL (una línea por archivo y por hoja) o Parquet"""
+
+    def __init__(self, output: str, fmt: str = 'jsonl', parquet_batch_files: int = 200):
+        self.output = output
+        self.fmt = fmt
+        self.parquet_batch_files = parquet_batch_files
+        self._pending_rows = []
+        self._pending_files = 0
+        self._pending_keys = []
+
+        if fmt == 'parquet':
+            os.makedirs(output, exist_ok=True)
+            self._part = len([name for name in os.listdir(output) if name.endswith('.parquet')])
+        else:
+            output_dir = os.path.dirname(os.path.abspath(output))
+            os.makedirs(output_dir, exist_ok=True)
+            self._handle = open(output, 'a', encoding='utf-8')
+
+    def write(self, record: Dict, done_key: Optional[str] = None) -> List[str]:
+        """📝 Añadir un archivo y sus hojas; devuelve las claves de progreso cuyo resultado ya está en disco
+
+        `done_key` es la clave de progreso del archivo (solo si se puede marcar
+        como hecho). En Parquet queda pendiente hasta que su lote se vuelca.
+        """
+        file_row = {
+            'record_type': 'file', 'file': record['file'], 'status': record['status'],
+            'error': record['error'], 'rows': record['rows'], 'seconds': record['seconds'],
+            'sheet_count': len(record['sheets'])
+        }
+        for key in ('stored_trades', 'excel_engine'):
+            if key in record:
+                file_row[key] = record[key]
+        sheet_rows = [
+            {'record_type': 'sheet', 'file': record['file'], **self._flatten(sheet)}
+            for sheet in record['sheets']
+        ]
+
+        if self.fmt == 'parquet':
+            # 🧾 La fila del archivo va en el mismo lote que sus hojas (se distinguen por `record_type`)
+            self._pending_rows.append(file_row)
+            self._pending_rows.extend(sheet_rows)
+            self._pending_files += 1
+            if done_key is not None:
+                self._pending_keys.append(done_key)
+            if self._pending_files >= self.parquet_batch_files:
+                return self.flush()
+            return []
+
+        for row in [file_row] + sheet_rows:
+            self._handle.write(json.dumps(row, default=str, ensure_ascii=False) + '\n')
+        self._handle.flush()
+        return [done_key] if done_key is not None else []
+
+    def flush(self) -> List[str]:
+        """💾 Volcar lo pendiente (en Parquet, un archivo `part-NNNNN.parquet` por lote) y devolver sus claves de progreso"""
+        if self.fmt != 'parquet':
+            self._handle.flush()
+            return []
+        done_keys, self._pending_keys = self._pending_keys, []
+        if not self._pending_rows:
+            self._pending_files = 0
+            return done_keys
+
+        import pandas as pd
+        part_path = os.path.join(self.output, f"part-{self._part:05d}.parquet")
+        pd.DataFrame(self._pending_rows).to_parquet(part_path, index=False)
+        self._part += 1
+        self._pending_rows = []
+        self._pending_files = 0
+        return done_keys
+
+    def close(self) -> List[str]:
+        done_keys = self.flush()
+        if self.fmt != 'parquet':
+            self._handle.close()
+        return done_keys
+
+    @staticmethod
+    def _flatten(sheet: Dict) -> Dict:
+        """📋 El desglose por categoría y las métricas se guardan como JSON para que la tabla sea plana"""
+        flat = dict(sheet)
+        for key in ('operation_breakdown', 'metrics'):
+            flat[key] = json.dumps(flat.get(key, {}), ensure_ascii=False, default=str)
+        return flat
+
+
+def run_batch(paths: List[str], writer: ResultWriter, progress_path: str, workers: int,
+              preset: str = 'auto', sheet_numbers: Optional[List[int]] = None,
+              csv_chunksize: Optional[int] = None, max_tasks_per_child: Optional[int] = 50,
+              report_every: int = 50, row_filters: Optional[Dict] = None,
+              trade_store_path: Optional[str] = None, excel_engine: Optional[str] = None) -> Dict:
+    """🏁 Repartir archivos en un pool de procesos, escribir resultados y marcar progreso"""
+    completed = load_progress(progress_path)
+    pending = [path for path in paths if progress_key(path) not in completed]
+    skipped = len(paths) - len(pending)
+
+    stats = {'files': 0, 'errors': 0, 'rows': 0, 'skipped': skipped}
+    started = time.perf_counter()
+
+    def report(final: bool = False):
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        print(
+            f"{'✅' if final else '⏳'} {stats['files']:,}/{len(pending):,} archivos "
+            f"({stats['errors']:,} errores, {skipped:,} ya hechos) | "
+            f"{stats['files'] / elapsed:,.2f} archivos/s | {stats['rows'] / elapsed:,.0f} filas/s",
+            file=sys.stderr
+        )
+
+    with open(progress_path, 'a', encoding='utf-8') as progress_handle, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                max_tasks_per_child=max_tasks_per_child) as pool:
+        futures = {
+            pool.submit(analyze_export, path, preset, sheet_numbers, csv_chunksize, row_filters,
+                        trade_store_path, excel_engine): path
+            for path in pending
+        }
+
+        def mark_done(done_keys: List[str]):
+            for key in done_keys:
+                progress_handle.write(key + '\n')
+            progress_handle.flush()
+
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:
+                # El worker murió (p. ej. sin memoria): se registra y no se marca como hecho
+                record = {'file': path, 'status': 'error', 'error': f"{type(e).__name__}: {e}",
+                          'rows': 0, 'seconds': None, 'sheets': []}
+
+            # ✅ Solo los archivos analizados sin error se marcan como hechos; los errores
+            # (también los workers caídos) se reintentan al reanudar
+            done_key = progress_key(path) if record['status'] == 'ok' else None
+            mark_done(writer.write(record, done_key))
+            stats['files'] += 1
+            stats['rows'] += record['rows']
+            if record['status'] != 'ok':
+                stats['errors'] += 1
+
+            if stats['files'] % report_every == 0:
+                report()
+
+        # Parquet: el último lote (incompleto) se marca como hecho después de escribirlo
+        mark_done(writer.close())
+
+    stats['seconds'] = time.perf_counter() - started
+    report(final=True)
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="🗃️ Análisis por lotes de exportaciones de trading (sin navegador)")
+    parser.add_argument('inputs', nargs='+', help="Directorios, archivos o globs (xlsx/xls/csv)")
+    parser.add_argument('--output', required=True, help="Archivo .jsonl o directorio Parquet")
+    parser.add_argument('--format', choices=['jsonl', 'parquet'], default='jsonl')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--preset', choices=sorted(FILTER_PRESETS), default='auto', help="Filtro de hojas")
+    parser.add_argument('--sheet-numbers', type=int, nargs='*', help="Solo hojas con estos números")
+    parser.add_argument('--csv-chunksize', type=int, default=None, help="Forzar CSV por bloques")
+    parser.add_argument('--start', default=None, help="Solo filas desde esta fecha")
+    parser.add_argument('--end', default=None, help="Solo filas hasta esta fecha (incluida)")
+    parser.add_argument('--symbols', nargs='*', help="Solo estos símbolos (BTC-USDT, ETHUSDT...)")
+    parser.add_argument('--side', choices=['long', 'short'], default=None)
+    parser.add_argument('--min-abs-pnl', type=float, default=None, help="Descartar filas con |PnL| menor")
+    parser.add_argument('--analysis-columns-only', action='store_true', help="Leer solo las columnas del análisis")
+    parser.add_argument('--max-tasks-per-child', type=int, default=50,
+                        help="Reciclar cada worker tras N archivos (acota la memoria)")
+    parser.add_argument('--progress-file', default=None, help="Archivo de progreso (por defecto <output>.progress)")
+    parser.add_argument('--restart', action='store_true', help="Ignorar el progreso guardado")
+    parser.add_argument('--trade-store', default=None, help="Guardar los trades en este histórico SQLite local")
+    parser.add_argument('--excel-engine', choices=['auto', 'calamine', 'openpyxl', 'xlrd'], default=None,
+                        help="Motor de lectura de Excel (por defecto automático)")
+    args = parser.parse_args(argv)
+
+    paths = discover_exports(args.inputs)
+    if not paths:
+        print("❌ No se encontraron exportaciones", file=sys.stderr)
+        return 1
+
+    progress_path = args.progress_file or f"{args.output.rstrip(os.sep)}.progress"
+    if args.restart and os.path.exists(progress_path):
+        os.remove(progress_path)
+
+    writer = ResultWriter(args.output, fmt=args.format)
+    stats = run_batch(
+        paths, writer, progress_path, workers=args.workers, preset=args.preset,
+        sheet_numbers=args.sheet_numbers, csv_chunksize=args.csv_chunksize,
+        max_tasks_per_child=args.max_tasks_per_child,
+        row_filters={
+            'start': args.start, 'end': args.end, 'symbols': args.symbols, 'side': args.side,
+            'min_abs_pnl': args.min_abs_pnl, 'analysis_columns_only': args.analysis_columns_only
+        },
+        trade_store_path=args.trade_store, excel_engine=args.excel_engine
+    )
+    return 0 if stats['errors'] == 0 else 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
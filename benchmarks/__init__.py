@@ -0,0 +1,4 @@
+"""
+⏱️ Trading Analyzer Pro - Benchmarks
+Generador sintético de exportaciones y medición por etapas del pipeline
+"""
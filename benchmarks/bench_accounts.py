@@ -0,0 +1,89 @@
+"""
+⏱️ Trading Analyzer Pro - Account Section Benchmark
+Tamaño enviado al navegador y tiempo de la sección por cuenta: tarjetas + gráfico completo vs. tabla paginada + top-N
+
+Uso:
+    python -m benchmarks.bench_accounts --accounts 10 100 1000 5000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+
+def synthetic_results(accounts: int, seed: int = 0) -> Dict:
+    """🏦 Resultados de `accounts` hojas con métricas aleatorias (sin series de PnL)"""
+    from aggregates import PnLAggregate
+
+    rng = np.random.default_rng(seed)
+    results = {}
+    for index in range(accounts):
+        aggregate = PnLAggregate(pnl_column='Realized PnL', total_rows=int(rng.integers(100, 5000)))
+        aggregate.update(np.round(rng.normal(0.1, 10.0, 50), 4), total_rows=0, filtered_rows=0)
+        aggregate.filtered_rows = aggregate.total_rows
+        results[f"Futures Account {index}"] = aggregate.to_result()
+    return results
+
+
+def bar_figure(accounts: List, values) -> str:
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Bar(x=accounts, y=values, text=[f'${value:,.0f}' for value in values]))
+    return fig.to_json()
+
+
+def cards_payload(results: Dict) -> int:
+    """🃏 Modo tarjetas: un bloque HTML por cuenta + una barra por cuenta"""
+    html = sum(len(
+        f"<div><h4>{account}</h4><p>PnL: ${data['total_pnl']:,.2f} | Win Rate: {data['win_rate']:.1f}% | "
+        f"Trades: {data['total_trades']:,}</p><p>Ganancias: ${data['total_profit']:,.2f} | "
+        f"Pérdidas: ${data['total_loss']:,.2f}</p><p>Columna PnL: {data['pnl_column']} | "
+        f"Filas totales: {data['total_rows']:,}</p></div>"
+    ) for account, data in results.items())
+    return html + len(bar_figure(list(results), [data['total_pnl'] for data in results.values()]))
+
+
+def table_payload(results: Dict, page_size: int) -> int:
+    """📋 Modo tabla: una página de la tabla ordenada + gráfico top-N con "Otras" """
+    from account_table import AccountTable
+    from chart_data import top_n_with_others
+
+    table = AccountTable(results)
+    rows, _, _ = table.page(1, page_size, by='total_pnl')
+    accounts, values, _ = top_n_with_others(list(results), [data['total_pnl'] for data in results.values()])
+    return len(AccountTable.display(rows).to_json(orient='split')) + len(bar_figure(accounts, values))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from account_table import DEFAULT_PAGE_SIZE
+
+    parser = argparse.ArgumentParser(description="⏱️ Sección por cuenta: tarjetas vs. tabla paginada")
+    parser.add_argument('--accounts', type=int, nargs='+', default=[10, 100, 1000, 5000])
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    bar_figure([], [])  # 📦 Importar Plotly antes de medir
+    rows = []
+    for accounts in args.accounts:
+        results = synthetic_results(accounts, args.seed)
+        timings = {}
+        for mode, build in (('cards', lambda: cards_payload(results)),
+                            ('table', lambda: table_payload(results, args.page_size))):
+            start = time.perf_counter()
+            timings[f'{mode}_bytes'] = build()
+            timings[f'{mode}_seconds'] = time.perf_counter() - start
+        rows.append({'accounts': accounts, **timings})
+    print(json.dumps(rows, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
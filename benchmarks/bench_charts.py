@@ -0,0 +1,80 @@
+"""
+⏱️ Trading Analyzer Pro - Chart Payload Benchmark
+Tamaño del JSON de la figura y tiempo de construcción según el número de trades
+
+Uso:
+    python -m benchmarks.bench_charts --trades 1000 100000 1000000 5000000
+    python -m benchmarks.bench_charts --max-points 5000 --no-downsample
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+
+def build_equity_figure(pnl: np.ndarray, times: np.ndarray, max_points: Optional[int], downsample: bool):
+    """📈 Equity + drawdown como en el panel de métricas de la app"""
+    import plotly.graph_objects as go
+
+    from chart_data import scatter_trace
+    from metrics_engine import SeriesMetrics
+
+    metrics = SeriesMetrics(pnl, times)
+    fig = go.Figure()
+    if downsample:
+        fig.add_trace(scatter_trace(times, metrics.equity, max_points=max_points, name="Equity"))
+        fig.add_trace(scatter_trace(times, metrics.drawdown, max_points=max_points, method='minmax', name="Drawdown"))
+    else:
+        fig.add_trace(go.Scatter(x=times, y=metrics.equity, name="Equity"))
+        fig.add_trace(go.Scatter(x=times, y=metrics.drawdown, name="Drawdown"))
+    return fig
+
+
+def run_benchmark(trade_counts: List[int], max_points: Optional[int], downsample: bool, seed: int = 0) -> List[Dict]:
+    rng = np.random.default_rng(seed)
+    rows = []
+    for trades in trade_counts:
+        pnl = rng.normal(0.05, 10.0, trades)
+        times = np.datetime64('2024-01-01', 'ns') + np.cumsum(rng.integers(1, 120, trades)).astype('timedelta64[s]')
+
+        start = time.perf_counter()
+        fig = build_equity_figure(pnl, times, max_points, downsample)
+        build_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        payload = fig.to_json()
+        serialize_seconds = time.perf_counter() - start
+
+        rows.append({
+            'trades': trades,
+            'points_per_trace': [len(trace.y) for trace in fig.data],
+            'trace_types': sorted({trace.type for trace in fig.data}),
+            'build_seconds': build_seconds,
+            'serialize_seconds': serialize_seconds,
+            'payload_bytes': len(payload.encode('utf-8'))
+        })
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="⏱️ Payload y tiempo de las gráficas por número de trades")
+    parser.add_argument('--trades', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    parser.add_argument('--max-points', type=int, default=None, help="Presupuesto de puntos por traza")
+    parser.add_argument('--no-downsample', action='store_true', help="Enviar todos los puntos (referencia)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rows = run_benchmark(args.trades, args.max_points, downsample=not args.no_downsample, seed=args.seed)
+    print(json.dumps(rows, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""
+⏱️ Trading Analyzer Pro - Excel Reader Benchmark
+Tiempo de cada motor de Excel instalado y comprobación de que todos devuelven las mismas hojas
+
+Uso:
+    python -m benchmarks.bench_excel_readers --rows 20000 --sheets 3 --audit-sheets 4
+    python -m benchmarks.bench_excel_readers --files export1.xlsx export2.xlsx
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_exports import ensure_export
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from excel_readers import compare_engines, select_excel_engines
+
+    parser = argparse.ArgumentParser(description="⏱️ Motores de Excel: tiempo y paridad de las hojas")
+    parser.add_argument('--files', nargs='*', default=None, help="Libros a comparar (por defecto uno sintético)")
+    parser.add_argument('--rows', type=int, default=20_000, help="Filas por hoja del libro sintético")
+    parser.add_argument('--sheets', type=int, default=3)
+    parser.add_argument('--audit-sheets', type=int, default=0)
+    parser.add_argument('--exchange', choices=['bingx', 'binance'], default='bingx')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR)
+    args = parser.parse_args(argv)
+
+    paths = args.files or [ensure_export(args.data_dir, 'xlsx', args.rows, sheets=args.sheets,
+                                         audit_sheets=args.audit_sheets, exchange=args.exchange, seed=args.seed)]
+    report = []
+    for path in paths:
+        report.append({
+            'file': os.path.basename(path),
+            'bytes': os.path.getsize(path),
+            'auto_engine': select_excel_engines(path)[0],
+            'engines': compare_engines(path)
+        })
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    # ❌ Código de salida 1 si algún motor no devuelve exactamente las mismas hojas
+    identical = all(result['identical'] for item in report for result in item['engines'].values())
+    return 0 if identical else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
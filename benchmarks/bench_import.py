@@ -0,0 +1,81 @@
+"""
+⏱️ Trading Analyzer Pro - Import / Worker Cold-Start Benchmark
+Mide en procesos nuevos cuánto cuesta importar cada módulo y arrancar un worker que lo usa
+
+Uso:
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --modules analyzer_engine app --repeats 7
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_import(module: str, repeats: int = 5) -> Dict:
+    """📦 Tiempo de `import module` en un intérprete limpio (sin contar el arranque de Python)"""
+    code = (
+        "import sys, time; sys.path.insert(0, {repo!r}); start = time.perf_counter(); "
+        "import {module}; print(time.perf_counter() - start)"
+    ).format(repo=REPO_DIR, module=module)
+
+    timings = []
+    for _ in range(repeats):
+        completed = subprocess.run(
+            [sys.executable, '-c', code], capture_output=True, text=True, check=True, cwd=REPO_DIR
+        )
+        timings.append(float(completed.stdout.strip().splitlines()[-1]))
+    return {'module': module, 'import_seconds_min': min(timings), 'import_seconds_median': statistics.median(timings)}
+
+
+def _import_in_worker(module: str) -> bool:
+    __import__(module)
+    return True
+
+
+def measure_worker_cold_start(module: str, repeats: int = 3) -> Dict:
+    """⚙️ Desde crear un pool `spawn` hasta que su primer worker ha importado el módulo"""
+    context = multiprocessing.get_context('spawn')
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        with context.Pool(processes=1) as pool:
+            pool.apply(_import_in_worker, (module,))
+            timings.append(time.perf_counter() - start)
+    return {'worker_cold_start_min': min(timings), 'worker_cold_start_median': statistics.median(timings)}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="⏱️ Tiempo de importación y arranque de workers")
+    parser.add_argument('--modules', nargs='+', default=['analyzer_engine', 'app'])
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--output', default=None, help="Archivo JSON de resultados (por defecto stdout)")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, REPO_DIR)
+    results: List[Dict] = []
+    for module in args.modules:
+        results.append({
+            **measure_import(module, args.repeats),
+            **measure_worker_cold_start(module, max(1, args.repeats // 2))
+        })
+
+    payload = json.dumps({'python': sys.version.split()[0], 'results': results}, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            handle.write(payload)
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,256 @@
+"""
+⏱️ Trading Analyzer Pro - Pipeline Benchmark
+Mide por separado load_file, filter_sheets, clasificación y analyze_data (tiempo y memoria pico)
+
+Uso:
+    python -m benchmarks.bench_pipeline --format xlsx --rows 50000 --sheets 4 --audit-sheets 8
+    python -m benchmarks.bench_pipeline --format csv --rows 5000000 --output results.json
+    python -m benchmarks.bench_pipeline --format csv --rows 1000000 --no-dtype-planning --output before.json
+    python -m benchmarks.bench_pipeline --format xlsx --rows 50000 --excel-engine openpyxl --output openpyxl.json
+    python -m benchmarks.bench_pipeline --compare old.json new.json
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic_exports import ensure_export
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+class NamedBytesIO(io.BytesIO):
+    """📁 Bytes en memoria con `.name` y `.size`, como el UploadedFile de Streamlit"""
+
+    def __init__(self, content: bytes, name: str):
+        super().__init__(content)
+        self.name = name
+        self.size = len(content)
+
+    @classmethod
+    def from_path(cls, path: str) -> 'NamedBytesIO':
+        with open(path, 'rb') as handle:
+            return cls(handle.read(), os.path.basename(path))
+
+
+def _measure(func: Callable, repeats: int, track_memory: bool) -> Dict:
+    """⏱️ Ejecutar `func` varias veces: tiempos y (en una pasada aparte) memoria pico"""
+    timings = []
+    output = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        output = func()
+        timings.append(time.perf_counter() - start)
+
+    peak_bytes = None
+    if track_memory:
+        # tracemalloc frena la ejecución: la memoria se mide en una pasada separada
+        tracemalloc.start()
+        func()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        'seconds_min': min(timings),
+        'seconds_median': statistics.median(timings),
+        'peak_bytes': peak_bytes,
+        'output': output
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(path: str, repeats: int = 3, track_memory: bool = True, lazy: bool = False,
+                  csv_chunksize: Optional[int] = None, dtype_planning: bool = True,
+                  excel_engine: Optional[str] = None) -> List[Dict]:
+    """🏁 Medir cada etapa del pipeline sobre una exportación ya generada"""
+    from analyzer_engine import TradingAnalyzer
+    from ingest_cache import IngestionCache
+    from sheet_filter import SheetFilter
+
+    # Solo se analizan las cuentas: las hojas de auditoría quedan fuera del filtro
+    def new_sheet_filter():
+        return SheetFilter().add_pattern(r'account|main')
+
+    def new_analyzer(cache: IngestionCache):
+        analyzer = TradingAnalyzer(cache=cache, lazy_sheets=lazy, csv_chunksize=csv_chunksize,
+                                   plan_dtypes=dtype_planning, excel_engine=excel_engine)
+        return analyzer.set_sheet_filter(new_sheet_filter())
+
+    # El archivo se lee de disco una sola vez, como un upload ya recibido
+    upload = NamedBytesIO.from_path(path)
+    content, name = upload.getvalue(), upload.name
+    stages = []
+
+    def record(stage: str, measurement: Dict, rows: Optional[int] = None, **extra):
+        seconds = measurement['seconds_min']
+        stages.append({
+            'stage': stage,
+            'seconds_min': seconds,
+            'seconds_median': measurement['seconds_median'],
+            'peak_bytes': measurement['peak_bytes'],
+            'rows': rows,
+            'rows_per_second': (rows / seconds) if rows and seconds > 0 else None,
+            **extra
+        })
+
+    # 1. 📁 Carga en frío (caché desactivada) y en caliente (acierto de caché)
+    def load_cold():
+        analyzer = new_analyzer(IngestionCache(max_bytes=0))
+        analyzer.load_file(NamedBytesIO(content, name))
+        return analyzer
+
+    cold = _measure(load_cold, repeats, track_memory)
+    record('load_file_cold', cold, excel_engine=cold['output'].last_excel_engine)
+
+    warm_cache = IngestionCache()
+    new_analyzer(warm_cache).load_file(NamedBytesIO(content, name))
+
+    def load_warm():
+        analyzer = new_analyzer(warm_cache)
+        analyzer.load_file(NamedBytesIO(content, name))
+        return analyzer
+
+    record('load_file_warm', _measure(load_warm, repeats, track_memory))
+
+    # 2. 🗂️ Filtro de hojas (en modo perezoso incluye el parseo de las hojas elegidas)
+    sheet_filter = new_sheet_filter()
+    filtered = _measure(lambda: sheet_filter.filter_sheets(load_cold().data), repeats, track_memory)
+    filtered_data = filtered['output']
+    materialized = {name: df for name, df in filtered_data.items() if isinstance(df, pd.DataFrame)}
+    total_rows = sum(len(df) for df in materialized.values()) or None
+    frame_bytes = sum(int(df.memory_usage(deep=True).sum()) for df in materialized.values()) if materialized else None
+    record('filter_sheets', filtered, rows=total_rows, sheets_selected=len(filtered_data), frame_bytes=frame_bytes)
+
+    # 3. 🚫 Clasificación de operaciones no-trading
+    analyzer = load_cold()
+    if materialized:
+        classify = _measure(
+            lambda: [analyzer._classify_operations(df, report=False) for df in materialized.values()],
+            repeats, track_memory
+        )
+        record('classify_operations', classify, rows=total_rows)
+
+    # 4. 🧠 analyze_data completo sobre datos ya cargados
+    analysis = _measure(analyzer.analyze_data, repeats, track_memory)
+    trades = sum(result['total_trades'] for result in analysis['output'].values())
+    record('analyze_data', analysis, rows=total_rows, trades=trades)
+
+    # 5. 🔁 Extremo a extremo: carga en frío + análisis
+    end_to_end = _measure(lambda: load_cold().analyze_data(), repeats, track_memory)
+    record('end_to_end', end_to_end, rows=total_rows)
+
+    return stages
+
+
+def compare_results(baseline_path: str, candidate_path: str) -> str:
+    """📊 Tabla de comparación entre dos archivos de resultados"""
+    with open(baseline_path, 'r', encoding='utf-8') as handle:
+        baseline = {stage['stage']: stage for stage in json.load(handle)['stages']}
+    with open(candidate_path, 'r', encoding='utf-8') as handle:
+        candidate = {stage['stage']: stage for stage in json.load(handle)['stages']}
+
+    lines = [f"{'etapa':<22}{'antes (s)':>12}{'después (s)':>14}{'speedup':>10}{'mem antes':>14}{'mem después':>14}"]
+    for stage, new in candidate.items():
+        old = baseline.get(stage)
+        if old is None:
+            continue
+        speedup = old['seconds_min'] / new['seconds_min'] if new['seconds_min'] > 0 else float('inf')
+        lines.append(
+            f"{stage:<22}{old['seconds_min']:>12.4f}{new['seconds_min']:>14.4f}{speedup:>9.2f}x"
+            f"{_format_bytes(old.get('peak_bytes')):>14}{_format_bytes(new.get('peak_bytes')):>14}"
+        )
+    old_frames, new_frames = baseline.get('filter_sheets', {}), candidate.get('filter_sheets', {})
+    if old_frames.get('frame_bytes') and new_frames.get('frame_bytes'):
+        # 🧱 Memoria de los DataFrames que quedan cargados (deep), no solo el pico durante la carga
+        lines.append(
+            f"{'dataframes (deep)':<22}{'':>12}{'':>14}"
+            f"{old_frames['frame_bytes'] / new_frames['frame_bytes']:>9.2f}x"
+            f"{_format_bytes(old_frames['frame_bytes']):>14}{_format_bytes(new_frames['frame_bytes']):>14}"
+        )
+    return '\n'.join(lines)
+
+
+def _format_bytes(value: Optional[int]) -> str:
+    return '-' if value is None else f"{value / 1024 / 1024:.1f} MB"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="⏱️ Benchmark del pipeline de Trading Analyzer Pro")
+    parser.add_argument('--format', choices=['xlsx', 'csv'], default='xlsx')
+    parser.add_argument('--rows', type=int, default=20_000, help="Filas por hoja (xlsx) o totales (csv)")
+    parser.add_argument('--sheets', type=int, default=3, help="Hojas de cuentas de trading (xlsx)")
+    parser.add_argument('--audit-sheets', type=int, default=0, help="Hojas de auditoría/ledger que el filtro descarta (xlsx)")
+    parser.add_argument('--exchange', choices=['bingx', 'binance'], default='bingx')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true', help="No medir memoria pico (más rápido)")
+    parser.add_argument('--lazy', action='store_true', help="Usar LazyWorkbook para Excel")
+    parser.add_argument('--csv-chunksize', type=int, default=None, help="Analizar CSV por bloques")
+    parser.add_argument('--no-dtype-planning', action='store_true',
+                        help="Cargar todas las columnas con los dtypes de pandas (referencia)")
+    parser.add_argument('--excel-engine', choices=['auto', 'calamine', 'openpyxl', 'xlrd'], default=None,
+                        help="Motor de lectura de Excel (por defecto automático)")
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR)
+    parser.add_argument('--output', default=None, help="Archivo JSON de resultados (por defecto stdout)")
+    parser.add_argument('--compare', nargs=2, metavar=('ANTES', 'DESPUES'), help="Comparar dos resultados")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        print(compare_results(*args.compare))
+        return 0
+
+    path = ensure_export(args.data_dir, args.format, args.rows, sheets=args.sheets,
+                         audit_sheets=args.audit_sheets, exchange=args.exchange, seed=args.seed)
+
+    stages = run_benchmark(path, repeats=args.repeats, track_memory=not args.no_memory,
+                           lazy=args.lazy, csv_chunksize=args.csv_chunksize,
+                           dtype_planning=not args.no_dtype_planning, excel_engine=args.excel_engine)
+
+    report = {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'params': {key: value for key, value in vars(args).items() if key not in ('compare', 'output')},
+        'input_file': os.path.basename(path),
+        'input_bytes': os.path.getsize(path),
+        'stages': stages
+    }
+
+    payload = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            handle.write(payload)
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+⏱️ Trading Analyzer Pro - Bootstrap Risk Benchmark
+Bucle de Python trade a trade vs. remuestreo vectorizado por bloques, y reproducibilidad con 1 y N procesos
+
+Uso:
+    python -m benchmarks.bench_risk --trades 100000 --resamples 10000 --workers 8
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import List, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def naive_bootstrap(pnl: List[float], resamples: int, seed: int) -> List[tuple]:
+    """🐢 Referencia: un remuestreo cada vez con bucles de Python"""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(resamples):
+        sample = rng.choices(pnl, k=len(pnl))
+        equity, peak, max_drawdown, wins = 0.0, 0.0, 0.0, 0
+        for value in sample:
+            equity += value
+            wins += value > 0
+            peak = max(peak, equity)
+            max_drawdown = max(max_drawdown, peak - equity)
+        rows.append((equity, wins / len(sample) * 100, max_drawdown))
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from metrics_engine import SeriesMetrics
+    from risk_engine import RISK_METRICS, _simulate_block, default_risk_workers, run_bootstrap
+
+    parser = argparse.ArgumentParser(description="⏱️ Bootstrap de riesgo: bucle de Python vs. NumPy por bloques")
+    parser.add_argument('--trades', type=int, default=100_000)
+    parser.add_argument('--resamples', type=int, default=10_000)
+    parser.add_argument('--naive-resamples', type=int, default=20,
+                        help="Remuestreos del bucle de Python (su tiempo se extrapola a --resamples)")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos (por defecto todos los núcleos)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    pnl = np.random.default_rng(args.seed).normal(0.5, 10.0, args.trades)
+    workers = args.workers or default_risk_workers()
+
+    started = time.perf_counter()
+    naive_bootstrap(pnl.tolist(), args.naive_resamples, args.seed)
+    naive_seconds = (time.perf_counter() - started) / args.naive_resamples * args.resamples
+
+    serial = run_bootstrap(pnl, resamples=args.resamples, seed=args.seed, workers=1)
+    parallel = run_bootstrap(pnl, resamples=args.resamples, seed=args.seed, workers=workers)
+    reproducible = all(np.array_equal(serial.distributions[metric], parallel.distributions[metric])
+                       for metric in RISK_METRICS)
+
+    # 🔬 Cada remuestreo vectorizado da lo mismo que SeriesMetrics sobre esa misma muestra
+    seed = np.random.SeedSequence(args.seed)
+    check = _simulate_block(pnl, seed, 3)
+    indices = np.random.default_rng(seed).integers(0, len(pnl), size=(3, len(pnl)), dtype=np.int32)
+    matches_metrics = all(
+        np.isclose(check[row, 0], SeriesMetrics(pnl[indices[row]]).summary['final_equity'])
+        and np.isclose(check[row, 2], SeriesMetrics(pnl[indices[row]]).summary['max_drawdown'])
+        for row in range(3)
+    )
+
+    print(json.dumps({
+        'trades': args.trades,
+        'resamples': args.resamples,
+        'python_loop_seconds_estimated': naive_seconds,
+        'numpy_seconds_1_worker': serial.seconds,
+        f'numpy_seconds_{parallel.workers}_workers': parallel.seconds,
+        'speedup_vs_python_loop': naive_seconds / parallel.seconds,
+        'block_size': serial.block_size,
+        'reproducible_across_workers': reproducible,
+        'matches_series_metrics': matches_metrics,
+        'summary': parallel.summary()
+    }, indent=2, ensure_ascii=False))
+
+    # ❌ Código de salida 1 si el resultado depende del nº de procesos o no cuadra con SeriesMetrics
+    return 0 if reproducible and matches_metrics else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+🧪 Trading Analyzer Pro - Synthetic Exchange Exports
+Generador determinista de exportaciones con forma de BingX/Binance (Excel y CSV)
+"""
+
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# 🏦 Columnas por exchange: (fecha, símbolo, tipo, lado, pnl) + columnas de relleno
+EXCHANGE_PROFILES = {
+    'bingx': {
+        'time': 'Time(UTC+8)',
+        'symbol': 'Pair',
+        'type': 'Type',
+        'side': 'Side',
+        'pnl': 'Realized PNL',
+        'extra': ['Order No', 'Fee', 'Leverage']
+    },
+    'binance': {
+        'time': 'Date(UTC)',
+        'symbol': 'Symbol',
+        'type': 'Type',
+        'side': 'Side',
+        'pnl': 'Realized Profit',
+        'extra': ['Price', 'Quantity', 'Amount', 'Fee']
+    }
+}
+
+# 🏷️ Mezcla por defecto de tipos de operación (proporciones)
+DEFAULT_TYPE_MIX = {
+    'Trade': 0.70,
+    'Funding Fee': 0.15,
+    'Commission': 0.07,
+    'Transfer': 0.05,
+    'Airdrop Reward': 0.03
+}
+
+DEFAULT_SYMBOLS = ['BTC-USDT', 'ETH-USDT', 'SOL-USDT', 'XRP-USDT', 'DOGE-USDT', 'BNB-USDT']
+EXCEL_MAX_ROWS = 1_048_575  # Límite de filas de una hoja .xlsx (sin cabecera)
+_CSV_BLOCK_ROWS = 1_000_000
+
+
+def generate_trades(rows: int, exchange: str = 'bingx', seed: int = 0, start_row: int = 0,
+                    type_mix: Optional[Dict[str, float]] = None, pnl_column: Optional[str] = None,
+                    symbols: Optional[List[str]] = None) -> pd.DataFrame:
+    """📊 Generar `rows` operaciones deterministas (misma semilla -> mismo DataFrame)"""
+    profile = EXCHANGE_PROFILES[exchange]
+    type_mix = type_mix or DEFAULT_TYPE_MIX
+    symbols = symbols or DEFAULT_SYMBOLS
+    rng = np.random.default_rng([seed, start_row])
+
+    type_names = list(type_mix)
+    type_probs = np.array([type_mix[name] for name in type_names], dtype=np.float64)
+    type_probs /= type_probs.sum()
+
+    # Fechas crecientes (1 operación cada ~30s de media) a partir de la fila inicial
+    start = pd.Timestamp('2022-01-01') + pd.Timedelta(seconds=30 * start_row)
+    offsets = np.cumsum(rng.integers(1, 60, size=rows))
+    times = start + pd.to_timedelta(offsets, unit='s')
+
+    data = {
+        profile['time']: times,
+        profile['symbol']: rng.choice(symbols, size=rows),
+        profile['type']: np.array(type_names, dtype=object)[rng.choice(len(type_names), size=rows, p=type_probs)],
+        profile['side']: rng.choice(['BUY', 'SELL'], size=rows),
+        pnl_column or profile['pnl']: np.round(rng.normal(0.5, 25.0, size=rows), 4)
+    }
+    for extra in profile['extra']:
+        if extra == 'Order No':
+            data[extra] = np.arange(start_row, start_row + rows, dtype=np.int64) + 10**12
+        else:
+            data[extra] = np.round(rng.random(rows) * 100, 4)
+
+    return pd.DataFrame(data)
+
+
+def sheet_names_for(sheets: int, audit_sheets: int = 0) -> List[str]:
+    """📋 Nombres de hoja: cuentas de trading + hojas de auditoría/ledger"""
+    account_types = ['Futures', 'Spot', 'Margin', 'Perpetual']
+    names = [f"{account_types[i % len(account_types)]} Account {i + 1}" for i in range(sheets)]
+    names += [f"Ledger Audit {i + 1}" for i in range(audit_sheets)]
+    return names
+
+
+def write_excel(path: str, rows_per_sheet: int, sheets: int = 3, audit_sheets: int = 0,
+                exchange: str = 'bingx', seed: int = 0, **trade_options) -> str:
+    """📗 Escribir un libro .xlsx con varias hojas de operaciones"""
+    if rows_per_sheet > EXCEL_MAX_ROWS:
+        raise ValueError(f"Una hoja .xlsx admite como máximo {EXCEL_MAX_ROWS:,} filas")
+
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        for index, name in enumerate(sheet_names_for(sheets, audit_sheets)):
+            df = generate_trades(rows_per_sheet, exchange=exchange, seed=seed + index, **trade_options)
+            df.to_excel(writer, sheet_name=name[:31], index=False)
+    return path
+
+
+def write_csv(path: str, rows: int, exchange: str = 'bingx', seed: int = 0, **trade_options) -> str:
+    """📄 Escribir un CSV por bloques (decenas de millones de filas sin agotar memoria)"""
+    with open(path, 'w', encoding='utf-8', newline='') as handle:
+        for start_row in range(0, rows, _CSV_BLOCK_ROWS):
+            block_rows = min(_CSV_BLOCK_ROWS, rows - start_row)
+            block = generate_trades(block_rows, exchange=exchange, seed=seed, start_row=start_row, **trade_options)
+            block.to_csv(handle, index=False, header=(start_row == 0))
+    return path
+
+
+def ensure_export(directory: str, fmt: str, rows: int, sheets: int = 3, audit_sheets: int = 0,
+                  exchange: str = 'bingx', seed: int = 0) -> str:
+    """♻️ Generar la exportación solo si no existe ya (el nombre codifica los parámetros)"""
+    os.makedirs(directory, exist_ok=True)
+    name = f"{exchange}_{fmt}_{rows}r_{sheets}s_{audit_sheets}a_seed{seed}.{fmt}"
+    path = os.path.join(directory, name)
+    if os.path.exists(path):
+        return path
+
+    if fmt == 'xlsx':
+        return write_excel(path, rows, sheets=sheets, audit_sheets=audit_sheets, exchange=exchange, seed=seed)
+    return write_csv(path, rows, exchange=exchange, seed=seed)
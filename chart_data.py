@@ -0,0 +1,130 @@
+"""
+📊 Trading Analyzer Pro - Chart Data Layer
+Reducción de series largas (LTTB / min-max por cubos) antes de pasarlas a Plotly
+"""
+
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+CHART_POINTS_ENV = 'TRADING_ANALYZER_CHART_POINTS'
+DEFAULT_POINT_BUDGET = 2000       # 🎯 Puntos máximos por traza enviados al navegador
+WEBGL_THRESHOLD_POINTS = 1000     # ⚡ A partir de aquí se usa Scattergl en lugar de Scatter
+
+DOWNSAMPLE_METHODS = ('lttb', 'minmax')
+
+DEFAULT_TOP_BARS = 20             # 📊 Barras con nombre propio en gráficos por categoría; el resto va a "Otras"
+OTHERS_LABEL = "Otras"
+
+
+def get_point_budget() -> int:
+    """🌐 Presupuesto de puntos (configurable con `TRADING_ANALYZER_CHART_POINTS`)"""
+    return int(os.environ.get(CHART_POINTS_ENV, DEFAULT_POINT_BUDGET))
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """📐 Largest-Triangle-Three-Buckets: índices que conservan la forma visual de la serie
+
+    Un bucle por cubo (no por punto): el coste total es O(n) en NumPy más
+    `n_out` iteraciones de Python.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)  # n_out - 2 cubos entre el primer y el último punto
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    anchor = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        # Área del triángulo (ancla, candidato, media del cubo siguiente)
+        area = np.abs((x[anchor] - avg_x) * (y[start:end] - y[anchor])
+                      - (x[anchor] - x[start:end]) * (avg_y - y[anchor]))
+        anchor = start + int(np.argmax(area))
+        selected[bucket + 1] = anchor
+
+    return selected
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """📏 Mínimo y máximo de cada cubo (conserva picos y valles, ideal para drawdown)"""
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=np.float64)
+    buckets = (n_out - 2) // 2
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    bucket_ids = np.repeat(np.arange(buckets), np.diff(edges))
+
+    # Primer índice de cada cubo que alcanza su mínimo / máximo (reduceat, sin bucle)
+    mins = np.minimum.reduceat(y, edges[:-1])
+    maxs = np.maximum.reduceat(y, edges[:-1])
+    _, min_positions = np.unique(bucket_ids[y == mins[bucket_ids]], return_index=True)
+    _, max_positions = np.unique(bucket_ids[y == maxs[bucket_ids]], return_index=True)
+    min_indices = np.flatnonzero(y == mins[bucket_ids])[min_positions]
+    max_indices = np.flatnonzero(y == maxs[bucket_ids])[max_positions]
+
+    return np.unique(np.concatenate(([0, n - 1], min_indices, max_indices)))
+
+
+def downsample(x, y, max_points: Optional[int] = None, method: str = 'lttb') -> Tuple[np.ndarray, np.ndarray]:
+    """✂️ Reducir (x, y) a como mucho `max_points` puntos; los NaN se descartan antes"""
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Método no válido: {method!r} (usa {', '.join(DOWNSAMPLE_METHODS)})")
+
+    max_points = max_points or get_point_budget()
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+
+    finite = np.isfinite(y)
+    if not finite.all():
+        x, y = x[finite], y[finite]
+    if len(y) <= max_points:
+        return x, y
+
+    if method == 'minmax':
+        indices = minmax_indices(y, max_points)
+    else:
+        # Fechas como enteros (ns) para el cálculo de áreas
+        x_numeric = x.astype('datetime64[ns]').astype(np.int64) if np.issubdtype(x.dtype, np.datetime64) else x
+        indices = lttb_indices(x_numeric, y, max_points)
+    return x[indices], y[indices]
+
+
+def scatter_trace(x, y, max_points: Optional[int] = None, method: str = 'lttb',
+                  webgl_threshold: int = WEBGL_THRESHOLD_POINTS, **trace_options):
+    """📈 Traza de Plotly con la serie ya reducida; Scattergl si sigue habiendo muchos puntos"""
+    import plotly.graph_objects as go
+
+    x_out, y_out = downsample(x, y, max_points=max_points, method=method)
+    trace_class = go.Scattergl if len(y_out) > webgl_threshold else go.Scatter
+    return trace_class(x=x_out, y=y_out, **trace_options)
+
+
+def top_n_with_others(labels: Sequence, values: Sequence, top_n: int = DEFAULT_TOP_BARS,
+                      others_label: str = OTHERS_LABEL) -> Tuple[List, np.ndarray, int]:
+    """🏆 Las `top_n` categorías de mayor |valor| (en su orden original) + una barra con la suma del resto
+
+    Devuelve (etiquetas, valores, nº de categorías agrupadas en `others_label`):
+    el gráfico tiene como mucho `top_n + 1` barras sea cual sea el número de
+    categorías.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) <= top_n:
+        return list(labels), values, 0
+
+    keep = np.zeros(len(values), dtype=bool)
+    keep[np.argpartition(-np.abs(values), top_n - 1)[:top_n]] = True
+    kept_labels = [label for label, kept in zip(labels, keep) if kept]
+    others = int((~keep).sum())
+    return kept_labels + [f"{others_label} ({others})"], np.append(values[keep], values[~keep].sum()), others
@@ -0,0 +1,59 @@
+"""
+🔎 Trading Analyzer Pro - Column Detection
+Detección de columnas (PnL, fecha, símbolo, lado, ID de trade) vía el registro de esquemas
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from schema_registry import (  # noqa: F401 (palabras re-exportadas para row_filter)
+    PNL_COLUMN_WORDS, TIME_COLUMN_WORDS, SYMBOL_COLUMN_WORDS, SIDE_COLUMN_WORDS, TYPE_COLUMN_WORDS,
+    TRADE_ID_COLUMN_WORDS, ColumnMapping, resolve_columns
+)
+
+
+def detect_columns(df) -> ColumnMapping:
+    """🗺️ Todas las columnas de la hoja (perfil de exchange o heurística, memorizado por cabecera)"""
+    return resolve_columns(df.columns)
+
+
+def detect_pnl_column(df) -> Optional[str]:
+    """💰 Buscar la columna de PnL"""
+    return detect_columns(df).pnl
+
+
+def detect_time_column(df) -> Optional[str]:
+    """🕒 Buscar la columna de fecha/hora"""
+    return detect_columns(df).time
+
+
+def detect_symbol_column(df) -> Optional[str]:
+    """🪙 Buscar la columna de símbolo / par"""
+    return detect_columns(df).symbol
+
+
+def detect_side_column(df) -> Optional[str]:
+    """↕️ Buscar la columna de lado (long/short, buy/sell)"""
+    return detect_columns(df).side
+
+
+def detect_trade_id_column(df) -> Optional[str]:
+    """🆔 Buscar la columna de ID de orden / trade"""
+    return detect_columns(df).trade_id
+
+
+def parse_timestamps(values: pd.Series) -> pd.Series:
+    """🕒 Convertir una columna a datetime (NaT donde no se pueda interpretar)"""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    return pd.to_datetime(values, errors='coerce')
+
+
+def timestamps_to_numpy(values: pd.Series) -> np.ndarray:
+    """🕒 Fechas como datetime64[ns] de NumPy (las que tienen zona horaria pasan a UTC)"""
+    timestamps = parse_timestamps(values)
+    if getattr(timestamps.dt, 'tz', None) is not None:
+        timestamps = timestamps.dt.tz_convert('UTC').dt.tz_localize(None)
+    return timestamps.to_numpy(dtype='datetime64[ns]')
@@ -0,0 +1,268 @@
+"""
+🗄️ Trading Analyzer Pro - Columnar Sidecar Cache
+Copias columnares (Arrow IPC / Parquet) de las hojas parseadas, indexadas por hash y hoja
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from excel_readers import read_excel_sheets
+
+# Importar pyarrow (opcional: sin él no hay sidecars y se lee siempre el Excel)
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+SIDECAR_DIR_ENV = 'TRADING_ANALYZER_SIDECAR_DIR'
+SIDECAR_MB_ENV = 'TRADING_ANALYZER_SIDECAR_MB'
+SIDECAR_ENGINE = 'sidecar'  # 🏷️ "Motor" de Excel cuando las hojas salen del sidecar sin parsear
+DEFAULT_SIDECAR_MB = 2048
+
+_FORMAT_EXTENSIONS = {'arrow': '.arrow', 'parquet': '.parquet'}
+_MANIFEST_NAME = 'manifest.json'
+
+
+class ColumnarSidecarStore:
+    """🗄️ Directorio de sidecars columnares con límite de tamaño y desalojo LRU
+
+    Estructura: `<directorio>/<hash del archivo>/<hash de la hoja>.arrow` más un
+    `manifest.json` con el orden de las hojas. Arrow IPC se guarda sin comprimir
+    para poder leerlo con memory-map; Parquet ocupa menos pero se descomprime.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_SIDECAR_MB * 1024 * 1024,
+                 max_files: Optional[int] = None, fmt: str = 'arrow'):
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow es necesario para los sidecars columnares")
+        if fmt not in _FORMAT_EXTENSIONS:
+            raise ValueError(f"Formato de sidecar no soportado: {fmt}")
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.fmt = fmt
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    # 📋 Manifiesto por archivo
+    def get_sheet_names(self, file_hash: str) -> Optional[List[str]]:
+        """📋 Nombres de hoja registrados para un archivo (None si nunca se convirtió)"""
+        manifest_path = os.path.join(self._file_dir(file_hash), _MANIFEST_NAME)
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as handle:
+                return json.load(handle)['sheets']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_manifest(self, file_hash: str, sheet_names: List[str]):
+        file_dir = self._file_dir(file_hash)
+        os.makedirs(file_dir, exist_ok=True)
+        self._atomic_write(
+            os.path.join(file_dir, _MANIFEST_NAME),
+            lambda tmp_path: self._dump_json(tmp_path, {'sheets': sheet_names})
+        )
+
+    # 📄 Hojas individuales
+    def get_sheet(self, file_hash: str, sheet_name: str, row_filter=None) -> Optional[pd.DataFrame]:
+        """📄 Leer la copia columnar de una hoja (memory-mapped en Arrow IPC)
+
+        Con `row_filter` las filas y columnas se filtran sobre la tabla Arrow,
+        antes de crear el DataFrame.
+        """
+        path = self._sheet_path(file_hash, sheet_name)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            if self.fmt == 'arrow':
+                table = feather.read_table(path, memory_map=True)
+            else:
+                table = pq.read_table(path, memory_map=True)
+            os.utime(path)  # 🕒 Marcar como usado recientemente para el LRU
+        except (OSError, pa.ArrowException):
+            return None
+
+        if row_filter is not None:
+            table = row_filter.filter_arrow_table(table)
+        return table.to_pandas()
+
+    def put_sheet(self, file_hash: str, sheet_name: str, df: pd.DataFrame) -> bool:
+        """💾 Convertir una hoja a formato columnar; False si no es representable"""
+        # Solo nombres de columna de texto y índice por defecto: así la lectura es idéntica
+        if not all(isinstance(col, str) for col in df.columns) or not isinstance(df.index, pd.RangeIndex):
+            return False
+
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowException, TypeError, ValueError):
+            # Columnas con tipos mezclados: esa hoja se sigue leyendo del Excel
+            return False
+
+        os.makedirs(self._file_dir(file_hash), exist_ok=True)
+        if self.fmt == 'arrow':
+            writer = lambda tmp_path: feather.write_feather(table, tmp_path, compression='uncompressed')
+        else:
+            writer = lambda tmp_path: pq.write_table(table, tmp_path)
+
+        if not self._atomic_write(self._sheet_path(file_hash, sheet_name), writer):
+            return False
+
+        self.evict()
+        return True
+
+    # 📚 Libros completos
+    def register_workbook(self, file_hash: str, sheet_names: List[str]):
+        """📋 Registrar el orden de hojas de un archivo"""
+        self._write_manifest(file_hash, list(sheet_names))
+        return self
+
+    def put_workbook(self, file_hash: str, sheets: Dict[str, pd.DataFrame]):
+        """💾 Convertir todas las hojas de un libro"""
+        self.register_workbook(file_hash, list(sheets.keys()))
+        for sheet_name, df in sheets.items():
+            self.put_sheet(file_hash, sheet_name, df)
+        return self
+
+    # 🧹 Tamaño y desalojo
+    def evict(self):
+        """🧹 Borrar los sidecars menos usados hasta cumplir límites de bytes y archivos"""
+        with self._lock:
+            entries = []
+            for root, _, files in os.walk(self.directory):
+                for file_name in files:
+                    if file_name.endswith(tuple(_FORMAT_EXTENSIONS.values())):
+                        path = os.path.join(root, file_name)
+                        try:
+                            stat = os.stat(path)
+                        except OSError:
+                            continue
+                        entries.append((stat.st_mtime, stat.st_size, path))
+
+            entries.sort()
+            total_bytes = sum(size for _, size, _ in entries)
+            total_files = len(entries)
+
+            for _, size, path in entries:
+                over_bytes = total_bytes > self.max_bytes
+                over_files = self.max_files is not None and total_files > self.max_files
+                if not (over_bytes or over_files):
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total_bytes -= size
+                total_files -= 1
+                self._remove_if_orphan(os.path.dirname(path))
+        return self
+
+    def get_stats(self) -> Dict:
+        """📋 Ocupación actual del directorio de sidecars"""
+        total_bytes = 0
+        total_files = 0
+        for root, _, files in os.walk(self.directory):
+            for file_name in files:
+                if file_name.endswith(tuple(_FORMAT_EXTENSIONS.values())):
+                    total_bytes += os.path.getsize(os.path.join(root, file_name))
+                    total_files += 1
+        return {
+            'directory': self.directory,
+            'format': self.fmt,
+            'files': total_files,
+            'bytes': total_bytes,
+            'max_bytes': self.max_bytes,
+            'max_files': self.max_files
+        }
+
+    def _file_dir(self, file_hash: str) -> str:
+        return os.path.join(self.directory, file_hash)
+
+    def _sheet_path(self, file_hash: str, sheet_name: str) -> str:
+        sheet_hash = hashlib.sha256(sheet_name.encode('utf-8')).hexdigest()[:32]
+        return os.path.join(self._file_dir(file_hash), sheet_hash + _FORMAT_EXTENSIONS[self.fmt])
+
+    def _remove_if_orphan(self, file_dir: str):
+        """🗑️ Quitar manifiesto y carpeta cuando ya no queda ninguna hoja"""
+        try:
+            remaining = [name for name in os.listdir(file_dir) if name != _MANIFEST_NAME]
+            if not remaining:
+                manifest_path = os.path.join(file_dir, _MANIFEST_NAME)
+                if os.path.exists(manifest_path):
+                    os.remove(manifest_path)
+                os.rmdir(file_dir)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _dump_json(path: str, payload: Dict):
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump(payload, handle, ensure_ascii=False)
+
+    @staticmethod
+    def _atomic_write(path: str, writer) -> bool:
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            writer(tmp_path)
+            os.replace(tmp_path, path)
+            return True
+        except (OSError, pa.ArrowException):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+
+
+def read_excel_with_sidecar(source, file_hash: str, sidecar: Optional[ColumnarSidecarStore],
+                            engine: Optional[str] = None, **read_options) -> Tuple[Dict[str, pd.DataFrame], str]:
+    """📚 Leer todas las hojas usando los sidecars disponibles y convertir las que falten
+
+    Devuelve también el motor de Excel usado ('sidecar' si no hizo falta parsear nada).
+    """
+    if sidecar is None:
+        return read_excel_sheets(source, sheet_name=None, engine=engine, **read_options)
+
+    sheet_names = sidecar.get_sheet_names(file_hash)
+    if sheet_names is None:
+        sheets, used_engine = read_excel_sheets(source, sheet_name=None, engine=engine, **read_options)
+        sidecar.put_workbook(file_hash, sheets)
+        return sheets, used_engine
+
+    sheets = {name: sidecar.get_sheet(file_hash, name) for name in sheet_names}
+    missing = [name for name, df in sheets.items() if df is None]
+
+    used_engine = SIDECAR_ENGINE
+    if missing:
+        # Solo se parsean del Excel las hojas desalojadas o no convertibles
+        parsed, used_engine = read_excel_sheets(source, sheet_name=missing, engine=engine, **read_options)
+        for name, df in parsed.items():
+            sheets[name] = df
+            sidecar.put_sheet(file_hash, name, df)
+
+    return sheets, used_engine
+
+
+_default_sidecar = None
+_default_sidecar_lock = threading.Lock()
+
+
+def get_default_sidecar() -> Optional[ColumnarSidecarStore]:
+    """🌐 Sidecar compartido del proceso si `TRADING_ANALYZER_SIDECAR_DIR` está definido"""
+    global _default_sidecar
+
+    directory = os.environ.get(SIDECAR_DIR_ENV)
+    if not directory or not PYARROW_AVAILABLE:
+        return None
+
+    with _default_sidecar_lock:
+        if _default_sidecar is None:
+            max_mb = float(os.environ.get(SIDECAR_MB_ENV, DEFAULT_SIDECAR_MB))
+            _default_sidecar = ColumnarSidecarStore(directory, max_bytes=int(max_mb * 1024 * 1024))
+        return _default_sidecar
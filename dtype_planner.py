@@ -0,0 +1,141 @@
+"""
+🧱 Trading Analyzer Pro - Dtype Planner
+Plan de carga por hoja: solo las columnas del análisis, categóricas para texto repetitivo y fechas parseadas una vez
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+from column_detection import detect_columns, parse_timestamps
+
+SAMPLE_ROWS = 1000            # 🔬 Filas leídas para decidir el plan
+CATEGORY_MAX_RATIO = 0.5      # 🏷️ Texto con menos de un 50% de valores distintos -> categórica
+
+
+@dataclass
+class DtypePlan:
+    """🧱 Cómo cargar una hoja: columnas, dtypes al leer y formato de la fecha
+
+    Las columnas de tipo, símbolo y lado se leen como `category` (unos pocos
+    valores repetidos millones de veces); el PnL queda en float64 y la fecha
+    se convierte a datetime64 al cargar con un formato fijo inferido de la
+    muestra, así el resto del pipeline no la vuelve a parsear.
+    """
+
+    usecols: List[str]
+    category_columns: List[str] = field(default_factory=list)
+    pnl_column: Optional[str] = None
+    time_column: Optional[str] = None
+    time_format: Optional[str] = None
+
+    def read_options(self) -> Dict:
+        """📥 `usecols` + `dtype` para `pd.read_csv` / `pd.read_excel`"""
+        return {'usecols': list(self.usecols), 'dtype': {column: 'category' for column in self.category_columns}}
+
+    def to_dict(self) -> Dict:
+        """🔑 Representación estable (forma parte de la clave de la caché de ingesta)"""
+        return {
+            'usecols': list(self.usecols), 'category_columns': list(self.category_columns),
+            'pnl_column': self.pnl_column, 'time_column': self.time_column, 'time_format': self.time_format
+        }
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """🧱 Proyectar y convertir un DataFrame ya leído (idempotente)"""
+        columns = [column for column in self.usecols if column in df.columns]
+        if len(columns) < len(df.columns):
+            df = df[columns]
+        converted = {}
+
+        for column in self.category_columns:
+            if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+                converted[column] = df[column].astype('category')
+
+        pnl = self.pnl_column
+        if pnl in df.columns and df[pnl].dtype != np.float64:
+            converted[pnl] = pd.to_numeric(df[pnl], errors='coerce').astype(np.float64)
+
+        time_col = self.time_column
+        if time_col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[time_col]):
+            converted[time_col] = _parse_with_format(df[time_col], self.time_format)
+
+        return df.assign(**converted) if converted else df
+
+
+def _parse_with_format(values: pd.Series, time_format: Optional[str]) -> pd.Series:
+    """🕒 Fechas con formato fijo; si alguna no encaja, parseo general (misma salida que antes)"""
+    if time_format is not None:
+        parsed = pd.to_datetime(values, format=time_format, errors='coerce')
+        if parsed.isna().sum() == values.isna().sum():
+            return parsed
+    return parse_timestamps(values)
+
+
+def infer_time_format(values: pd.Series) -> Optional[str]:
+    """🔬 Formato strftime común a toda la muestra (None si no hay uno)"""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return None
+    sample = values.dropna()
+    sample = sample[sample.map(lambda value: isinstance(value, str))]
+    if len(sample) == 0:
+        return None
+
+    time_format = guess_datetime_format(str(sample.iloc[0]))
+    if time_format is None:
+        return None
+    try:
+        pd.to_datetime(sample, format=time_format)
+    except (ValueError, TypeError):
+        return None
+    return time_format
+
+
+def plan_dtypes(sample: pd.DataFrame) -> Optional[DtypePlan]:
+    """🧱 Plan a partir de las primeras filas; None si la hoja no tiene columna de PnL (se carga tal cual)"""
+    mapping = detect_columns(sample)
+    if mapping.pnl is None:
+        return None
+
+    category_columns = []
+    for column in (mapping.type, mapping.symbol, mapping.side):
+        if column is None:
+            continue
+        values = sample[column].dropna()
+        is_text = values.map(lambda value: isinstance(value, str)).all() if len(values) else False
+        if is_text and values.nunique() <= max(1, len(values) * CATEGORY_MAX_RATIO):
+            category_columns.append(column)
+
+    return DtypePlan(
+        usecols=[column for column in sample.columns if column in set(mapping.usecols)],
+        category_columns=category_columns,
+        pnl_column=mapping.pnl,
+        time_column=mapping.time,
+        time_format=infer_time_format(sample[mapping.time]) if mapping.time is not None else None
+    )
+
+
+def plan_and_apply(df: pd.DataFrame) -> pd.DataFrame:
+    """🧱 Planificar con la cabecera del propio DataFrame y aplicar (hojas ya parseadas)"""
+    plan = plan_dtypes(df.head(SAMPLE_ROWS))
+    return plan.apply(df) if plan is not None else df
+
+
+def sheet_memory(df: pd.DataFrame) -> Dict:
+    """📏 Memoria real (deep) de una hoja y de cada columna"""
+    usage = df.memory_usage(deep=True, index=True)
+    total = int(usage.sum())
+    return {
+        'rows': len(df),
+        'bytes': total,
+        'bytes_per_row': (total / len(df)) if len(df) else 0.0,
+        'columns': {str(column): int(usage[column]) for column in df.columns},
+        'dtypes': {str(column): str(dtype) for column, dtype in df.dtypes.items()}
+    }
+
+
+def memory_report(sheets: Mapping[str, pd.DataFrame]) -> Dict[str, Dict]:
+    """📊 `sheet_memory` de cada hoja en memoria"""
+    return {name: sheet_memory(df) for name, df in sheets.items() if isinstance(df, pd.DataFrame)}
@@ -0,0 +1,168 @@
+"""
+📗 Trading Analyzer Pro - Excel Reader Backends
+Lectores de Excel intercambiables (calamine nativo, openpyxl, xlrd) con selección automática
+"""
+
+import importlib.util
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+EXCEL_ENGINE_ENV = 'TRADING_ANALYZER_EXCEL_ENGINE'
+AUTO_ENGINE = 'auto'
+
+# 📏 Por encima de este tamaño calamine tendría el archivo comprimido y la hoja decodificada
+# enteros en memoria a la vez; openpyxl (que pandas abre en modo read-only) va leyendo el zip fila a fila
+FAST_READER_MAX_BYTES = 512 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class ExcelBackend:
+    """📗 Motor de pandas para leer Excel y los formatos que entiende"""
+
+    name: str
+    module: str                                  # 📦 Paquete que tiene que estar instalado
+    extensions: Tuple[str, ...]
+    engine_kwargs: Dict = field(default_factory=dict)
+
+    @property
+    def available(self) -> bool:
+        return importlib.util.find_spec(self.module) is not None
+
+    def read_options(self) -> Dict:
+        """📥 `engine` (+ `engine_kwargs`) para `pd.read_excel` / `pd.ExcelFile`"""
+        options = {'engine': self.name}
+        if self.engine_kwargs:
+            options['engine_kwargs'] = dict(self.engine_kwargs)
+        return options
+
+
+EXCEL_BACKENDS = {}
+
+
+def register_excel_backend(backend: ExcelBackend) -> ExcelBackend:
+    """➕ Añadir (o sustituir) un motor de lectura"""
+    EXCEL_BACKENDS[backend.name] = backend
+    return backend
+
+
+register_excel_backend(ExcelBackend(
+    name='calamine', module='python_calamine', extensions=('.xlsx', '.xlsm', '.xlsb', '.xls', '.ods')
+))
+# pandas ya abre openpyxl con read_only / data_only / keep_links=False: no hacen falta engine_kwargs
+register_excel_backend(ExcelBackend(name='openpyxl', module='openpyxl', extensions=('.xlsx', '.xlsm')))
+register_excel_backend(ExcelBackend(name='xlrd', module='xlrd', extensions=('.xls',)))
+
+
+def _source_size(source) -> Optional[int]:
+    """📏 Tamaño en bytes de un upload, archivo abierto o ruta (None si no se puede saber)"""
+    size = getattr(source, 'size', None)
+    if size is not None:
+        return size
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    if hasattr(source, 'seek') and hasattr(source, 'tell'):
+        position = source.tell()
+        size = source.seek(0, os.SEEK_END)
+        source.seek(position)
+        return size
+    return None
+
+
+def _source_extension(source) -> str:
+    name = source if isinstance(source, (str, os.PathLike)) else getattr(source, 'name', '')
+    return os.path.splitext(str(name))[1].lower()
+
+
+def select_excel_engines(source, engine: Optional[str] = None) -> List[str]:
+    """🎯 Motores a probar en orden (el primero es el elegido, el resto son el respaldo)
+
+    Sin `engine` (ni `TRADING_ANALYZER_EXCEL_ENGINE`) se elige por formato y
+    tamaño: calamine para .xlsx/.xlsm/.xlsb si está instalado y el archivo no
+    es enorme, openpyxl en otro caso, y xlrd para .xls antiguos.
+    """
+    engine = engine or os.environ.get(EXCEL_ENGINE_ENV) or AUTO_ENGINE
+    extension = _source_extension(source)
+
+    if engine != AUTO_ENGINE:
+        if engine not in EXCEL_BACKENDS:
+            raise ValueError(f"Motor de Excel desconocido: {engine} (disponibles: {', '.join(EXCEL_BACKENDS)})")
+        preferred = [engine]
+    elif extension == '.xls':
+        preferred = ['xlrd', 'calamine']
+    else:
+        size = _source_size(source)
+        preferred = ['calamine', 'openpyxl']
+        if size is not None and size > FAST_READER_MAX_BYTES:
+            preferred = ['openpyxl', 'calamine']
+
+    # 🔁 Respaldo: el resto de motores que entienden la extensión
+    fallback = [name for name, backend in EXCEL_BACKENDS.items() if extension in backend.extensions]
+    engines = list(dict.fromkeys(preferred + fallback))
+    return [name for name in engines if EXCEL_BACKENDS[name].available and
+            (not extension or extension in EXCEL_BACKENDS[name].extensions or name == engine)]
+
+
+def _with_fallback(source, engine: Optional[str], read):
+    """🔁 `read(backend)` con cada motor hasta que uno funcione; devuelve (resultado, motor)"""
+    engines = select_excel_engines(source, engine)
+    if not engines:
+        raise ImportError(f"No hay ningún motor de Excel instalado para {_source_extension(source) or 'este archivo'}")
+
+    first_error = None
+    for name in engines:
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        try:
+            return read(EXCEL_BACKENDS[name]), name
+        except Exception as e:
+            first_error = first_error or e
+    raise first_error
+
+
+def read_excel_sheets(source, sheet_name=None, engine: Optional[str] = None, **read_options):
+    """📚 `pd.read_excel` con el motor elegido; devuelve (hojas, nombre del motor)"""
+    return _with_fallback(
+        source, engine,
+        lambda backend: pd.read_excel(source, sheet_name=sheet_name, **backend.read_options(), **read_options)
+    )
+
+
+def open_excel_file(source, engine: Optional[str] = None) -> Tuple[pd.ExcelFile, str]:
+    """📂 `pd.ExcelFile` con el motor elegido (para parsear hojas bajo demanda)"""
+    return _with_fallback(source, engine, lambda backend: pd.ExcelFile(source, **backend.read_options()))
+
+
+def compare_engines(source, engines: Optional[List[str]] = None) -> Dict[str, Dict]:
+    """🔬 Leer el libro con cada motor disponible: tiempo y si las hojas son idénticas a las del primero
+
+    Por defecto el primero es openpyxl (o xlrd para .xls), la referencia
+    de siempre de pandas.
+    """
+    extension = _source_extension(source)
+    engines = engines or sorted(
+        (name for name, backend in EXCEL_BACKENDS.items() if backend.available and extension in backend.extensions),
+        key=lambda name: name not in ('openpyxl', 'xlrd')
+    )
+    results, reference = {}, None
+    for name in engines:
+        started = time.perf_counter()
+        sheets, used = read_excel_sheets(source, engine=name)
+        seconds = time.perf_counter() - started
+        reference = sheets if reference is None else reference
+
+        mismatches = [f"{name} falló, se leyó con {used}"] if used != name else []
+        mismatches += [f"{sheet}: falta la hoja" for sheet in reference if sheet not in sheets]
+        for sheet, df in reference.items():
+            if sheet not in sheets:
+                continue
+            try:
+                pd.testing.assert_frame_equal(df, sheets[sheet])
+            except AssertionError as e:
+                mismatches.append(f"{sheet}: {str(e).splitlines()[0]}")
+        results[name] = {'seconds': seconds, 'sheets': len(sheets), 'identical': not mismatches,
+                         'mismatches': mismatches}
+    return results
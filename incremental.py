@@ -0,0 +1,245 @@
+"""
+🔁 Trading Analyzer Pro - Incremental Analysis
+Estado persistente por hoja (agregados + marca de agua) para procesar solo filas nuevas
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from aggregates import PnLAggregate
+from column_detection import detect_time_column, parse_timestamps
+
+STATE_DIR_ENV = 'TRADING_ANALYZER_STATE_DIR'
+
+
+@dataclass
+class SheetState:
+    """🔁 Lo que se recuerda de una hoja entre exportaciones
+
+    La marca de agua es la fecha más reciente ya procesada (y cuántas filas
+    tenían exactamente esa fecha, para no duplicar empates). Si la hoja no
+    tiene columna de fecha interpretable se usa la posición de fila: la
+    exportación nueva debe entonces contener el histórico en el mismo orden.
+    """
+
+    aggregate: PnLAggregate = field(default_factory=PnLAggregate)
+    time_column: Optional[str] = None
+    watermark: Optional[str] = None      # 🕒 ISO 8601 de la última fecha procesada
+    rows_at_watermark: int = 0           # Filas ya vistas con fecha == watermark
+    rows_seen: int = 0                   # 📏 Filas crudas procesadas en total
+
+    def select_new_rows(self, df: pd.DataFrame) -> pd.DataFrame:
+        """✂️ Quedarse solo con las filas posteriores a la marca de agua"""
+        return NewRowSelector(self)(df)
+
+    def advance(self, new_rows: pd.DataFrame, aggregate: PnLAggregate):
+        """⏩ Incorporar el agregado de las filas nuevas y mover la marca de agua"""
+        self.aggregate.merge(aggregate)
+        self.rows_seen += len(new_rows)
+
+        if self.time_column is None or len(new_rows) == 0:
+            return self
+
+        timestamps = parse_timestamps(new_rows[self.time_column])
+        latest = timestamps.max()
+        latest_count = int((timestamps == latest).sum())
+
+        if self.watermark is not None and latest == pd.Timestamp(self.watermark):
+            self.rows_at_watermark += latest_count
+        else:
+            self.rows_at_watermark = latest_count
+        self.watermark = latest.isoformat()
+        return self
+
+    def to_dict(self) -> Dict:
+        return {
+            'aggregate': self.aggregate.to_dict(),
+            'time_column': self.time_column,
+            'watermark': self.watermark,
+            'rows_at_watermark': self.rows_at_watermark,
+            'rows_seen': self.rows_seen
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'SheetState':
+        return cls(
+            aggregate=PnLAggregate.from_dict(state['aggregate']),
+            time_column=state.get('time_column'),
+            watermark=state.get('watermark'),
+            rows_at_watermark=state.get('rows_at_watermark', 0),
+            rows_seen=state.get('rows_seen', 0)
+        )
+
+
+class UnparseableTimestamps(Exception):
+    """🕒 Un bloque posterior al primero trae fechas sin interpretar: hay que repetir la hoja por posición"""
+
+
+class NewRowSelector:
+    """✂️ Selecciona filas nuevas de una hoja entregada entera o en bloques consecutivos
+
+    El modo (fecha o posición) se decide con el primer bloque; los contadores de
+    posición y de empates se arrastran entre bloques. Si un bloque posterior
+    trae fechas sin interpretar (NaT), sus filas no se pueden comparar con la
+    marca de agua: se lanza `UnparseableTimestamps` para que la hoja se repita
+    con `use_time=False`, igual que si hubiera llegado entera.
+    """
+
+    def __init__(self, state: SheetState, use_time: Optional[bool] = None):
+        self.state = state
+        self.position = 0          # Filas crudas recorridas hasta ahora
+        self.ties_seen = 0         # Filas con fecha == watermark recorridas
+        self.use_time = use_time
+        if use_time is False:
+            state.time_column = None
+
+    def __call__(self, df: pd.DataFrame) -> pd.DataFrame:
+        state = self.state
+
+        if self.use_time is None:
+            time_col = state.time_column or detect_time_column(df)
+            self.use_time = (
+                time_col is not None
+                and not parse_timestamps(df[time_col]).isna().any()
+                # Un histórico que empezó por posición sigue por posición
+                and not (state.watermark is None and state.rows_seen > 0)
+            )
+            state.time_column = time_col if self.use_time else None
+
+        start = self.position
+        self.position += len(df)
+
+        if not self.use_time:
+            # Sin fechas completas: marca de agua por posición
+            return df.iloc[max(0, state.rows_seen - start):]
+
+        timestamps = parse_timestamps(df[state.time_column])
+        if timestamps.isna().any():
+            raise UnparseableTimestamps(
+                f"Fechas sin interpretar en '{state.time_column}' a partir de la fila {start + 1:,}"
+            )
+
+        if state.watermark is None:
+            return df
+
+        watermark = pd.Timestamp(state.watermark)
+        at_watermark = (timestamps == watermark).to_numpy()
+        # Las primeras `rows_at_watermark` filas empatadas ya se procesaron
+        tie_rank = self.ties_seen + np.cumsum(at_watermark)
+        self.ties_seen += int(at_watermark.sum())
+        new_ties = at_watermark & (tie_rank > state.rows_at_watermark)
+        return df[(timestamps > watermark).to_numpy() | new_ties]
+
+
+class IncrementalStateStore:
+    """🗃️ Estados por (cuenta, hoja) en disco: JSON + serie de PnL en float64 de solo-añadir"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+    def load(self, dataset: str, sheet_name: str) -> SheetState:
+        """📥 Estado guardado (o uno vacío si es la primera vez)
+
+        Las series se recortan a la longitud que registra el JSON: si un
+        guardado anterior se cortó tras añadir PnL pero antes de cambiar el
+        estado, esas filas se vuelven a procesar y no quedan duplicadas.
+        """
+        state = self._read_state(dataset, sheet_name)
+        # Sin estado no hay nada confirmado; un estado antiguo sin `series_rows` no se recorta
+        self._truncate_series(dataset, sheet_name, state.get('series_rows') if state else 0)
+        try:
+            return SheetState.from_dict(state) if state else SheetState()
+        except KeyError:
+            return SheetState()
+
+    def save(self, dataset: str, sheet_name: str, state: SheetState, new_pnl_values: np.ndarray,
+             new_pnl_times: Optional[np.ndarray] = None):
+        """💾 Añadir los PnL nuevos (y sus fechas) a la serie y guardar el estado
+
+        El JSON (que se sustituye de forma atómica) registra cuántas filas de la
+        serie cubre; es lo último que se escribe, así confirma el guardado.
+        """
+        saved = self._read_state(dataset, sheet_name)
+        series_rows = saved.get('series_rows') if saved else 0
+        if series_rows is None:
+            pnl_path = self._path(dataset, sheet_name, '.pnl.f64')
+            series_rows = os.path.getsize(pnl_path) // 8 if os.path.exists(pnl_path) else 0
+        self._truncate_series(dataset, sheet_name, series_rows)
+        if len(new_pnl_values) > 0:
+            with open(self._path(dataset, sheet_name, '.pnl.f64'), 'ab') as handle:
+                np.ascontiguousarray(new_pnl_values, dtype=np.float64).tofile(handle)
+            if new_pnl_times is not None and len(new_pnl_times) == len(new_pnl_values):
+                with open(self._path(dataset, sheet_name, '.time.i64'), 'ab') as handle:
+                    np.ascontiguousarray(new_pnl_times, dtype='datetime64[ns]').view(np.int64).tofile(handle)
+
+        json_path = self._path(dataset, sheet_name, '.json')
+        tmp_path = f"{json_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as handle:
+            json.dump({**state.to_dict(), 'series_rows': series_rows + len(new_pnl_values)}, handle)
+        os.replace(tmp_path, json_path)
+        return self
+
+    def _read_state(self, dataset: str, sheet_name: str) -> Optional[Dict]:
+        try:
+            with open(self._path(dataset, sheet_name, '.json'), 'r', encoding='utf-8') as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return None
+
+    def _truncate_series(self, dataset: str, sheet_name: str, rows: Optional[int]):
+        """✂️ Quitar de las series lo añadido después del último estado confirmado"""
+        if rows is None:
+            return
+        for suffix in ('.pnl.f64', '.time.i64'):
+            path = self._path(dataset, sheet_name, suffix)
+            if os.path.exists(path) and os.path.getsize(path) > rows * 8:
+                os.truncate(path, rows * 8)
+
+    def load_pnl_values(self, dataset: str, sheet_name: str) -> np.ndarray:
+        """📈 Serie completa de PnL acumulada (memory-mapped, sin copiar)"""
+        path = self._path(dataset, sheet_name, '.pnl.f64')
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return np.empty(0, dtype=np.float64)
+        return np.memmap(path, dtype=np.float64, mode='r')
+
+    def load_pnl_times(self, dataset: str, sheet_name: str) -> np.ndarray:
+        """🕒 Fechas de la serie de PnL (vacío si alguna exportación no tenía fecha)"""
+        path = self._path(dataset, sheet_name, '.time.i64')
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return np.empty(0, dtype='datetime64[ns]')
+        times = np.fromfile(path, dtype=np.int64).view('datetime64[ns]')
+        return times if len(times) == len(self.load_pnl_values(dataset, sheet_name)) else np.empty(0, dtype='datetime64[ns]')
+
+    def reset(self, dataset: str, sheet_name: Optional[str] = None):
+        """🧹 Olvidar el histórico de una hoja (o de toda la cuenta)"""
+        prefix = self._dataset_prefix(dataset)
+        for file_name in os.listdir(self.directory):
+            if not file_name.startswith(prefix):
+                continue
+            if sheet_name is not None and not file_name.startswith(self._file_stem(dataset, sheet_name)):
+                continue
+            os.remove(os.path.join(self.directory, file_name))
+        return self
+
+    def _dataset_prefix(self, dataset: str) -> str:
+        return hashlib.sha256(dataset.encode('utf-8')).hexdigest()[:16]
+
+    def _file_stem(self, dataset: str, sheet_name: str) -> str:
+        sheet_hash = hashlib.sha256(sheet_name.encode('utf-8')).hexdigest()[:16]
+        return f"{self._dataset_prefix(dataset)}_{sheet_hash}"
+
+    def _path(self, dataset: str, sheet_name: str, suffix: str) -> str:
+        return os.path.join(self.directory, self._file_stem(dataset, sheet_name) + suffix)
+
+
+def get_default_state_store() -> Optional[IncrementalStateStore]:
+    """🌐 Almacén de estados si `TRADING_ANALYZER_STATE_DIR` está definido"""
+    directory = os.environ.get(STATE_DIR_ENV)
+    return IncrementalStateStore(directory) if directory else None
@@ -0,0 +1,253 @@
+"""
+💾 Trading Analyzer Pro - Ingestion Cache
+Caché de hojas parseadas indexada por hash del contenido del archivo
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+# 📏 Presupuesto por defecto de memoria y disco (MB) y directorio opcional en disco
+DEFAULT_CACHE_MB = 512
+DEFAULT_DISK_CACHE_MB = 4096
+CACHE_MB_ENV = 'TRADING_ANALYZER_CACHE_MB'
+CACHE_DIR_ENV = 'TRADING_ANALYZER_CACHE_DIR'
+CACHE_DISK_MB_ENV = 'TRADING_ANALYZER_CACHE_DISK_MB'
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def hash_file_content(uploaded_file) -> str:
+    """🔑 Hash SHA-256 del contenido de un archivo subido (o ruta local)"""
+    digest = hashlib.sha256()
+
+    if isinstance(uploaded_file, (str, os.PathLike)):
+        with open(uploaded_file, 'rb') as handle:
+            for block in iter(lambda: handle.read(_HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    # UploadedFile de Streamlit (BytesIO) o cualquier objeto tipo archivo
+    position = uploaded_file.tell() if hasattr(uploaded_file, 'tell') else 0
+    uploaded_file.seek(0)
+    for block in iter(lambda: uploaded_file.read(_HASH_BLOCK_SIZE), b''):
+        digest.update(block)
+    uploaded_file.seek(position)
+    return digest.hexdigest()
+
+
+def make_cache_key(file_hash: str, options: Dict) -> str:
+    """🧩 Clave de caché: hash del archivo + opciones de parseo canonicalizadas"""
+    options_blob = json.dumps(options, sort_keys=True, default=str)
+    options_hash = hashlib.sha256(options_blob.encode('utf-8')).hexdigest()[:16]
+    return f"{file_hash}:{options_hash}"
+
+
+def estimate_sheets_bytes(sheets: Dict[str, pd.DataFrame]) -> int:
+    """📏 Bytes aproximados que ocupan las hojas en memoria"""
+    return int(sum(df.memory_usage(deep=True).sum() for df in sheets.values()))
+
+
+class IngestionCache:
+    """💾 Caché LRU de hojas parseadas con presupuesto de bytes y copia opcional en disco
+
+    La copia en disco también tiene presupuesto (`disk_max_bytes`): al escribir
+    se borran las entradas menos usadas por fecha de modificación, que se
+    actualiza en cada lectura. Las entradas son pickles y se deserializan al
+    leerlas, así que `disk_dir` debe ser un directorio de confianza al que solo
+    escriba esta aplicación (un pickle manipulado ejecuta código).
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_MB * 1024 * 1024, disk_dir: Optional[str] = None,
+                 disk_max_bytes: int = DEFAULT_DISK_CACHE_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()  # clave -> (hojas, bytes)
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    def get(self, key: str) -> Optional[Dict[str, pd.DataFrame]]:
+        """🔍 Buscar hojas en memoria y, si no están, en disco"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry[0])
+
+        sheets = self._read_disk(key)
+        if sheets is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.disk_hits += 1
+            self._store_in_memory(key, sheets)
+        return dict(sheets)
+
+    def put(self, key: str, sheets: Dict[str, pd.DataFrame]):
+        """💾 Guardar hojas parseadas en memoria (LRU) y en disco si está configurado"""
+        with self._lock:
+            self._store_in_memory(key, sheets)
+        self._write_disk(key, sheets)
+        return self
+
+    def get_or_load(self, key: str, loader) -> Dict[str, pd.DataFrame]:
+        """⚡ Devolver hojas cacheadas o parsearlas con `loader()` y guardarlas"""
+        sheets = self.get(key)
+        if sheets is None:
+            sheets = loader()
+            self.put(key, sheets)
+        return sheets
+
+    def clear(self, include_disk: bool = False):
+        """🧹 Vaciar la caché en memoria (y opcionalmente en disco)"""
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+
+        if include_disk and self.disk_dir:
+            for file_name in os.listdir(self.disk_dir):
+                if file_name.endswith('.pkl'):
+                    os.remove(os.path.join(self.disk_dir, file_name))
+        return self
+
+    def get_stats(self) -> Dict:
+        """📋 Estadísticas de uso de la caché"""
+        disk_bytes = sum(size for _, size, _ in self._disk_entries()) if self.disk_dir else 0
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'disk_dir': self.disk_dir,
+                'disk_bytes': disk_bytes,
+                'disk_max_bytes': self.disk_max_bytes
+            }
+
+    def _store_in_memory(self, key: str, sheets: Dict[str, pd.DataFrame]):
+        """🧠 Insertar entrada y desalojar las menos usadas hasta cumplir el presupuesto"""
+        size = estimate_sheets_bytes(sheets)
+
+        if key in self._entries:
+            self._current_bytes -= self._entries.pop(key)[1]
+
+        # Una entrada mayor que todo el presupuesto solo vive en disco
+        if size > self.max_bytes:
+            return
+
+        self._entries[key] = (dict(sheets), size)
+        self._current_bytes += size
+
+        while self._current_bytes > self.max_bytes and self._entries:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._current_bytes -= evicted_size
+
+    def _disk_path(self, key: str) -> str:
+        file_name = hashlib.sha256(key.encode('utf-8')).hexdigest() + '.pkl'
+        return os.path.join(self.disk_dir, file_name)
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, pd.DataFrame]]:
+        if not self.disk_dir:
+            return None
+
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, 'rb') as handle:
+                sheets = pickle.load(handle)
+            os.utime(path)  # 🕒 Marcar como usado recientemente para el LRU en disco
+            return sheets
+        except Exception:
+            # Archivo corrupto o de otra versión: se ignora y se re-parsea
+            return None
+
+    def _write_disk(self, key: str, sheets: Dict[str, pd.DataFrame]):
+        if not self.disk_dir:
+            return
+
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as handle:
+                pickle.dump(sheets, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            # Una entrada mayor que todo el presupuesto de disco solo vive en memoria
+            if os.path.getsize(tmp_path) > self.disk_max_bytes:
+                os.remove(tmp_path)
+                return
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self.evict_disk()
+
+    def evict_disk(self):
+        """🧹 Borrar las entradas en disco menos usadas hasta cumplir `disk_max_bytes`"""
+        if not self.disk_dir:
+            return self
+        with self._disk_lock:
+            entries = sorted(self._disk_entries())
+            total_bytes = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total_bytes <= self.disk_max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total_bytes -= size
+        return self
+
+    def _disk_entries(self) -> List[Tuple[float, int, str]]:
+        """📋 (fecha de modificación, bytes, ruta) de cada entrada en disco"""
+        entries = []
+        for file_name in os.listdir(self.disk_dir):
+            if file_name.endswith('.pkl'):
+                path = os.path.join(self.disk_dir, file_name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> IngestionCache:
+    """🌐 Caché compartida por todas las sesiones del proceso (configurable por entorno)"""
+    global _default_cache
+
+    with _default_cache_lock:
+        if _default_cache is None:
+            max_mb = float(os.environ.get(CACHE_MB_ENV, DEFAULT_CACHE_MB))
+            disk_max_mb = float(os.environ.get(CACHE_DISK_MB_ENV, DEFAULT_DISK_CACHE_MB))
+            _default_cache = IngestionCache(
+                max_bytes=int(max_mb * 1024 * 1024),
+                disk_dir=os.environ.get(CACHE_DIR_ENV) or None,
+                disk_max_bytes=int(disk_max_mb * 1024 * 1024)
+            )
+        return _default_cache
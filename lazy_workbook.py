@@ -0,0 +1,109 @@
+"""
+📚 Trading Analyzer Pro - Lazy Workbook
+Libro de Excel que solo parsea una hoja cuando se accede a ella
+"""
+
+import threading
+from collections.abc import Mapping
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from ingest_cache import IngestionCache, make_cache_key
+from columnar_cache import ColumnarSidecarStore
+from dtype_planner import plan_and_apply
+from excel_readers import open_excel_file
+
+
+class LazyWorkbook(Mapping):
+    """📚 Mapping nombre de hoja -> DataFrame que parsea bajo demanda
+
+    Al abrirse solo lee los nombres de las hojas (suficiente para la UI de
+    filtros). Cada hoja se parsea la primera vez que se accede a ella, de modo
+    que `SheetFilter.filter_sheets` únicamente materializa las hojas
+    seleccionadas.
+    """
+
+    def __init__(self, source, file_hash: Optional[str] = None,
+                 cache: Optional[IngestionCache] = None, read_options: Optional[Dict] = None,
+                 sidecar: Optional[ColumnarSidecarStore] = None, plan_dtypes: bool = False,
+                 engine: Optional[str] = None):
+        self._excel, self.engine = open_excel_file(source, engine)  # 📗 Motor elegido (calamine / openpyxl / xlrd)
+        self.sheet_names = list(self._excel.sheet_names)
+        self.file_hash = file_hash
+        self.cache = cache
+        self.read_options = read_options or {}
+        self.sidecar = sidecar if file_hash is not None else None
+        self.plan_dtypes = plan_dtypes  # 🧱 Proyectar columnas / categóricas / fechas al parsear
+        self._parsed = {}
+        self._lock = threading.Lock()
+
+        if self.sidecar is not None and self.sidecar.get_sheet_names(file_hash) is None:
+            self.sidecar.register_workbook(file_hash, self.sheet_names)
+
+    def __getitem__(self, sheet_name: str) -> pd.DataFrame:
+        if sheet_name not in self.sheet_names:
+            raise KeyError(sheet_name)
+
+        with self._lock:
+            if sheet_name not in self._parsed:
+                self._parsed[sheet_name] = self._load_sheet(sheet_name)
+            return self._parsed[sheet_name]
+
+    def __iter__(self):
+        return iter(self.sheet_names)
+
+    def __len__(self) -> int:
+        return len(self.sheet_names)
+
+    def __contains__(self, sheet_name) -> bool:
+        return sheet_name in self.sheet_names
+
+    @property
+    def loaded_sheets(self) -> List[str]:
+        """📋 Hojas ya parseadas hasta el momento"""
+        return [name for name in self.sheet_names if name in self._parsed]
+
+    def load_sheet(self, sheet_name: str, row_filter=None) -> pd.DataFrame:
+        """🔎 Hoja con un `RowFilter` aplicado
+
+        Si la hoja aún no está en memoria y tiene sidecar columnar, se filtra la
+        tabla Arrow memory-mapped y las filas descartadas nunca llegan a pandas.
+        """
+        if row_filter is None:
+            return self[sheet_name]
+        if sheet_name not in self.sheet_names:
+            raise KeyError(sheet_name)
+
+        with self._lock:
+            parsed = self._parsed.get(sheet_name)
+        if parsed is None and self.sidecar is not None:
+            df = self.sidecar.get_sheet(self.file_hash, sheet_name, row_filter=row_filter)
+            if df is not None:
+                return row_filter.apply(self._plan(df))
+        return row_filter.apply(self[sheet_name])
+
+    def close(self):
+        """🔒 Liberar el archivo subyacente"""
+        self._excel.close()
+
+    def _load_sheet(self, sheet_name: str) -> pd.DataFrame:
+        """📄 Parsear una sola hoja (caché de ingesta -> sidecar columnar -> Excel)"""
+        def parse():
+            if self.sidecar is not None:
+                df = self.sidecar.get_sheet(self.file_hash, sheet_name)
+                if df is None:
+                    df = self._excel.parse(sheet_name, **self.read_options)
+                    self.sidecar.put_sheet(self.file_hash, sheet_name, df)  # El sidecar guarda la hoja completa
+                return {sheet_name: self._plan(df)}
+            return {sheet_name: self._plan(self._excel.parse(sheet_name, **self.read_options))}
+
+        if self.cache is None or self.file_hash is None:
+            return parse()[sheet_name]
+
+        options = {'reader': 'excel', 'sheet_name': sheet_name, 'plan_dtypes': self.plan_dtypes, **self.read_options}
+        key = make_cache_key(self.file_hash, options)
+        return self.cache.get_or_load(key, parse)[sheet_name]
+
+    def _plan(self, df: pd.DataFrame) -> pd.DataFrame:
+        return plan_and_apply(df) if self.plan_dtypes else df
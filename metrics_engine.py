@@ -0,0 +1,189 @@
+"""
+📉 Trading Analyzer Pro - Time-Series Metrics Engine
+Curva de equity, drawdown, rachas, ratios tipo Sharpe/Sortino y win rate móvil en pasadas O(n) de NumPy
+"""
+
+from functools import cached_property
+from typing import Dict, Optional
+
+import numpy as np
+
+DAYS_PER_YEAR = 365  # 🌐 Cripto cotiza todos los días
+
+
+def _run_lengths(values: np.ndarray):
+    """🔁 Codificación run-length: (inicio, longitud, valor) de cada racha de valores iguales"""
+    if len(values) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, values[:0]
+    starts = np.concatenate(([0], np.flatnonzero(values[1:] != values[:-1]) + 1))
+    lengths = np.diff(np.concatenate((starts, [len(values)])))
+    return starts, lengths, values[starts]
+
+
+class SeriesMetrics:
+    """📉 Métricas de la serie de PnL de una hoja, ya ordenada cronológicamente
+
+    Las series base (equity, máximo acumulado, drawdown, wins acumulados) se
+    calculan una sola vez; `summary` se memoriza y el win rate móvil de cada
+    ventana sale de una resta sobre los wins acumulados, así cambiar la
+    ventana no recalcula nada más.
+    """
+
+    def __init__(self, pnl_values: np.ndarray, pnl_times: Optional[np.ndarray] = None):
+        self.pnl = np.ascontiguousarray(pnl_values, dtype=np.float64)
+        times = None
+        if pnl_times is not None and len(pnl_times) == len(self.pnl) and len(self.pnl) > 0:
+            times = np.asarray(pnl_times, dtype='datetime64[ns]')
+        self.times = times
+        self._rolling_cache = {}
+
+    def __len__(self) -> int:
+        return len(self.pnl)
+
+    # 📈 Series base
+    @cached_property
+    def equity(self) -> np.ndarray:
+        """📈 PnL acumulado trade a trade"""
+        return np.cumsum(self.pnl)
+
+    @cached_property
+    def running_peak(self) -> np.ndarray:
+        """⛰️ Máximo de la equity hasta cada trade (partiendo de 0)"""
+        return np.maximum(np.maximum.accumulate(self.equity), 0.0) if len(self.pnl) else self.equity
+
+    @cached_property
+    def drawdown(self) -> np.ndarray:
+        """📉 Distancia (<= 0) de la equity a su máximo previo"""
+        return self.equity - self.running_peak
+
+    @cached_property
+    def _wins_cumsum(self) -> np.ndarray:
+        return np.concatenate(([0], np.cumsum(self.pnl > 0)))
+
+    # 📋 Resumen
+    @cached_property
+    def summary(self) -> Dict:
+        """📋 Todas las métricas escalares de la serie"""
+        n = len(self.pnl)
+        if n == 0:
+            return {'trades': 0}
+
+        summary = {'trades': n, 'final_equity': float(self.equity[-1]), 'peak_equity': float(self.running_peak[-1])}
+        summary.update(self._drawdown_stats())
+        summary.update(self._streak_stats())
+        summary.update(self._ratio_stats())
+        return summary
+
+    def rolling_win_rate(self, window: int) -> np.ndarray:
+        """🎯 Win rate (%) de los últimos `window` trades; NaN hasta completar la primera ventana"""
+        window = int(window)
+        if window <= 0:
+            raise ValueError("La ventana debe ser positiva")
+
+        if window not in self._rolling_cache:
+            rates = np.full(len(self.pnl), np.nan)
+            if window <= len(self.pnl):
+                wins = self._wins_cumsum
+                rates[window - 1:] = (wins[window:] - wins[:-window]) / window * 100
+            self._rolling_cache[window] = rates
+        return self._rolling_cache[window]
+
+    # 🔧 Cálculos
+    def _drawdown_stats(self) -> Dict:
+        drawdown = self.drawdown
+        trough = int(np.argmin(drawdown))
+        max_drawdown = float(-drawdown[trough])
+
+        # ⛰️ Pico previo al valle y recuperación posterior (primer trade de vuelta al pico)
+        at_peak = np.flatnonzero(drawdown[:trough + 1] == 0)
+        peak = int(at_peak[-1]) if len(at_peak) else -1
+        recovered = np.flatnonzero(drawdown[trough:] == 0)
+        recovery = trough + int(recovered[0]) if len(recovered) and max_drawdown > 0 else None
+
+        # 🌊 Racha más larga bajo el agua (trades consecutivos con drawdown < 0)
+        starts, lengths, underwater = _run_lengths(drawdown < 0)
+        underwater_lengths = lengths[underwater]
+        longest_index = int(np.argmax(np.where(underwater, lengths, -1))) if underwater.any() else None
+
+        stats = {
+            'max_drawdown': max_drawdown,
+            'max_drawdown_pct_of_peak': (max_drawdown / float(self.running_peak[trough]) * 100)
+                                        if self.running_peak[trough] > 0 else None,
+            'max_drawdown_trades': (trough - peak) if max_drawdown > 0 else 0,
+            'max_drawdown_recovery_trades': (recovery - trough) if recovery is not None else None,
+            'max_drawdown_recovered': recovery is not None or max_drawdown == 0,
+            'longest_underwater_trades': int(underwater_lengths.max()) if len(underwater_lengths) else 0
+        }
+
+        if self.times is not None:
+            start_time = self.times[peak] if peak >= 0 else self.times[0]
+            end_time = self.times[recovery] if recovery is not None else self.times[-1]
+            stats['max_drawdown_duration_days'] = self._days(end_time - start_time) if max_drawdown > 0 else 0.0
+            if longest_index is not None:
+                first = int(starts[longest_index])
+                last = first + int(lengths[longest_index])
+                before = self.times[first - 1] if first > 0 else self.times[first]
+                after = self.times[last] if last < len(self.times) else self.times[-1]
+                stats['longest_underwater_days'] = self._days(after - before)
+            else:
+                stats['longest_underwater_days'] = 0.0
+        return stats
+
+    def _streak_stats(self) -> Dict:
+        _, lengths, signs = _run_lengths(np.sign(self.pnl))
+        wins = lengths[signs > 0]
+        losses = lengths[signs < 0]
+        return {
+            'longest_win_streak': int(wins.max()) if len(wins) else 0,
+            'longest_loss_streak': int(losses.max()) if len(losses) else 0,
+            'current_streak': int(lengths[-1] * signs[-1])  # ➕ ganando / ➖ perdiendo
+        }
+
+    def _ratio_stats(self) -> Dict:
+        pnl = self.pnl
+        stats = {
+            'sharpe_per_trade': self._sharpe(pnl),
+            'sortino_per_trade': self._sortino(pnl),
+            'profit_factor': (float(pnl[pnl > 0].sum() / -pnl[pnl < 0].sum())) if (pnl < 0).any() else None
+        }
+
+        daily = self.daily_pnl
+        if daily is not None and len(daily) > 1:
+            annualization = np.sqrt(DAYS_PER_YEAR)
+            sharpe, sortino = self._sharpe(daily), self._sortino(daily)
+            stats['sharpe_annualized'] = float(sharpe * annualization) if sharpe is not None else None
+            stats['sortino_annualized'] = float(sortino * annualization) if sortino is not None else None
+        return stats
+
+    @cached_property
+    def daily_pnl(self) -> Optional[np.ndarray]:
+        """📅 PnL por día natural entre el primer y el último trade (días sin trades = 0)"""
+        if self.times is None:
+            return None
+        valid = ~np.isnat(self.times)
+        if not valid.any():
+            return None
+        days = self.times[valid].astype('datetime64[D]').astype(np.int64)
+        offsets = days - days.min()
+        return np.bincount(offsets, weights=self.pnl[valid], minlength=int(offsets.max()) + 1)
+
+    @staticmethod
+    def _sharpe(values: np.ndarray) -> Optional[float]:
+        if len(values) < 2:
+            return None
+        std = values.std(ddof=1)
+        return float(values.mean() / std) if std > 0 else None
+
+    @staticmethod
+    def _sortino(values: np.ndarray) -> Optional[float]:
+        if len(values) < 2:
+            return None
+        downside = np.sqrt(np.mean(np.minimum(values, 0.0) ** 2))
+        return float(values.mean() / downside) if downside > 0 else None
+
+    @staticmethod
+    def _days(delta: np.timedelta64) -> Optional[float]:
+        if np.isnat(delta):
+            return None
+        return float(delta / np.timedelta64(1, 'D'))
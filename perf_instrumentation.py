@@ -0,0 +1,181 @@
+"""
+⏱️ Trading Analyzer Pro - Performance Instrumentation
+Medición ligera por etapa y por hoja (tiempo, filas, bytes) exportable como JSON / líneas de log
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+PERF_ENV = 'TRADING_ANALYZER_PERF'
+PERF_MEMORY_ENV = 'TRADING_ANALYZER_PERF_MEMORY'
+PERF_LOGGER_NAME = 'trading_analyzer.perf'
+
+logger = logging.getLogger(PERF_LOGGER_NAME)
+
+
+class StageRecord:
+    """📏 Medición de una etapa; `rows` y `output_bytes` se pueden fijar dentro del bloque"""
+
+    __slots__ = ('stage', 'sheet', 'rows', 'output_bytes', 'seconds', 'alloc_bytes', 'started_at', 'extra')
+
+    def __init__(self, stage: str, sheet: Optional[str] = None, rows: Optional[int] = None):
+        self.stage = stage
+        self.sheet = sheet
+        self.rows = rows
+        self.output_bytes = None
+        self.seconds = None
+        self.alloc_bytes = None
+        self.started_at = None
+        self.extra = {}
+
+    def to_dict(self) -> Dict:
+        return {
+            'stage': self.stage,
+            'sheet': self.sheet,
+            'seconds': self.seconds,
+            'rows': self.rows,
+            'rows_per_second': (self.rows / self.seconds) if self.rows and self.seconds else None,
+            'alloc_bytes': self.alloc_bytes,
+            'output_bytes': self.output_bytes,
+            'started_at': self.started_at,
+            **self.extra
+        }
+
+
+class _NullRecord:
+    """🚫 Registro que ignora todo (instrumentación desactivada)"""
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        pass
+
+    @property
+    def extra(self) -> Dict:
+        return {}
+
+
+class _NullStage:
+    """🚫 Context manager reutilizable: sin relojes ni reservas de memoria"""
+
+    __slots__ = ()
+    _record = _NullRecord()
+
+    def __enter__(self):
+        return self._record
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class PerfRecorder:
+    """⏱️ Acumula mediciones por etapa; desactivado cuesta una llamada y un `if`
+
+    `alloc_bytes` (pico de memoria asignada con tracemalloc) solo se mide con
+    `track_memory=True`, porque tracemalloc ralentiza bastante. Las etapas
+    anidadas reinician el pico, así que la etapa externa lo infraestima.
+    """
+
+    def __init__(self, enabled: bool = False, track_memory: bool = False, log: bool = False):
+        self.enabled = enabled
+        self.track_memory = track_memory
+        self.log = log
+        self.records = []
+        self._lock = threading.RLock()
+
+    def stage(self, stage: str, sheet: Optional[str] = None, rows: Optional[int] = None):
+        """⏱️ `with recorder.stage('load_file') as record:` mide el bloque"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return self._measure(stage, sheet, rows)
+
+    @contextmanager
+    def _measure(self, stage: str, sheet: Optional[str], rows: Optional[int]):
+        record = StageRecord(stage, sheet=sheet, rows=rows)
+        record.started_at = time.time()
+
+        memory_start = None
+        if self.track_memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            memory_start = tracemalloc.get_traced_memory()[0]
+
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.seconds = time.perf_counter() - start
+            if memory_start is not None:
+                record.alloc_bytes = max(0, tracemalloc.get_traced_memory()[1] - memory_start)
+            self.add(record.to_dict())
+
+    def add(self, record: Dict):
+        """➕ Añadir una medición ya hecha (p. ej. devuelta por un proceso del pool)"""
+        with self._lock:
+            self.records.append(record)
+        if self.log:
+            logger.info(json.dumps(record, default=str))
+        return self
+
+    def extend(self, records: List[Dict]):
+        for record in records:
+            self.add(record)
+        return self
+
+    def start_memory_tracking(self):
+        """🧠 Activar tracemalloc si se pidió medir memoria"""
+        if self.enabled and self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        return self
+
+    def stop_memory_tracking(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        return self
+
+    def get_summary(self) -> List[Dict]:
+        """📋 Totales por etapa (tiempo, filas, llamadas)"""
+        summary = {}
+        with self._lock:
+            records = list(self.records)
+        for record in records:
+            entry = summary.setdefault(record['stage'], {'stage': record['stage'], 'calls': 0, 'seconds': 0.0, 'rows': 0})
+            entry['calls'] += 1
+            entry['seconds'] += record['seconds'] or 0.0
+            entry['rows'] += record['rows'] or 0
+        return list(summary.values())
+
+    def to_json(self) -> str:
+        """📤 Todas las mediciones como documento JSON"""
+        with self._lock:
+            return json.dumps({'records': self.records, 'summary': self.get_summary()}, default=str, indent=2)
+
+    def to_log_lines(self) -> str:
+        """📤 Una línea JSON por medición (formato para el stack de métricas)"""
+        with self._lock:
+            return '\n'.join(json.dumps(record, default=str) for record in self.records)
+
+
+NULL_RECORDER = PerfRecorder(enabled=False)
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, '').lower() in ('1', 'true', 'yes')
+
+
+def perf_enabled_from_env() -> bool:
+    """🌐 `TRADING_ANALYZER_PERF=1` activa la instrumentación (y las líneas de log)"""
+    return _env_flag(PERF_ENV)
+
+
+def perf_memory_from_env() -> bool:
+    """🧠 `TRADING_ANALYZER_PERF_MEMORY=1` mide también la memoria asignada por etapa (tracemalloc, más lento)"""
+    return _env_flag(PERF_MEMORY_ENV)
@@ -0,0 +1,113 @@
+"""
+♻️ Trading Analyzer Pro - Analysis Result Cache
+Resultados por hoja memorizados por (hash del archivo, hoja, filtro de filas, palabras clave no-trading)
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+DEFAULT_RESULT_CACHE_MB = 128
+RESULT_CACHE_MB_ENV = 'TRADING_ANALYZER_RESULT_CACHE_MB'
+
+# 📏 Bytes fijos por entrada además de las series (el objeto, sus dicts y la clave)
+ENTRY_OVERHEAD_BYTES = 2048
+
+
+def make_result_key(source_hash: str, sheet_name: str, row_filter_fingerprint: str,
+                    classifier_fingerprint: str) -> str:
+    """🧩 Clave de un resultado por hoja
+
+    La selección de hojas (auto-detectar, por tipo de cuenta, por números...)
+    no forma parte de la clave: solo decide qué hojas se piden, así volver a
+    un filtro ya usado reutiliza los resultados de cada hoja.
+    """
+    sheet_hash = hashlib.sha256(str(sheet_name).encode('utf-8')).hexdigest()[:16]
+    return f"{source_hash}:{sheet_hash}:{row_filter_fingerprint}:{classifier_fingerprint}"
+
+
+def estimate_result_bytes(value: Tuple) -> int:
+    """📏 Bytes aproximados de (resultado o None, operaciones excluidas, informe de duplicados)"""
+    result = value[0]
+    return ENTRY_OVERHEAD_BYTES + (result.nbytes if result is not None else 0)
+
+
+class ResultCache:
+    """♻️ Caché LRU de resultados por hoja con presupuesto de bytes
+
+    Los `SheetResult` guardados se comparten entre sesiones: la serie de PnL
+    no se modifica después de crearlos y sus métricas memorizadas son las
+    mismas para todos.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_RESULT_CACHE_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # clave -> ((resultado, excluidas, informe), bytes)
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Tuple]:
+        """🔍 (resultado o None, operaciones excluidas, informe de duplicados o None) si está memorizado"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, value: Tuple):
+        """💾 Guardar y desalojar los menos usados hasta cumplir el presupuesto"""
+        size = estimate_result_bytes(value)
+        with self._lock:
+            if key in self._entries:
+                self._current_bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return self
+
+            self._entries[key] = (value, size)
+            self._current_bytes += size
+            while self._current_bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._current_bytes -= evicted_size
+                self.evictions += 1
+        return self
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+        return self
+
+    def get_stats(self) -> Dict:
+        """📋 Estadísticas de uso"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+_default_result_cache = None
+_default_result_cache_lock = threading.Lock()
+
+
+def get_default_result_cache() -> ResultCache:
+    """🌐 Caché de resultados compartida por todas las sesiones del proceso"""
+    global _default_result_cache
+
+    with _default_result_cache_lock:
+        if _default_result_cache is None:
+            max_mb = float(os.environ.get(RESULT_CACHE_MB_ENV, DEFAULT_RESULT_CACHE_MB))
+            _default_result_cache = ResultCache(max_bytes=int(max_mb * 1024 * 1024))
+        return _default_result_cache
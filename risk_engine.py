@@ -0,0 +1,181 @@
+"""
+🎲 Trading Analyzer Pro - Bootstrap Risk Engine
+Intervalos de confianza de PnL y win rate y distribución del drawdown máximo remuestreando los trades (NumPy por bloques)
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+RISK_WORKERS_ENV = 'TRADING_ANALYZER_RISK_WORKERS'
+DEFAULT_RESAMPLES = 10_000
+DEFAULT_CONFIDENCE = 0.95
+PERCENTILES = (5, 25, 50, 75, 95)
+HISTOGRAM_BINS = 40
+RISK_METRICS = ('total_pnl', 'win_rate', 'max_drawdown')
+
+# 📏 Memoria de trabajo por bloque: índices (int32) + trades remuestreados + picos (float64) por remuestreo
+BLOCK_BYTES = 64 * 1024 * 1024
+_BYTES_PER_DRAW = 4 + 8 + 8
+
+# ⚙️ Por debajo de este nº de trades remuestreados arrancar procesos cuesta más que el cálculo
+PARALLEL_MIN_DRAWS = 20_000_000
+
+
+def default_risk_workers() -> int:
+    """⚙️ Procesos para la simulación (`TRADING_ANALYZER_RISK_WORKERS` o todos los núcleos)"""
+    return max(1, int(os.environ.get(RISK_WORKERS_ENV) or os.cpu_count() or 1))
+
+
+def resamples_per_block(trades: int, block_bytes: int = BLOCK_BYTES) -> int:
+    """📦 Remuestreos que caben en `block_bytes` para una serie de `trades` trades"""
+    return max(1, block_bytes // (max(1, trades) * _BYTES_PER_DRAW))
+
+
+def _simulate_block(pnl: np.ndarray, seed: np.random.SeedSequence, size: int) -> np.ndarray:
+    """🎲 `size` remuestreos con reemplazo: filas (PnL total, win rate %, drawdown máximo)
+
+    El drawdown se mide como en `SeriesMetrics`: distancia de la equity a su
+    máximo previo, partiendo de 0, sobre el orden remuestreado.
+    """
+    rng = np.random.default_rng(seed)
+    index_dtype = np.int32 if len(pnl) < 2 ** 31 else np.int64
+    samples = pnl[rng.integers(0, len(pnl), size=(size, len(pnl)), dtype=index_dtype)]
+
+    stats = np.empty((size, 3), dtype=np.float64)
+    stats[:, 1] = np.count_nonzero(samples > 0, axis=1) / len(pnl) * 100
+
+    equity = np.cumsum(samples, axis=1, out=samples)
+    stats[:, 0] = equity[:, -1]
+    peak = np.maximum.accumulate(equity, axis=1)
+    np.maximum(peak, 0.0, out=peak)
+    np.subtract(peak, equity, out=peak)
+    stats[:, 2] = peak.max(axis=1)
+    return stats
+
+
+# 🧵 Serie de PnL de cada proceso del pool (se envía una vez, no en cada bloque)
+_worker_pnl = None
+
+
+def _init_worker(pnl: np.ndarray):
+    global _worker_pnl
+    _worker_pnl = pnl
+
+
+def _simulate_block_worker(task: Tuple[np.random.SeedSequence, int]) -> np.ndarray:
+    """⚙️ Tarea para ProcessPoolExecutor: un bloque sobre la serie que recibió el proceso"""
+    seed, size = task
+    return _simulate_block(_worker_pnl, seed, size)
+
+
+@dataclass
+class RiskReport:
+    """🎲 Distribuciones remuestreadas de una serie de PnL y sus resúmenes para la UI"""
+
+    trades: int
+    resamples: int
+    seed: Optional[int]
+    confidence: float
+    observed: Dict[str, float]                  # 📌 Valores de la serie real
+    distributions: Dict[str, np.ndarray] = field(repr=False)
+    seconds: float = 0.0
+    workers: int = 1
+    block_size: int = 0
+
+    @property
+    def prob_loss(self) -> float:
+        """📉 Proporción de remuestreos con PnL total <= 0 (¿cuánto del resultado puede ser suerte?)"""
+        return float(np.mean(self.distributions['total_pnl'] <= 0))
+
+    def percentiles(self, metric: str, percentiles=PERCENTILES) -> Dict[int, float]:
+        values = np.percentile(self.distributions[metric], percentiles)
+        return {int(percentile): float(value) for percentile, value in zip(percentiles, values)}
+
+    def interval(self, metric: str) -> Tuple[float, float]:
+        """↔️ Intervalo de confianza por percentiles (p. ej. 2.5 % - 97.5 % con 0.95)"""
+        tail = (1 - self.confidence) / 2 * 100
+        low, high = np.percentile(self.distributions[metric], [tail, 100 - tail])
+        return float(low), float(high)
+
+    def histogram(self, metric: str, bins: int = HISTOGRAM_BINS) -> Tuple[np.ndarray, np.ndarray]:
+        """📊 (conteos, bordes) de la distribución"""
+        return np.histogram(self.distributions[metric], bins=bins)
+
+    def summary(self) -> Dict:
+        """📋 Resumen serializable (JSON): observado, intervalo y percentiles por métrica"""
+        summary = {
+            'trades': self.trades, 'resamples': self.resamples, 'seed': self.seed,
+            'confidence': self.confidence, 'prob_loss': self.prob_loss, 'seconds': self.seconds
+        }
+        for metric in RISK_METRICS:
+            summary[metric] = {
+                'observed': self.observed[metric],
+                'interval': list(self.interval(metric)),
+                'percentiles': self.percentiles(metric)
+            }
+        return summary
+
+
+def run_bootstrap(pnl_values: np.ndarray, resamples: int = DEFAULT_RESAMPLES, seed: Optional[int] = None,
+                  confidence: float = DEFAULT_CONFIDENCE, workers: Optional[int] = None,
+                  block_bytes: int = BLOCK_BYTES) -> RiskReport:
+    """🎲 Bootstrap de una serie de PnL (en orden cronológico) por bloques de memoria acotada
+
+    Cada bloque tiene su propia semilla derivada de `seed` (`SeedSequence.spawn`),
+    así el resultado es el mismo con 1 o N procesos. Con `workers > 1` y
+    trabajo suficiente los bloques se reparten en un pool de procesos.
+    """
+    pnl = np.ascontiguousarray(pnl_values, dtype=np.float64)
+    if len(pnl) == 0:
+        raise ValueError("La serie de PnL está vacía")
+    if resamples <= 0:
+        raise ValueError("El número de remuestreos debe ser positivo")
+
+    started = time.perf_counter()
+    block_size = resamples_per_block(len(pnl), block_bytes)
+    sizes = [min(block_size, resamples - start) for start in range(0, resamples, block_size)]
+    tasks = list(zip(np.random.SeedSequence(seed).spawn(len(sizes)), sizes))
+
+    workers = min(workers or default_risk_workers(), len(tasks))
+    if workers > 1 and resamples * len(pnl) >= PARALLEL_MIN_DRAWS:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(pnl,)) as pool:
+            blocks = list(pool.map(_simulate_block_worker, tasks))
+    else:
+        workers = 1
+        blocks = [_simulate_block(pnl, block_seed, size) for block_seed, size in tasks]
+    stats = np.concatenate(blocks)
+
+    equity = np.cumsum(pnl)
+    peak = np.maximum(np.maximum.accumulate(equity), 0.0)
+    return RiskReport(
+        trades=len(pnl),
+        resamples=resamples,
+        seed=seed,
+        confidence=confidence,
+        observed={
+            'total_pnl': float(equity[-1]),
+            'win_rate': float(np.count_nonzero(pnl > 0) / len(pnl) * 100),
+            'max_drawdown': float((peak - equity).max())
+        },
+        distributions={metric: stats[:, column] for column, metric in enumerate(RISK_METRICS)},
+        seconds=time.perf_counter() - started,
+        workers=workers,
+        block_size=block_size
+    )
+
+
+def analyze_risk(results: Dict, resamples: int = DEFAULT_RESAMPLES, seed: Optional[int] = None,
+                 sheets: Optional[List[str]] = None, **options) -> Dict[str, RiskReport]:
+    """🎲 `run_bootstrap` sobre la serie de PnL de cada hoja de `analyze_data` (las de 2+ trades)"""
+    reports = {}
+    for sheet_name, result in results.items():
+        if sheets is not None and sheet_name not in sheets:
+            continue
+        if len(result.pnl_values) > 1:
+            reports[sheet_name] = run_bootstrap(result.pnl_values, resamples=resamples, seed=seed, **options)
+    return reports
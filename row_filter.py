@@ -0,0 +1,294 @@
+"""
+🔎 Trading Analyzer Pro - Row Filter
+Predicados por fila (ventana de fechas, símbolos, |PnL| mínimo, lado) aplicables durante la carga
+"""
+
+import hashlib
+import json
+import re
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from column_detection import (
+    PNL_COLUMN_WORDS, TIME_COLUMN_WORDS, SYMBOL_COLUMN_WORDS, SIDE_COLUMN_WORDS, TRADE_ID_COLUMN_WORDS,
+    detect_pnl_column, detect_time_column, detect_symbol_column, detect_side_column, parse_timestamps
+)
+from transaction_classifier import POSSIBLE_TYPE_COLUMNS
+
+SIDES = ('long', 'short')
+
+_SYMBOL_SEPARATORS = re.compile(r'[^A-Z0-9]')
+
+
+def normalize_symbol(value) -> str:
+    """🪙 'btc-usdt', 'BTC/USDT' y 'BTCUSDT' se comparan igual"""
+    return _SYMBOL_SEPARATORS.sub('', str(value).upper())
+
+
+def normalize_side(value) -> Optional[str]:
+    """↕️ 'LONG', 'Open Long', 'BUY' -> 'long'; 'SHORT', 'SELL' -> 'short'"""
+    if not isinstance(value, str):
+        return None
+    value_lower = value.lower()
+    for side in SIDES:
+        if side in value_lower:
+            return side
+    if 'buy' in value_lower:
+        return 'long'
+    if 'sell' in value_lower:
+        return 'short'
+    return None
+
+
+class AnalysisColumns:
+    """📋 `usecols` para los lectores de pandas: solo columnas que el análisis puede usar
+
+    Es un objeto (y no una lambda) para que su representación sea estable y
+    pueda formar parte de la clave de la caché de ingesta.
+    """
+
+    _WORDS = (PNL_COLUMN_WORDS + TIME_COLUMN_WORDS + SYMBOL_COLUMN_WORDS + SIDE_COLUMN_WORDS
+              + TRADE_ID_COLUMN_WORDS + POSSIBLE_TYPE_COLUMNS)  # 🆔 El ID se conserva para deduplicar
+
+    def __call__(self, column) -> bool:
+        column_lower = str(column).lower()
+        return any(word in column_lower for word in self._WORDS)
+
+    def __repr__(self) -> str:
+        return 'AnalysisColumns()'
+
+    __str__ = __repr__
+
+    def select(self, columns: Iterable) -> List:
+        return [column for column in columns if self(column)]
+
+
+ANALYSIS_COLUMNS = AnalysisColumns()
+
+
+class RowFilter:
+    """🔎 Filtro de filas combinable y encadenable
+
+    Cada predicado usa la columna detectada por nombre; si una hoja no tiene
+    esa columna (p. ej. un ledger sin símbolo) el predicado no se aplica a
+    ella. Filas con fecha o PnL no interpretables quedan fuera cuando se
+    filtra por ese campo.
+    """
+
+    def __init__(self):
+        self.start = None             # 🕒 Inicio de la ventana (incluido)
+        self.end = None               # 🕒 Fin de la ventana (excluido)
+        self.symbols = set()          # 🪙 Símbolos normalizados
+        self.min_abs_pnl = None       # 💰 |PnL| mínimo
+        self.side = None              # ↕️ 'long' o 'short'
+        self.project_columns = False  # 📋 Leer solo las columnas del análisis
+
+    # 🔗 Configuración encadenable
+    def set_time_window(self, start=None, end=None):
+        """🕒 Ventana [start, end]; un `end` sin hora incluye el día completo"""
+        self.start = pd.Timestamp(start) if start is not None else None
+        if end is not None:
+            end = pd.Timestamp(end)
+            self.end = end + pd.Timedelta(days=1) if end == end.normalize() else end + pd.Timedelta(microseconds=1)
+        else:
+            self.end = None
+        return self
+
+    def add_symbols(self, symbols: Iterable[str]):
+        """🪙 Quedarse solo con estos símbolos"""
+        self.symbols.update(normalize_symbol(symbol) for symbol in symbols if str(symbol).strip())
+        return self
+
+    def set_min_abs_pnl(self, value: float):
+        """💰 Descartar filas con |PnL| por debajo de `value`"""
+        self.min_abs_pnl = float(value)
+        return self
+
+    def set_side(self, side: str):
+        """↕️ Solo 'long' o 'short'"""
+        side = side.lower()
+        if side not in SIDES:
+            raise ValueError(f"Lado no válido: {side!r} (usa 'long' o 'short')")
+        self.side = side
+        return self
+
+    def analysis_columns_only(self, enabled: bool = True):
+        """📋 Proyectar columnas al leer (CSV y sidecars columnares)"""
+        self.project_columns = enabled
+        return self
+
+    @property
+    def has_predicates(self) -> bool:
+        return (self.start is not None or self.end is not None or bool(self.symbols)
+                or self.min_abs_pnl is not None or self.side is not None)
+
+    @property
+    def is_active(self) -> bool:
+        return self.has_predicates or self.project_columns
+
+    @property
+    def usecols(self) -> Optional[AnalysisColumns]:
+        """📋 Valor para `usecols` de pandas (None = todas las columnas)"""
+        return ANALYSIS_COLUMNS if self.project_columns else None
+
+    # 🐼 DataFrames
+    def mask(self, df: pd.DataFrame) -> Optional[np.ndarray]:
+        """✅ Máscara booleana de filas que pasan (None si no hay nada que filtrar)"""
+        if not self.has_predicates or len(df) == 0:
+            return None
+
+        mask = np.ones(len(df), dtype=bool)
+
+        if self.start is not None or self.end is not None:
+            time_col = detect_time_column(df)
+            if time_col is not None:
+                mask &= self._time_mask(parse_timestamps(df[time_col]))
+
+        if self.symbols:
+            symbol_col = detect_symbol_column(df)
+            if symbol_col is not None:
+                mask &= self._value_mask(df[symbol_col], lambda value: normalize_symbol(value) in self.symbols)
+
+        if self.side is not None:
+            side_col = detect_side_column(df)
+            if side_col is not None:
+                mask &= self._value_mask(df[side_col], lambda value: normalize_side(value) == self.side)
+
+        if self.min_abs_pnl is not None:
+            pnl_col = detect_pnl_column(df)
+            if pnl_col is not None:
+                pnl = pd.to_numeric(df[pnl_col], errors='coerce').to_numpy(dtype=np.float64)
+                with np.errstate(invalid='ignore'):
+                    mask &= np.abs(pnl) >= self.min_abs_pnl
+
+        return mask
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """✂️ Filas (y columnas, si se proyecta) que pasan el filtro"""
+        if self.project_columns:
+            columns = ANALYSIS_COLUMNS.select(df.columns)
+            if len(columns) < len(df.columns):
+                df = df[columns]
+
+        mask = self.mask(df)
+        if mask is None or mask.all():
+            return df
+        return df[mask].reset_index(drop=True)
+
+    def filter_chunks(self, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """📦 Filtrar bloques y descartar los que no tienen ninguna fila dentro
+
+        Se leen todos los bloques: aunque los primeros parezcan ordenados por
+        fecha, nada garantiza que el resto del archivo lo esté (exportaciones
+        concatenadas, CSV ordenados por cuenta y luego por fecha...).
+        """
+        for chunk in chunks:
+            filtered = self.apply(chunk)
+            if len(filtered) > 0:
+                yield filtered
+
+    # 🏹 Arrow (sidecars columnares)
+    def filter_arrow_table(self, table):
+        """🏹 Proyectar y filtrar una tabla Arrow antes de convertirla a pandas
+
+        Solo se empuja a Arrow lo que se puede evaluar sin pandas (fechas ya
+        tipadas, |PnL| numérico, símbolos/lados vía valores únicos); el resto
+        lo completa `apply` sobre el resultado.
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        if self.project_columns:
+            columns = ANALYSIS_COLUMNS.select(table.column_names)
+            if len(columns) < table.num_columns:
+                table = table.select(columns)
+
+        if not self.has_predicates or table.num_rows == 0:
+            return table
+
+        names = pd.Index(table.column_names)
+        stub = pd.DataFrame(columns=names)
+        mask = None
+
+        def combine(condition):
+            nonlocal mask
+            mask = condition if mask is None else pc.and_kleene(mask, condition)
+
+        time_col = detect_time_column(stub)
+        if time_col is not None and pa.types.is_timestamp(table.schema.field(time_col).type):
+            column = table.column(time_col)
+            unit, tz = column.type.unit, column.type.tz
+            if self.start is not None:
+                combine(pc.greater_equal(column, pa.scalar(self._align_tz(self.start, tz), pa.timestamp(unit, tz))))
+            if self.end is not None:
+                combine(pc.less(column, pa.scalar(self._align_tz(self.end, tz), pa.timestamp(unit, tz))))
+
+        for column_name, keep in (
+            (detect_symbol_column(stub) if self.symbols else None, lambda value: normalize_symbol(value) in self.symbols),
+            (detect_side_column(stub) if self.side else None, lambda value: normalize_side(value) == self.side)
+        ):
+            if column_name is None:
+                continue
+            column_type = table.schema.field(column_name).type
+            if not (pa.types.is_string(column_type) or pa.types.is_large_string(column_type)):
+                continue
+            column = table.column(column_name)
+            allowed = [value for value in pc.unique(column).to_pylist() if value is not None and keep(value)]
+            combine(pc.is_in(column, value_set=pa.array(allowed, type=column.type)))
+
+        pnl_col = detect_pnl_column(stub)
+        if self.min_abs_pnl is not None and pnl_col is not None:
+            column = table.column(pnl_col)
+            if pa.types.is_floating(column.type) or pa.types.is_integer(column.type):
+                combine(pc.greater_equal(pc.abs(column), pa.scalar(self.min_abs_pnl)))
+
+        if mask is None:
+            return table
+        return table.filter(pc.fill_null(mask, False))
+
+    def get_summary(self) -> Dict:
+        """📋 Resumen de predicados activos"""
+        return {
+            'start': self.start.isoformat() if self.start is not None else None,
+            'end': self.end.isoformat() if self.end is not None else None,
+            'symbols': sorted(self.symbols),
+            'min_abs_pnl': self.min_abs_pnl,
+            'side': self.side,
+            'project_columns': self.project_columns
+        }
+
+    def fingerprint(self) -> str:
+        """🔑 Hash del resumen canonicalizado (mismos predicados -> misma huella)"""
+        blob = json.dumps(self.get_summary(), sort_keys=True, default=str)
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()[:16]
+
+    # 🔧 Auxiliares
+    def _time_mask(self, timestamps: pd.Series) -> np.ndarray:
+        mask = timestamps.notna().to_numpy(dtype=bool, copy=True)
+        if self.start is not None:
+            mask &= (timestamps >= self._bound(self.start, timestamps)).to_numpy(dtype=bool)
+        if self.end is not None:
+            mask &= (timestamps < self._bound(self.end, timestamps)).to_numpy(dtype=bool)
+        return mask
+
+    @staticmethod
+    def _value_mask(values: pd.Series, keep) -> np.ndarray:
+        """🏷️ Evaluar `keep` una vez por valor distinto (los ficheros repiten pocos símbolos)"""
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        allowed = np.fromiter((keep(value) for value in uniques), dtype=bool, count=len(uniques))
+        return np.append(allowed, False)[codes]
+
+    @classmethod
+    def _bound(cls, bound: pd.Timestamp, timestamps: pd.Series) -> pd.Timestamp:
+        return cls._align_tz(bound, getattr(timestamps.dt, 'tz', None))
+
+    @staticmethod
+    def _align_tz(bound: pd.Timestamp, tz) -> pd.Timestamp:
+        """🌍 Alinear la zona horaria del límite con la de la columna"""
+        if tz is not None and bound.tzinfo is None:
+            return bound.tz_localize(tz)
+        if tz is None and bound.tzinfo is not None:
+            return bound.tz_convert(None)
+        return bound
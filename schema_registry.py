@@ -0,0 +1,243 @@
+"""
+🧬 Trading Analyzer Pro - Schema Registry
+Huella de la cabecera de cada hoja -> perfil de exchange con columnas exactas (memorizado)
+"""
+
+import hashlib
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 🔎 Palabras para la detección heurística, por prioridad (la primera palabra que aparece gana).
+# 'realized pnl' gana a 'amount' y las columnas de la lista de exclusión nunca se eligen.
+PNL_COLUMN_WORDS = ['pnl', 'p&l', 'profit', 'realized', 'realised', 'amount']
+TIME_COLUMN_WORDS = ['time', 'date', 'fecha', 'created', 'timestamp']
+SYMBOL_COLUMN_WORDS = ['symbol', 'pair', 'contract', 'instrument', 'market']
+SIDE_COLUMN_WORDS = ['side', 'direction']
+TYPE_COLUMN_WORDS = ['type', 'operation', 'action', 'kind', 'category']
+TRADE_ID_COLUMN_WORDS = ['order no', 'order id', 'orderid', 'order_id', 'trade id', 'tradeid', 'trade_id',
+                         'transaction id', 'tran id', 'tranid', 'txid']
+
+PNL_EXCLUDE_WORDS = ['unrealized', 'unrealised', '%', 'ratio', 'rate']
+TYPE_EXCLUDE_WORDS = ['margin', 'order', 'position', 'exit', 'price']
+
+ROLES = ('pnl', 'type', 'time', 'symbol', 'side', 'trade_id')
+
+_WHITESPACE = re.compile(r'[\s_]+')
+_TOKENS = re.compile(r'[a-z0-9]+')
+_MEMO_LIMIT = 4096
+
+
+def normalize_column_name(column) -> str:
+    """🔤 'Realized_PNL ' y 'realized pnl' son la misma columna"""
+    return _WHITESPACE.sub(' ', str(column)).strip().lower()
+
+
+def schema_fingerprint(columns: Iterable) -> str:
+    """🧬 Hash del conjunto de nombres normalizados (el orden de las columnas no importa)"""
+    names = sorted({normalize_column_name(column) for column in columns})
+    return hashlib.sha1('\x1f'.join(names).encode('utf-8')).hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class ExchangeProfile:
+    """🏦 Cabecera conocida de un exchange y el papel exacto de cada columna"""
+
+    name: str
+    columns: Tuple[str, ...]                 # 📋 Cabecera completa tal como se exporta
+    pnl: str
+    time: Optional[str] = None
+    symbol: Optional[str] = None
+    type: Optional[str] = None
+    side: Optional[str] = None
+    trade_id: Optional[str] = None
+    dtypes: Dict[str, str] = field(default_factory=dict)  # 🧱 dtype de pandas por columna
+
+    @property
+    def fingerprint(self) -> str:
+        return schema_fingerprint(self.columns)
+
+    @property
+    def required_columns(self) -> List[str]:
+        """📋 Columnas con papel asignado (las que el análisis necesita)"""
+        return [getattr(self, role) for role in ROLES if getattr(self, role) is not None]
+
+
+@dataclass(frozen=True)
+class ColumnMapping:
+    """🗺️ Columnas resueltas de una cabecera concreta (nombres tal como vienen en la hoja)"""
+
+    fingerprint: str
+    profile: Optional[str] = None            # 🏦 None = detección heurística
+    pnl: Optional[str] = None
+    time: Optional[str] = None
+    symbol: Optional[str] = None
+    type: Optional[str] = None
+    side: Optional[str] = None
+    trade_id: Optional[str] = None
+    dtypes: Tuple[Tuple[str, str], ...] = ()
+
+    @property
+    def usecols(self) -> List[str]:
+        """📋 Columnas con papel asignado (las que el análisis usa)"""
+        return [getattr(self, role) for role in ROLES if getattr(self, role) is not None]
+
+    def read_options(self) -> Dict:
+        """📥 `usecols` + `dtype` para los lectores de pandas (solo con perfil conocido)"""
+        if self.profile is None:
+            return {}
+        usecols = self.usecols
+        return {'usecols': usecols, 'dtype': {column: dtype for column, dtype in self.dtypes if column in usecols}}
+
+
+def _is_excluded(name: str, exclude: Iterable[str]) -> bool:
+    """🚫 Palabras de exclusión como palabra completa ('rate' no excluye 'separate'); '%' como carácter"""
+    tokens = set(_TOKENS.findall(name))
+    return any((word in tokens) if word.isalnum() else (word in name) for word in exclude)
+
+
+def _find_column(columns, words: List[str], exclude: Iterable[str] = ()) -> Optional[str]:
+    """🔎 Primera columna que contiene la palabra de mayor prioridad posible"""
+    candidates = [(column, normalize_column_name(column)) for column in columns]
+    candidates = [(column, name) for column, name in candidates if not _is_excluded(name, exclude)]
+    for word in words:
+        for column, name in candidates:
+            if word in name:
+                return column
+    return None
+
+
+# 🏦 Perfiles incluidos (BingX y Binance coinciden con las exportaciones de `benchmarks.synthetic_exports`)
+_CATEGORY = 'category'
+
+EXCHANGE_PROFILES = [
+    ExchangeProfile(
+        name='bingx_futures',
+        columns=('Time(UTC+8)', 'Pair', 'Type', 'Side', 'Realized PNL', 'Order No', 'Fee', 'Leverage'),
+        pnl='Realized PNL', time='Time(UTC+8)', symbol='Pair', type='Type', side='Side', trade_id='Order No',
+        dtypes={'Pair': _CATEGORY, 'Type': _CATEGORY, 'Side': _CATEGORY, 'Realized PNL': 'float64'}
+    ),
+    ExchangeProfile(
+        name='binance_futures',
+        columns=('Date(UTC)', 'Symbol', 'Type', 'Side', 'Realized Profit', 'Price', 'Quantity', 'Amount', 'Fee'),
+        pnl='Realized Profit', time='Date(UTC)', symbol='Symbol', type='Type', side='Side',
+        dtypes={'Symbol': _CATEGORY, 'Type': _CATEGORY, 'Side': _CATEGORY, 'Realized Profit': 'float64'}
+    ),
+    ExchangeProfile(
+        name='binance_trade_history',
+        columns=('Date(UTC)', 'Symbol', 'Side', 'Price', 'Quantity', 'Amount', 'Fee', 'Realized Profit'),
+        pnl='Realized Profit', time='Date(UTC)', symbol='Symbol', side='Side',
+        dtypes={'Symbol': _CATEGORY, 'Side': _CATEGORY, 'Realized Profit': 'float64'}
+    ),
+    ExchangeProfile(
+        name='binance_transaction_history',
+        columns=('Time', 'Type', 'Amount', 'Asset', 'Symbol'),
+        pnl='Amount', time='Time', symbol='Symbol', type='Type',
+        dtypes={'Symbol': _CATEGORY, 'Type': _CATEGORY, 'Amount': 'float64'}
+    ),
+    ExchangeProfile(
+        name='bybit_closed_pnl',
+        columns=('Contracts', 'Closing Direction', 'Qty', 'Entry Price', 'Exit Price', 'Closed P&L',
+                 'Exit Type', 'Trade Time(UTC+0)'),
+        pnl='Closed P&L', time='Trade Time(UTC+0)', symbol='Contracts', side='Closing Direction',
+        dtypes={'Contracts': _CATEGORY, 'Closing Direction': _CATEGORY, 'Closed P&L': 'float64'}
+    ),
+    ExchangeProfile(
+        name='okx_bills',
+        columns=('Bill ID', 'Time', 'Type', 'Instrument', 'Margin Type', 'Amount', 'PnL', 'Fee', 'Balance'),
+        pnl='PnL', time='Time', symbol='Instrument', type='Type', trade_id='Bill ID',
+        dtypes={'Instrument': _CATEGORY, 'Type': _CATEGORY, 'PnL': 'float64'}
+    ),
+]
+
+
+class SchemaRegistry:
+    """🧬 Perfiles por huella de cabecera + memo de cabeceras ya resueltas
+
+    La primera vez que aparece una cabecera se calcula su huella: si coincide
+    con un perfil se usan sus columnas exactas; si no, se prueba con los
+    perfiles cuyas columnas necesarias están todas presentes (p. ej. la
+    cabecera proyectada con `usecols`) y, en último caso, la heurística por
+    palabras. Las siguientes hojas con la misma cabecera son un acceso a dict.
+    """
+
+    def __init__(self, profiles: Optional[Iterable[ExchangeProfile]] = None):
+        self._profiles = {}
+        self._memo = {}
+        self._lock = threading.Lock()
+        for profile in (EXCHANGE_PROFILES if profiles is None else profiles):
+            self.register(profile)
+
+    def register(self, profile: ExchangeProfile):
+        """➕ Añadir (o sustituir) un perfil de exchange"""
+        with self._lock:
+            self._profiles[profile.fingerprint] = profile
+            self._memo.clear()
+        return self
+
+    @property
+    def profiles(self) -> List[ExchangeProfile]:
+        return list(self._profiles.values())
+
+    def resolve(self, columns) -> ColumnMapping:
+        """🗺️ Mapeo de columnas para una cabecera (memorizado)"""
+        key = tuple(columns)
+        mapping = self._memo.get(key)
+        if mapping is None:
+            mapping = self._resolve(key)
+            with self._lock:
+                if len(self._memo) >= _MEMO_LIMIT:
+                    self._memo.clear()
+                self._memo[key] = mapping
+        return mapping
+
+    def _resolve(self, columns: Tuple) -> ColumnMapping:
+        fingerprint = schema_fingerprint(columns)
+        profile = self._profiles.get(fingerprint) or self._match_subset(columns)
+        if profile is not None:
+            return self._from_profile(fingerprint, profile, columns)
+
+        return ColumnMapping(
+            fingerprint=fingerprint,
+            pnl=_find_column(columns, PNL_COLUMN_WORDS, exclude=PNL_EXCLUDE_WORDS),
+            time=_find_column(columns, TIME_COLUMN_WORDS),
+            symbol=_find_column(columns, SYMBOL_COLUMN_WORDS),
+            type=_find_column(columns, TYPE_COLUMN_WORDS, exclude=TYPE_EXCLUDE_WORDS),
+            side=_find_column(columns, SIDE_COLUMN_WORDS),
+            trade_id=_find_column(columns, TRADE_ID_COLUMN_WORDS)
+        )
+
+    def _match_subset(self, columns: Tuple) -> Optional[ExchangeProfile]:
+        """🔎 Perfil cuyas columnas necesarias están todas en la cabecera (la más específica gana)"""
+        names = {normalize_column_name(column) for column in columns}
+        matches = [
+            profile for profile in self._profiles.values()
+            if names <= {normalize_column_name(column) for column in profile.columns}
+            and all(normalize_column_name(column) in names for column in profile.required_columns)
+        ]
+        return max(matches, key=lambda profile: len(profile.required_columns)) if matches else None
+
+    @staticmethod
+    def _from_profile(fingerprint: str, profile: ExchangeProfile, columns: Tuple) -> ColumnMapping:
+        """🏦 Traducir los nombres del perfil a los de la hoja (pueden variar en mayúsculas/espacios)"""
+        by_name = {normalize_column_name(column): column for column in columns}
+
+        def actual(column):
+            return by_name.get(normalize_column_name(column)) if column is not None else None
+
+        return ColumnMapping(
+            fingerprint=fingerprint,
+            profile=profile.name,
+            **{role: actual(getattr(profile, role)) for role in ROLES},
+            dtypes=tuple((actual(column), dtype) for column, dtype in profile.dtypes.items()
+                         if actual(column) is not None)
+        )
+
+
+DEFAULT_SCHEMA_REGISTRY = SchemaRegistry()
+
+
+def resolve_columns(columns) -> ColumnMapping:
+    """🗺️ Mapeo de columnas con el registro por defecto"""
+    return DEFAULT_SCHEMA_REGISTRY.resolve(columns)
@@ -4,7 +4,9 @@ Sistema de filtros inteligente para hojas de Excel
 """
 
 import re
-from typing import List, Dict, Set, Optional
+from typing import Iterable, List, Dict, Set, Optional
+
+from row_filter import RowFilter
 
 class SheetFilter:
     """🔍 Filtro inteligente para hojas de Excel"""
@@ -15,6 +17,7 @@ class SheetFilter:
         self.sheet_patterns = []      # Patrones regex para nombres
         self.account_filters = []     # Filtros por tipo de cuenta
         self.auto_detect = True       # Auto-detectar hojas relevantes
+        self.row_filter = RowFilter() # 🔎 Predicados por fila (fechas, símbolos, |PnL|, lado)
     
     def add_sheet_by_name(self, sheet_name: str):
         """➕ Agregar hoja específica por nombre"""
@@ -51,16 +54,72 @@ class SheetFilter:
             self.add_pattern(account_patterns[account_type.lower()])
         return self
     
-    def filter_sheets(self, all_sheets: Dict) -> Dict:
-        """🔍 Filtrar hojas según criterios configurados"""
+    def add_time_window(self, start=None, end=None):
+        """🕒 Solo filas entre `start` y `end` (ambos incluidos)"""
+        self.row_filter.set_time_window(start, end)
+        return self
+    
+    def add_symbols(self, symbols: Iterable[str]):
+        """🪙 Solo filas de estos símbolos"""
+        self.row_filter.add_symbols(symbols)
+        return self
+    
+    def add_min_abs_pnl(self, value: float):
+        """💰 Solo filas con |PnL| >= value"""
+        self.row_filter.set_min_abs_pnl(value)
+        return self
+    
+    def add_side(self, side: str):
+        """↕️ Solo posiciones 'long' o 'short'"""
+        self.row_filter.set_side(side)
+        return self
+    
+    def analysis_columns_only(self, enabled: bool = True):
+        """📋 Leer solo las columnas que usa el análisis"""
+        self.row_filter.analysis_columns_only(enabled)
+        return self
+    
+    def selected_sheet_names(self, all_sheets: Dict) -> List[str]:
+        """📋 Nombres de las hojas que pasan el filtro (sin leer sus datos)"""
+        return [sheet_name for sheet_name in all_sheets.keys() if self._should_include_sheet(sheet_name)]
+    
+    def filter_sheets(self, all_sheets: Dict, on_sheet=None, sheet_names: Optional[List[str]] = None) -> Dict:
+        """🔍 Filtrar hojas según criterios configurados
+
+        Se decide solo con el nombre de la hoja y se accede a sus datos después,
+        así un libro perezoso (`LazyWorkbook`) únicamente parsea las elegidas.
+        Los filtros de filas se empujan a la lectura cuando la fuente lo permite.
+        `on_sheet(nombre, hechas, total)` se llama tras cargar cada hoja elegida.
+        Con `sheet_names` solo se cargan esas (p. ej. las que no están en la
+        caché de resultados).
+        """
         filtered_sheets = {}
+        selected = self.selected_sheet_names(all_sheets)
+        if sheet_names is not None:
+            selected = [sheet_name for sheet_name in selected if sheet_name in sheet_names]
         
-        for sheet_name, sheet_data in all_sheets.items():
-            if self._should_include_sheet(sheet_name):
-                filtered_sheets[sheet_name] = sheet_data
+        for sheet_name in selected:
+            filtered_sheets[sheet_name] = self._select_rows(all_sheets, sheet_name)
+            if on_sheet is not None:
+                on_sheet(sheet_name, len(filtered_sheets), len(selected))
         
         return filtered_sheets
     
+    def _select_rows(self, all_sheets: Dict, sheet_name: str):
+        """🔎 Datos de una hoja con los filtros de filas aplicados lo antes posible"""
+        if not self.row_filter.is_active:
+            return all_sheets[sheet_name]
+        
+        # 📚 Libro perezoso: filtro columnar sobre el sidecar, sin materializar la hoja completa
+        if hasattr(all_sheets, 'load_sheet'):
+            return all_sheets.load_sheet(sheet_name, row_filter=self.row_filter)
+        
+        sheet = all_sheets[sheet_name]
+        # 📦 CSV por bloques: cada bloque se filtra al leerse
+        if hasattr(sheet, 'with_row_filter'):
+            return sheet.with_row_filter(self.row_filter)
+        return self.row_filter.apply(sheet)
+    
     def _should_include_sheet(self, sheet_name: str) -> bool:
         """🤔 Determinar si una hoja debe incluirse"""
         sheet_lower = sheet_name.lower()
@@ -126,7 +185,8 @@ class SheetFilter:
             'excluded_sheets': list(self.excluded_sheets),
             'patterns': [p.pattern for p in self.sheet_patterns],
             'auto_detect': self.auto_detect,
-            'has_specific_filters': bool(self.included_sheets or self.sheet_patterns)
+            'has_specific_filters': bool(self.included_sheets or self.sheet_patterns),
+            'row_filters': self.row_filter.get_summary()
         }
 
 # 🎯 Filtros predefinidos comunes
@@ -195,7 +255,13 @@ def create_filter_examples():
         'auto_with_exclusions': (SheetFilter()
                                 .exclude_sheet('template')
                                 .exclude_sheet('example')
-                                .exclude_sheet('readme'))
+                                .exclude_sheet('readme')),
+        
+        # Ejemplo 6: Filtros de filas (enero de 2024, solo BTC/ETH en largo)
+        'btc_eth_longs_january': (CommonFilters.only_futures()
+                                  .add_time_window('2024-01-01', '2024-01-31')
+                                  .add_symbols(['BTC-USDT', 'ETH-USDT'])
+                                  .add_side('long'))
     }
     
     return examples
@@ -0,0 +1,95 @@
+"""
+📦 Trading Analyzer Pro - Compact Sheet Result
+Resultado por hoja con __slots__ y serie de PnL como array float64 contiguo
+"""
+
+from dataclasses import dataclass, field, fields
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+
+
+@dataclass(slots=True, eq=False)
+class SheetResult:
+    """📦 Métricas de una hoja; se lee también como dict (`result['total_pnl']`)
+
+    `pnl_values` es un `np.ndarray` float64 contiguo en lugar de una lista de
+    floats de Python (8 bytes por trade en vez de ~32 + la lista). Está en
+    orden cronológico cuando la hoja tiene columna de fecha; `pnl_times`
+    guarda esas fechas (vacío si no hay).
+    """
+
+    total_pnl: float
+    total_profit: float
+    total_loss: float
+    win_rate: float
+    total_trades: int
+    avg_profit: float
+    avg_loss: float
+    pnl_values: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.float64))
+    pnl_column: Optional[str] = None       # 📊 Columna de PnL detectada
+    total_rows: int = 0                    # 📏 Filas de la hoja original
+    filtered_rows: int = 0                 # 📏 Filas después de filtrar
+    excluded_operations: int = 0           # 🚫 Operaciones excluidas
+    operation_breakdown: Dict = field(default_factory=dict)  # 🏷️ Filas/importe por categoría
+    pnl_times: np.ndarray = field(default_factory=lambda: np.empty(0, dtype='datetime64[ns]'))  # 🕒 Fecha de cada PnL
+    trade_cube: Optional[object] = field(default=None, repr=False, metadata={'result_key': False})  # 🧊 TradeCube para desgloses
+    _metrics: Optional[object] = field(default=None, init=False, repr=False)  # 📉 SeriesMetrics memorizado
+
+    def __post_init__(self):
+        self.pnl_values = np.ascontiguousarray(self.pnl_values, dtype=np.float64)
+        self.pnl_times = np.ascontiguousarray(self.pnl_times, dtype='datetime64[ns]')
+
+    # 🔁 Compatibilidad con el dict que devolvía `analyze_data`
+    def __getitem__(self, key: str):
+        if key not in _RESULT_KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key) -> bool:
+        return key in _RESULT_KEYS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(_RESULT_KEYS)
+
+    def __len__(self) -> int:
+        return len(_RESULT_KEYS)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in _RESULT_KEYS else default
+
+    def keys(self):
+        return list(_RESULT_KEYS)
+
+    def values(self):
+        return [getattr(self, key) for key in _RESULT_KEYS]
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in _RESULT_KEYS]
+
+    def to_dict(self, pnl_as_list: bool = False) -> Dict:
+        """📋 Copia como dict plano (opcionalmente con la lista de PnL como antes)"""
+        result = dict(self.items())
+        if pnl_as_list:
+            result['pnl_values'] = self.pnl_values.tolist()
+            result['pnl_times'] = [str(value) for value in self.pnl_times]
+        return result
+
+    @property
+    def metrics(self):
+        """📉 Métricas de serie temporal (se calculan la primera vez y quedan memorizadas)"""
+        if self._metrics is None:
+            from metrics_engine import SeriesMetrics
+            self._metrics = SeriesMetrics(self.pnl_values, self.pnl_times)
+        return self._metrics
+
+    @property
+    def nbytes(self) -> int:
+        """📏 Bytes de las series de PnL y fechas (y del cubo de desgloses)"""
+        cube_bytes = self.trade_cube.nbytes if self.trade_cube is not None else 0
+        return int(self.pnl_values.nbytes + self.pnl_times.nbytes + cube_bytes)
+
+
+# 🔑 Claves de la vista dict: el cubo es solo atributo (no va a JSON / JSONL)
+_RESULT_KEYS = tuple(f.name for f in fields(SheetResult)
+                     if not f.name.startswith('_') and f.metadata.get('result_key', True))
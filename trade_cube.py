@@ -0,0 +1,169 @@
+"""
+🧊 Trading Analyzer Pro - Trade Aggregate Cube
+Cubo compacto por (hora, símbolo, lado) con PnL, trades, wins y beneficio/pérdida para desgloses sin volver a los trades
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from row_filter import normalize_side, normalize_symbol
+
+CUBE_KEYS = ['hour', 'symbol', 'side']
+CUBE_MEASURES = ['pnl', 'trades', 'wins', 'losses', 'profit', 'loss']
+MISSING_LABEL = '—'  # 🏷️ Símbolo / lado cuando la hoja no tiene esa columna o la celda está vacía
+
+# 📅 Dimensiones de los desgloses y cómo se obtienen de la clave horaria
+DIMENSIONS = ('symbol', 'side', 'day', 'weekday', 'hour', 'month')
+WEEKDAY_NAMES = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+
+
+def _codes(values: Optional[pd.Series], normalize, count: int) -> Tuple[np.ndarray, List[str]]:
+    """🏷️ Código entero por fila y etiquetas ordenadas (normalizando solo los valores distintos)"""
+    if values is None:
+        return np.zeros(count, dtype=np.int64), [MISSING_LABEL]
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    normalized = [(normalize(value) if pd.notna(value) else None) or MISSING_LABEL for value in uniques]
+    labels = sorted(set(normalized))
+    positions = {label: position for position, label in enumerate(labels)}
+    return np.array([positions[label] for label in normalized], dtype=np.int64)[codes], labels
+
+
+class TradeCube:
+    """🧊 Agregados de una o varias hojas por (hora, símbolo, lado)
+
+    Se construye en la misma pasada que el resto de métricas de la hoja y
+    ocupa una fila por combinación con trades (no por trade), así que cada
+    desglose (por símbolo, día de la semana, hora, mes...) es un groupby sobre
+    unas pocas filas. La clave temporal es la hora (y no el día) para poder
+    desglosar también por hora del día; día, semana y mes salen de ella.
+    Los trades sin fecha quedan con hora NaT: cuentan en los desgloses por
+    símbolo y lado, no en los temporales.
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame  # 📋 Una fila por (hora, símbolo, lado) con trades
+
+    @classmethod
+    def empty(cls) -> 'TradeCube':
+        return cls.from_trades(np.empty(0, dtype=np.float64))
+
+    @classmethod
+    def from_trades(cls, pnl_values: np.ndarray, times: Optional[np.ndarray] = None,
+                    symbols: Optional[pd.Series] = None, sides: Optional[pd.Series] = None) -> 'TradeCube':
+        """🧊 Cubo a partir de las series por trade (fechas / símbolos / lados opcionales)
+
+        Las tres claves se reducen a un único entero por trade y cada medida
+        es un `np.bincount` sobre él: no se crea ningún DataFrame por trade.
+        """
+        pnl = np.asarray(pnl_values, dtype=np.float64)
+        count = len(pnl)
+        if times is not None and len(times) == count:
+            hours = np.asarray(times, dtype='datetime64[ns]').astype('datetime64[h]')
+        else:
+            hours = np.full(count, np.datetime64('NaT', 'h'))
+        hour_codes, hour_values = pd.factorize(hours.view(np.int64))  # NaT es un entero más: queda como grupo
+        symbol_codes, symbol_labels = _codes(symbols, normalize_symbol, count)
+        side_codes, side_labels = _codes(sides, normalize_side, count)
+
+        keys = (hour_codes * len(symbol_labels) + symbol_codes) * len(side_labels) + side_codes
+        groups, group_keys = pd.factorize(keys)
+        size = len(group_keys)
+        wins, losses = pnl > 0, pnl < 0
+
+        rest, side_index = np.divmod(group_keys, len(side_labels))
+        hour_index, symbol_index = np.divmod(rest, len(symbol_labels))
+        frame = pd.DataFrame({
+            'hour': np.asarray(hour_values, dtype=np.int64)[hour_index].view('datetime64[h]').astype('datetime64[ns]'),
+            'symbol': pd.Categorical.from_codes(symbol_index, categories=symbol_labels),
+            'side': pd.Categorical.from_codes(side_index, categories=side_labels),
+            'pnl': np.bincount(groups, weights=pnl, minlength=size),
+            'trades': np.bincount(groups, minlength=size).astype(np.int64),
+            'wins': np.bincount(groups, weights=wins, minlength=size).astype(np.int64),
+            'losses': np.bincount(groups, weights=losses, minlength=size).astype(np.int64),
+            'profit': np.bincount(groups, weights=np.where(wins, pnl, 0.0), minlength=size),
+            'loss': np.bincount(groups, weights=np.where(losses, pnl, 0.0), minlength=size)
+        })
+        return cls(frame.sort_values(CUBE_KEYS, ignore_index=True))
+
+    @classmethod
+    def combine(cls, cubes: Iterable['TradeCube']) -> 'TradeCube':
+        """🔗 Sumar cubos (bloques de un CSV o varias hojas); el orden no importa"""
+        frames = [cube.frame for cube in cubes if cube is not None and len(cube.frame)]
+        if not frames:
+            return cls.empty()
+        if len(frames) == 1:
+            return cls(frames[0])
+        return cls(cls._group(pd.concat(frames, ignore_index=True)))
+
+    @staticmethod
+    def _group(frame: pd.DataFrame) -> pd.DataFrame:
+        grouped = frame.groupby(CUBE_KEYS, sort=True, dropna=False, observed=True)[CUBE_MEASURES].sum()
+        cube = grouped.reset_index()
+        cube['symbol'] = cube['symbol'].astype('category')
+        cube['side'] = cube['side'].astype('category')
+        return cube
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.frame.memory_usage(index=True, deep=True).sum())
+
+    @property
+    def symbols(self) -> List[str]:
+        return sorted(str(symbol) for symbol in self.frame['symbol'].unique())
+
+    def slice(self, symbols: Optional[Iterable[str]] = None, sides: Optional[Iterable[str]] = None,
+              start=None, end=None) -> 'TradeCube':
+        """✂️ Sub-cubo para profundizar (símbolos, lados y ventana [start, end) de fechas)"""
+        mask = np.ones(len(self.frame), dtype=bool)
+        if symbols is not None:
+            mask &= self.frame['symbol'].isin([normalize_symbol(symbol) for symbol in symbols]).to_numpy()
+        if sides is not None:
+            mask &= self.frame['side'].isin(list(sides)).to_numpy()
+        if start is not None:
+            mask &= (self.frame['hour'] >= pd.Timestamp(start)).to_numpy()
+        if end is not None:
+            mask &= (self.frame['hour'] < pd.Timestamp(end)).to_numpy()
+        return TradeCube(self.frame[mask].reset_index(drop=True)) if not mask.all() else self
+
+    def rollup(self, by: str) -> pd.DataFrame:
+        """📊 Desglose por `symbol`, `side`, `day`, `weekday` (0 = lunes), `hour` (0-23) o `month`
+
+        Devuelve PnL, trades, wins, pérdidas, beneficio, pérdida, win rate y
+        medias por grupo, con las mismas definiciones que los totales de la hoja.
+        """
+        if by not in DIMENSIONS:
+            raise ValueError(f"Dimensión no válida: {by!r} (usa {', '.join(DIMENSIONS)})")
+
+        frame = self.frame
+        if by in ('symbol', 'side'):
+            keys = frame[by].astype(str)
+        else:
+            hours = frame['hour']
+            keys = {
+                'day': hours.dt.floor('D'),
+                'weekday': hours.dt.weekday,
+                'hour': hours.dt.hour,
+                'month': hours.dt.to_period('M').astype(str).where(hours.notna())
+            }[by]
+
+        table = frame[CUBE_MEASURES].groupby(keys.rename(by), sort=True, dropna=True).sum()
+        table['trades'] = table['trades'].astype(np.int64)
+        table['wins'] = table['wins'].astype(np.int64)
+        table['losses'] = table['losses'].astype(np.int64)
+        table['win_rate'] = np.where(table['trades'] > 0, table['wins'] / table['trades'].clip(lower=1) * 100, 0.0)
+        table['avg_profit'] = np.where(table['wins'] > 0, table['profit'] / table['wins'].clip(lower=1), 0.0)
+        table['avg_loss'] = np.where(table['losses'] > 0, table['loss'] / table['losses'].clip(lower=1), 0.0)
+        if by in ('weekday', 'hour'):
+            table.index = table.index.astype(np.int64)
+        return table
+
+    def totals(self) -> Dict:
+        """🧮 Totales del cubo (coinciden con los de la hoja)"""
+        sums = self.frame[CUBE_MEASURES].sum()
+        return {measure: (int(sums[measure]) if measure in ('trades', 'wins', 'losses') else float(sums[measure]))
+                for measure in CUBE_MEASURES}
@@ -0,0 +1,268 @@
+"""
+🧬 Trading Analyzer Pro - Multi-Export Merge
+Unión de varias exportaciones de la misma cuenta con deduplicación de trades por índice hash
+"""
+
+import threading
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from aggregates import CsvChunkSource
+from column_detection import (
+    detect_pnl_column, detect_time_column, detect_symbol_column, detect_trade_id_column, timestamps_to_numpy
+)
+from row_filter import normalize_symbol
+
+FINGERPRINT_IDENTITY = 'fingerprint'
+PNL_DECIMALS = 8  # 🔢 Redondeo del PnL en la huella (Excel y CSV no siempre dan los mismos decimales)
+
+_MISSING_IDS = {'', 'nan', 'none', 'null', '-', '<na>'}
+
+
+def _normalize_ids(values: pd.Series) -> pd.Series:
+    """🆔 IDs como texto comparable entre formatos (123, 123.0 y ' 123 ' son el mismo ID); NA si falta"""
+    if pd.api.types.is_numeric_dtype(values):
+        numeric = pd.to_numeric(values, errors='coerce')
+        finite = numeric.dropna()
+        if len(finite) == 0 or (finite == np.floor(finite)).all():
+            numeric = numeric.astype('Int64')
+        return numeric.astype('string')
+
+    text = values.astype('string').str.strip()
+    text = text.str.replace(r'\.0$', '', regex=True)  # IDs numéricos leídos como texto desde Excel
+    return text.mask(text.str.lower().isin(_MISSING_IDS))
+
+
+def _fingerprint(df: pd.DataFrame) -> np.ndarray:
+    """🧾 Hash de (fecha, símbolo, PnL) por fila; si no hay ninguna de las tres, de la fila completa"""
+    parts = {}
+    time_col = detect_time_column(df)
+    if time_col is not None:
+        parts['time'] = timestamps_to_numpy(df[time_col]).view(np.int64)
+    symbol_col = detect_symbol_column(df)
+    if symbol_col is not None:
+        # normalize_symbol solo sobre los valores únicos
+        codes, uniques = pd.factorize(df[symbol_col], use_na_sentinel=False)
+        parts['symbol'] = np.array([normalize_symbol(value) for value in uniques], dtype=object)[codes]
+    pnl_col = detect_pnl_column(df)
+    if pnl_col is not None:
+        parts['pnl'] = pd.to_numeric(df[pnl_col], errors='coerce').round(PNL_DECIMALS).to_numpy()
+
+    frame = pd.DataFrame(parts) if parts else df.reset_index(drop=True).astype('string')
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+def trade_identity(df: pd.DataFrame) -> Tuple[np.ndarray, str]:
+    """🔑 Identidad uint64 de cada fila y cómo se obtuvo
+
+    Se usa el ID de orden / trade cuando la hoja lo tiene; las filas sin ID
+    (y las hojas sin esa columna) usan la huella de fecha, símbolo y PnL.
+    """
+    fingerprint = _fingerprint(df) if len(df) else np.empty(0, dtype=np.uint64)
+    id_col = detect_trade_id_column(df)
+    if id_col is None or len(df) == 0:
+        return fingerprint, FINGERPRINT_IDENTITY
+
+    ids = _normalize_ids(df[id_col])
+    has_id = ids.notna().to_numpy()
+    id_hashes = pd.util.hash_pandas_object(ids.fillna(''), index=False).to_numpy()
+    return np.where(has_id, id_hashes, fingerprint), f"id:{id_col}"
+
+
+class OccurrenceCounter:
+    """🔢 Nº de ocurrencia de cada identidad a lo largo de varios bloques (0 la primera vez)"""
+
+    def __init__(self):
+        self.counts = pd.Series(dtype=np.int64, index=pd.Index([], dtype=np.uint64))
+
+    def number(self, keys: np.ndarray) -> np.ndarray:
+        """🔢 Numerar las filas de un bloque y acumular sus identidades"""
+        key_series = pd.Series(keys)
+        occurrence = (key_series.groupby(keys, sort=False).cumcount().to_numpy()
+                      + self.counts.reindex(keys, fill_value=0).to_numpy())
+        self.counts = self.counts.add(key_series.value_counts(sort=False), fill_value=0).astype(np.int64)
+        return occurrence
+
+    def reset(self):
+        self.counts = self.counts.iloc[:0]
+
+
+class TradeDeduplicator:
+    """🧬 Índice hash (identidad -> ocurrencias) de las exportaciones ya recorridas
+
+    Cada fila se compara en O(1) contra las exportaciones anteriores, nunca
+    contra la suya: si un archivo trae N filas con la misma identidad
+    (p. ej. ejecuciones parciales de una orden) se conservan todas, y de los
+    siguientes archivos solo sobreviven las ocurrencias que pasen de ese N.
+    """
+
+    def __init__(self):
+        self._seen = pd.Series(dtype=np.int64, index=pd.Index([], dtype=np.uint64))
+        self._current = OccurrenceCounter()
+        self.sources = 0
+        self.rows_in = 0
+        self.dropped_rows = 0
+        self.identity = None
+
+    def start_source(self):
+        """📄 Empezar otra exportación: lo visto en la actual pasa al índice"""
+        if len(self._current.counts):
+            self._seen = pd.concat([self._seen, self._current.counts]).groupby(level=0, sort=False).max()
+            self._current.reset()
+        self.sources += 1
+        return self
+
+    def filter(self, df: pd.DataFrame) -> pd.DataFrame:
+        """🚿 Quitar las filas de `df` ya presentes en exportaciones anteriores"""
+        if len(df) == 0:
+            return df
+
+        keys, identity = trade_identity(df)
+        if self.identity is None or self.identity == FINGERPRINT_IDENTITY:
+            self.identity = identity
+
+        # Posición de cada fila entre las de su misma identidad dentro de esta exportación
+        occurrence = self._current.number(keys)
+        keep = occurrence >= self._seen.reindex(keys, fill_value=0).to_numpy()
+        self.rows_in += len(df)
+        dropped = int(len(df) - keep.sum())
+        self.dropped_rows += dropped
+        return df[keep] if dropped else df
+
+    def get_report(self) -> Dict:
+        """📊 Filas leídas, eliminadas y conservadas"""
+        return {
+            'sources': self.sources,
+            'rows_in': self.rows_in,
+            'dropped_rows': self.dropped_rows,
+            'rows_out': self.rows_in - self.dropped_rows,
+            'identity': self.identity
+        }
+
+
+class MergedChunkSource(CsvChunkSource):
+    """📦 Varias fuentes de la misma hoja leídas en orden y deduplicadas bloque a bloque"""
+
+    def __init__(self, parts: List, on_report=None):
+        self.parts = parts
+        self.on_report = on_report  # 📊 Recibe el informe de deduplicación al terminar cada recorrido
+        self.row_filter = None
+
+    def with_row_filter(self, row_filter) -> 'MergedChunkSource':
+        parts = [part.with_row_filter(row_filter) if isinstance(part, CsvChunkSource) else row_filter.apply(part)
+                 for part in self.parts]
+        return MergedChunkSource(parts, on_report=self.on_report)
+
+    def iter_chunks(self) -> Iterator[pd.DataFrame]:
+        dedup = TradeDeduplicator()
+        for part in self.parts:
+            dedup.start_source()
+            chunks = part.iter_chunks() if isinstance(part, CsvChunkSource) else [part]
+            for chunk in chunks:
+                chunk = dedup.filter(chunk)
+                if len(chunk):
+                    yield chunk
+        if self.on_report is not None:
+            self.on_report(dedup.get_report())
+
+
+class MergedWorkbook(Mapping):
+    """🧬 Mapping hoja -> datos unidos de varias exportaciones
+
+    Las hojas con el mismo nombre se consideran la misma cuenta. Como
+    `LazyWorkbook`, una hoja solo se lee (de todas las exportaciones a la
+    vez, en hilos) cuando se accede a ella, y se deduplica antes de que
+    llegue a `analyze_data`.
+    """
+
+    def __init__(self, sources: List[Mapping], source_names: Optional[List[str]] = None, workers: int = 1):
+        self.sources = sources
+        self.source_names = source_names or [f"file_{index + 1}" for index in range(len(sources))]
+        self.workers = max(1, workers)
+        self.sheet_names = list(dict.fromkeys(name for source in sources for name in source.keys()))
+        self._merged = {}
+        self._reports = {}
+        self._lock = threading.RLock()
+
+    def __getitem__(self, sheet_name: str):
+        if sheet_name not in self.sheet_names:
+            raise KeyError(sheet_name)
+
+        with self._lock:
+            if sheet_name not in self._merged:
+                self._merged[sheet_name] = self._merge(sheet_name, self._read_parts(sheet_name))
+            return self._merged[sheet_name]
+
+    def __iter__(self):
+        return iter(self.sheet_names)
+
+    def __len__(self) -> int:
+        return len(self.sheet_names)
+
+    def __contains__(self, sheet_name) -> bool:
+        return sheet_name in self.sheet_names
+
+    @property
+    def loaded_sheets(self) -> List[str]:
+        """📋 Hojas ya unidas en memoria (las de CSV por bloques no se materializan)"""
+        with self._lock:
+            return [name for name, data in self._merged.items() if isinstance(data, pd.DataFrame)]
+
+    def load_sheet(self, sheet_name: str, row_filter=None):
+        """🔎 Hoja unida con un `RowFilter` aplicado en cada exportación antes de deduplicar"""
+        if row_filter is None:
+            return self[sheet_name]
+        if sheet_name not in self.sheet_names:
+            raise KeyError(sheet_name)
+        return self._merge(sheet_name, self._read_parts(sheet_name, row_filter))
+
+    def get_merge_report(self) -> Dict:
+        """📊 Filas eliminadas por hoja (solo las hojas ya leídas) y en total"""
+        with self._lock:
+            sheets = dict(self._reports)
+        return {
+            'files': len(self.sources),
+            'dropped_rows': sum(report['dropped_rows'] for report in sheets.values()),
+            'sheets': sheets
+        }
+
+    def restore_report(self, sheet_name: str, report: Dict):
+        """🧬 Reponer el informe de una hoja que no se ha vuelto a leer (p. ej. resultado memorizado)"""
+        self._store_report(sheet_name, report)
+        return self
+    
+    def _read_parts(self, sheet_name: str, row_filter=None) -> List:
+        """📥 La hoja de cada exportación que la contiene, leídas en paralelo"""
+        def read(source):
+            if row_filter is None:
+                return source[sheet_name]
+            if hasattr(source, 'load_sheet'):
+                return source.load_sheet(sheet_name, row_filter=row_filter)
+            part = source[sheet_name]
+            return part.with_row_filter(row_filter) if isinstance(part, CsvChunkSource) else row_filter.apply(part)
+
+        sources = [source for source in self.sources if sheet_name in source]
+        if self.workers <= 1 or len(sources) <= 1:
+            return [read(source) for source in sources]
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(sources))) as pool:
+            return list(pool.map(read, sources))
+
+    def _merge(self, sheet_name: str, parts: List):
+        """🧬 Concatenar las partes quitando duplicados (en streaming si alguna es un CSV por bloques)"""
+        if any(isinstance(part, CsvChunkSource) for part in parts):
+            return MergedChunkSource(parts, on_report=lambda report: self._store_report(sheet_name, report))
+
+        dedup = TradeDeduplicator()
+        frames = [dedup.start_source().filter(part) for part in parts]
+        self._store_report(sheet_name, dedup.get_report())
+        if len(frames) == 1:
+            return frames[0]
+        return pd.concat(frames, ignore_index=True)
+
+    def _store_report(self, sheet_name: str, report: Dict):
+        with self._lock:
+            self._reports[sheet_name] = report
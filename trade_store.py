@@ -0,0 +1,232 @@
+"""
+🗃️ Trading Analyzer Pro - Local Trade Store
+Histórico de trades normalizados en SQLite (disco local) con consultas agregadas indexadas
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from aggregates import PnLAggregate, CsvChunkSource
+from column_detection import detect_pnl_column, detect_time_column, detect_symbol_column, timestamps_to_numpy
+from row_filter import RowFilter, normalize_symbol
+from sheet_result import SheetResult
+from trade_merge import OccurrenceCounter, trade_identity
+from transaction_classifier import TransactionClassifier, DEFAULT_CLASSIFIER
+
+TRADE_STORE_ENV = 'TRADING_ANALYZER_TRADE_STORE'
+
+SQLITE_TIMEOUT_SECONDS = 30  # ⏳ Espera por el bloqueo de escritura (workers de batch_cli en paralelo)
+
+TRADE_COLUMNS = ['account', 'ts', 'symbol', 'type', 'pnl', 'trade_key']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    account   TEXT    NOT NULL,
+    ts        INTEGER,            -- ns desde epoch (UTC); NULL si la hoja no tiene fecha
+    symbol    TEXT,
+    type      TEXT,
+    pnl       REAL    NOT NULL,
+    trade_key INTEGER NOT NULL    -- identidad del trade + ocurrencia (reimportar no duplica)
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_trades_key ON trades (account, trade_key);
+CREATE INDEX IF NOT EXISTS idx_trades_account_ts ON trades (account, ts);
+CREATE INDEX IF NOT EXISTS idx_trades_ts ON trades (ts);
+"""
+
+
+def normalize_trades(df: pd.DataFrame, account: str,
+                     classifier: TransactionClassifier = DEFAULT_CLASSIFIER,
+                     occurrences: Optional[OccurrenceCounter] = None) -> pd.DataFrame:
+    """🧹 Filas de trading de una hoja con las columnas de `TRADE_COLUMNS`
+
+    Excluye las mismas operaciones que el análisis (transferencias, comisiones
+    sueltas...) y los PnL vacíos. Pasar el mismo `occurrences` a todos los
+    bloques de un CSV numera las repeticiones de una identidad entre bloques.
+    """
+    pnl_col = detect_pnl_column(df)
+    if pnl_col is None or len(df) == 0:
+        return pd.DataFrame(columns=TRADE_COLUMNS)
+
+    type_col = classifier.detect_type_column(df)
+    if type_col is not None:
+        df = df[classifier.classify(df, type_col, amount_col=pnl_col).trading_mask]
+    pnl = pd.to_numeric(df[pnl_col], errors='coerce')
+    df, pnl = df[pnl.notna()], pnl[pnl.notna()]
+    if len(df) == 0:
+        return pd.DataFrame(columns=TRADE_COLUMNS)
+
+    time_col = detect_time_column(df)
+    symbol_col = detect_symbol_column(df)
+    timestamps = timestamps_to_numpy(df[time_col]) if time_col is not None else None
+
+    # 🔑 Identidad + nº de ocurrencia: las ejecuciones parciales con el mismo ID se conservan
+    keys, _ = trade_identity(df)
+    occurrence = (occurrences if occurrences is not None else OccurrenceCounter()).number(keys)
+    trade_keys = pd.util.hash_pandas_object(
+        pd.DataFrame({'key': keys, 'occurrence': occurrence}), index=False
+    ).to_numpy().view(np.int64)
+
+    if symbol_col is not None:
+        codes, uniques = pd.factorize(df[symbol_col], use_na_sentinel=True)
+        symbols = np.append(np.array([normalize_symbol(value) for value in uniques], dtype=object), None)[codes]
+    else:
+        symbols = None
+
+    return pd.DataFrame({
+        'account': account,
+        'ts': np.where(np.isnat(timestamps), None, timestamps.view(np.int64)) if timestamps is not None else None,
+        'symbol': symbols,
+        'type': df[type_col].astype('string').to_numpy(dtype=object, na_value=None) if type_col is not None else None,
+        'pnl': pnl.to_numpy(dtype=np.float64),
+        'trade_key': trade_keys
+    }, columns=TRADE_COLUMNS)
+
+
+class TradeStore:
+    """🗃️ Base de datos SQLite embebida con los trades de todas las exportaciones
+
+    Cada trade se guarda una sola vez (índice único por cuenta + identidad),
+    así volver a importar una exportación solapada es idempotente. Las
+    consultas por rango de fechas y cuentas usan los índices
+    `(account, ts)` y `(ts)` en lugar de volver a parsear los archivos.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as connection:
+            connection.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """🔌 Una conexión por hilo (sqlite3 no comparte conexiones entre hilos)"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=SQLITE_TIMEOUT_SECONDS)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def close(self):
+        """🔒 Cerrar la conexión del hilo actual"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    # 📥 Escritura
+    def insert_trades(self, trades: pd.DataFrame) -> int:
+        """📥 Insertar en bloque trades normalizados; devuelve cuántos eran nuevos"""
+        if len(trades) == 0:
+            return 0
+        rows = trades[TRADE_COLUMNS].itertuples(index=False, name=None)
+        connection = self._connect()
+        with connection:
+            before = connection.total_changes
+            connection.executemany(
+                f"INSERT OR IGNORE INTO trades ({', '.join(TRADE_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                ((account, None if pd.isna(ts) else int(ts), symbol, trade_type, float(pnl), int(key))
+                 for account, ts, symbol, trade_type, pnl, key in rows)
+            )
+            return connection.total_changes - before
+
+    def insert_sheet(self, account: str, data, classifier: TransactionClassifier = DEFAULT_CLASSIFIER) -> int:
+        """📥 Normalizar e insertar una hoja (DataFrame o CSV por bloques)"""
+        if isinstance(data, CsvChunkSource):
+            occurrences = OccurrenceCounter()
+            return sum(
+                self.insert_trades(normalize_trades(chunk, account, classifier, occurrences=occurrences))
+                for chunk in data.iter_chunks()
+            )
+        return self.insert_trades(normalize_trades(data, account, classifier))
+
+    # 📊 Consultas
+    def accounts(self) -> List[str]:
+        """📋 Cuentas con trades guardados"""
+        return [row[0] for row in self._connect().execute("SELECT DISTINCT account FROM trades ORDER BY account")]
+
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM trades").fetchone()[0]
+
+    def summarize(self, accounts: Optional[Iterable[str]] = None, start=None, end=None,
+                  symbols: Optional[Iterable[str]] = None, include_series: bool = True) -> Dict[str, SheetResult]:
+        """📊 Resultado por cuenta (mismas claves que `analyze_data`) con una consulta agregada
+
+        `start` / `end` siguen la semántica de `RowFilter.set_time_window`
+        (un `end` sin hora incluye el día completo). Con `include_series` se
+        lee además la serie de PnL ordenada por fecha para las métricas.
+        """
+        where, params = self._where(accounts, start, end, symbols)
+        query = f"""
+            SELECT account, COUNT(*), SUM(pnl),
+                   SUM(CASE WHEN pnl > 0 THEN pnl ELSE 0 END), SUM(CASE WHEN pnl < 0 THEN pnl ELSE 0 END),
+                   SUM(pnl > 0), SUM(pnl < 0)
+            FROM trades {where} GROUP BY account ORDER BY account
+        """
+        results = {}
+        for account, count, pnl_sum, profit_sum, loss_sum, wins, losses in self._connect().execute(query, params):
+            aggregate = PnLAggregate(
+                total_rows=count, filtered_rows=count, count=count, pnl_sum=pnl_sum,
+                profit_sum=profit_sum, loss_sum=loss_sum, wins=wins, losses=losses
+            )
+            series = self.load_series(account, start, end, symbols) if include_series else {}
+            results[account] = aggregate.to_result(pnl_values=series.get('pnl'), pnl_times=series.get('ts'))
+        return results
+
+    def load_series(self, account: str, start=None, end=None, symbols: Optional[Iterable[str]] = None) -> Dict:
+        """📈 PnL y fechas de una cuenta en orden cronológico (vacías las fechas si falta alguna)"""
+        where, params = self._where([account], start, end, symbols)
+        rows = self._connect().execute(f"SELECT pnl, ts FROM trades {where} ORDER BY ts, rowid", params).fetchall()
+        pnl = np.fromiter((row[0] for row in rows), dtype=np.float64, count=len(rows))
+        if any(row[1] is None for row in rows):
+            return {'pnl': pnl, 'ts': np.empty(0, dtype='datetime64[ns]')}
+        ts = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows)).view('datetime64[ns]')
+        return {'pnl': pnl, 'ts': ts}
+
+    def _where(self, accounts, start, end, symbols):
+        """🔎 Cláusula WHERE que aprovecha los índices (cuenta, fecha)"""
+        window = RowFilter().set_time_window(start, end)
+        clauses, params = [], []
+        if accounts is not None:
+            accounts = list(accounts)
+            clauses.append(f"account IN ({', '.join('?' * len(accounts))})")
+            params.extend(accounts)
+        for bound, operator in ((window.start, '>='), (window.end, '<')):
+            if bound is not None:
+                if bound.tzinfo is not None:
+                    bound = bound.tz_convert('UTC').tz_localize(None)
+                clauses.append(f"ts {operator} ?")
+                params.append(int(bound.value))
+        if symbols is not None:
+            symbols = [normalize_symbol(symbol) for symbol in symbols]
+            clauses.append(f"symbol IN ({', '.join('?' * len(symbols))})")
+            params.extend(symbols)
+        return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+_default_trade_store = None
+_default_trade_store_lock = threading.Lock()
+
+
+def get_default_trade_store() -> Optional[TradeStore]:
+    """🌐 Histórico local compartido por todas las sesiones del proceso si `TRADING_ANALYZER_TRADE_STORE` apunta a un .sqlite
+
+    Se crea una sola vez (el esquema no se vuelve a ejecutar en cada rerun);
+    cada hilo abre su propia conexión, que se libera al terminar el hilo.
+    """
+    global _default_trade_store
+
+    path = os.environ.get(TRADE_STORE_ENV)
+    if not path:
+        return None
+    with _default_trade_store_lock:
+        if _default_trade_store is None or _default_trade_store.path != path:
+            _default_trade_store = TradeStore(path)
+        return _default_trade_store
@@ -0,0 +1,108 @@
+"""
+🏷️ Trading Analyzer Pro - Transaction Classifier
+Clasificación vectorizada de operaciones (trade, fee, funding, transfer...) en una sola pasada
+"""
+
+import hashlib
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from schema_registry import TYPE_COLUMN_WORDS, resolve_columns
+
+TRADE_CATEGORY = 'trade'
+
+# 🏷️ Categorías no-trading por prioridad: la primera que coincide gana
+# ("Funding Fee" -> funding, no fee)
+NON_TRADING_CATEGORIES = {
+    'transfer': ['transfer', 'transferencia', 'deposit', 'deposito', 'withdrawal', 'retiro'],
+    'funding': ['funding', 'interest', 'interes'],
+    'fee': ['commission', 'comision', 'fee'],
+    'reward': ['bonus', 'rebate', 'cashback', 'staking', 'reward', 'recompensa', 'airdrop'],
+}
+
+POSSIBLE_TYPE_COLUMNS = TYPE_COLUMN_WORDS
+
+
+@dataclass
+class ClassificationResult:
+    """📋 Resultado de clasificar una hoja"""
+
+    type_column: str
+    trading_mask: np.ndarray                      # ✅ True en filas de trading real
+    category_counts: Dict[str, int] = field(default_factory=dict)
+    category_amounts: Dict[str, float] = field(default_factory=dict)
+    amount_column: Optional[str] = None
+
+    @property
+    def excluded_count(self) -> int:
+        return int(len(self.trading_mask) - self.trading_mask.sum())
+
+
+class TransactionClassifier:
+    """🏷️ Clasifica la columna de tipo trabajando sobre sus valores distintos"""
+
+    def __init__(self, categories: Optional[Dict[str, List[str]]] = None):
+        self.categories = dict(categories or NON_TRADING_CATEGORIES)
+        self.category_names = list(self.categories) + [TRADE_CATEGORY]
+        self._patterns = [
+            re.compile('|'.join(re.escape(keyword) for keyword in keywords))
+            for keywords in self.categories.values()
+        ]
+
+    def fingerprint(self) -> str:
+        """🔑 Hash de las categorías (en orden de prioridad) y sus palabras clave"""
+        blob = json.dumps([[name, sorted(keywords)] for name, keywords in self.categories.items()])
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()[:16]
+
+    @staticmethod
+    def detect_type_column(df) -> Optional[str]:
+        """🔎 Columna de tipo de operación (perfil de exchange o heurística; 'Margin Type' no cuenta)"""
+        return resolve_columns(df.columns).type
+
+    def categorize_value(self, value) -> int:
+        """🏷️ Índice de categoría para un único valor de tipo"""
+        if not isinstance(value, str):
+            return len(self.categories)  # trade
+
+        value_lower = value.lower()
+        for index, pattern in enumerate(self._patterns):
+            if pattern.search(value_lower):
+                return index
+        return len(self.categories)
+
+    def classify(self, df, type_col: str, amount_col: Optional[str] = None) -> ClassificationResult:
+        """⚡ Factorizar la columna, clasificar solo los valores únicos y difundir el resultado"""
+        codes, uniques = pd.factorize(df[type_col], use_na_sentinel=True)
+
+        # El último hueco recoge los NaN (código -1) como trade
+        trade_index = len(self.categories)
+        unique_categories = np.array(
+            [self.categorize_value(value) for value in uniques] + [trade_index],
+            dtype=np.intp
+        )
+        row_categories = unique_categories[codes]
+
+        n_categories = len(self.category_names)
+        counts = np.bincount(row_categories, minlength=n_categories)
+
+        category_amounts = {}
+        if amount_col is not None:
+            amounts = pd.to_numeric(df[amount_col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            sums = np.bincount(row_categories, weights=np.nan_to_num(amounts), minlength=n_categories)
+            category_amounts = {name: float(sums[i]) for i, name in enumerate(self.category_names) if counts[i] > 0}
+
+        return ClassificationResult(
+            type_column=type_col,
+            trading_mask=row_categories == trade_index,
+            category_counts={name: int(counts[i]) for i, name in enumerate(self.category_names) if counts[i] > 0},
+            category_amounts=category_amounts,
+            amount_column=amount_col
+        )
+
+
+DEFAULT_CLASSIFIER = TransactionClassifier()